@@ -0,0 +1,246 @@
+"""Hot-path benchmark for GLOW PICK.
+
+Generates synthetic catalogs shaped like cosmetic_p.csv (same brands,
+labels, price/rank and skin-type mix, and the same distribution of
+ingredients per product and ingredient frequencies) and times every stage
+the app runs: CSV parse, index build, cache write/load, vocabulary and
+search, query mixes, recommendations, table formatting, chart aggregates
+and chart rendering with Agg. Runs headless.
+
+    python benchmarks/hot_paths.py [--sizes 2000,100000,1000000] [--repeat 3]
+                                   [--queries 200] [--json hot_paths.json]
+
+Each stage reports p50/p99 latency over its runs and the peak memory
+allocated while it ran (tracemalloc, measured on an extra warm-up run).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import matplotlib  # noqa: E402
+matplotlib.use('Agg')
+
+from catalog import SKIN_TYPES, ProductCatalog, Query, QueryError  # noqa: E402
+from catalog_cache import read_cache, read_csv, write_cache  # noqa: E402
+from ingredient_index import ALL, ANY, build_index, split_ingredients  # noqa: E402
+from ingredient_search import IngredientSearch  # noqa: E402
+from jobs import CancelToken  # noqa: E402
+from ranking import BEST_RANK, BEST_VALUE  # noqa: E402
+from result_aggregates import ResultAggregates  # noqa: E402
+from result_table import FormattedRows  # noqa: E402
+
+SOURCE_CSV = os.path.join(ROOT, 'cosmetic_p.csv')
+
+# Share of ingredient slots filled with a synthetic rare ingredient, so the
+# vocabulary keeps growing with the catalog like a real long tail
+LONG_TAIL = 0.03
+
+# Rows fetched for the table and chart stages
+RESULT_ROWS = 10_000
+CHART_ROWS = 500
+
+
+def synthetic_catalog(num_rows, rng):
+    """Return a DataFrame of ``num_rows`` products sampled from the real data."""
+    source = pd.read_csv(SOURCE_CSV)
+    per_row = [split_ingredients(s) for s in source['ingredients']]
+    counts = np.array([len(names) for names in per_row])
+    vocabulary, frequencies = np.unique(np.concatenate([names for names in per_row if names]),
+                                        return_counts=True)
+
+    rows = rng.integers(0, len(source), num_rows)
+    sizes = counts[rng.integers(0, len(counts), num_rows)]
+    tokens = rng.choice(len(vocabulary), sizes.sum(), p=frequencies / frequencies.sum())
+    rare = rng.random(len(tokens)) < LONG_TAIL
+    rare_ids = rng.integers(0, max(num_rows // 10, 1), rare.sum())
+    # Gather from an object array: a fixed-width '<U' one is sized for the
+    # longest name and runs out of memory on large catalogs
+    names = vocabulary.astype(object)[tokens]
+    names[rare] = [f"Synthetic Extract {i}" for i in rare_ids]
+    ends = np.cumsum(sizes)
+    ingredients = [', '.join(names[end - size:end]) if size else 'No Info'
+                   for end, size in zip(ends, sizes)]
+
+    frame = source.iloc[rows].reset_index(drop=True)
+    return frame.assign(name=[f"{name} #{i}" for i, name in enumerate(frame['name'])],
+                        ingredients=ingredients)
+
+
+def query_mix(catalog, count, rng):
+    """Queries like the ones the filter page sends, drawn from the catalog."""
+    brands = catalog.brands
+    frequent = [catalog.ingredient_index.names[i]
+                for i in np.argsort(-catalog.ingredient_index.frequencies)[:200]]
+    price = catalog.stats['price']
+    queries = []
+    for _ in range(count):
+        ingredients = tuple(rng.choice(frequent, rng.integers(0, 4), replace=False))
+        skin_types = tuple(rng.choice(SKIN_TYPES, rng.integers(0, 3), replace=False))
+        queries.append(Query(
+            brand=rng.choice(brands) if rng.random() < 0.5 else None,
+            skin_types=skin_types,
+            ingredients=ingredients,
+            ingredient_mode=ANY if rng.random() < 0.5 else ALL,
+            price_min=float(price.quantile(0.25)) if rng.random() < 0.3 else None,
+            price_max=float(price.quantile(0.75)) if rng.random() < 0.3 else None,
+            limit=50,
+            order_by=(BEST_RANK, BEST_VALUE, ())[rng.integers(0, 3)],
+        ))
+    return queries
+
+
+def run_queries(catalog, queries, cold):
+    times = []
+    for query in queries:
+        if cold:
+            catalog.query_cache.clear()
+        start = time.perf_counter()
+        try:
+            catalog.query(query)
+        except QueryError:
+            pass    # nothing matched or fewer rows than the limit
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def peak_memory(fn):
+    """Peak bytes allocated while ``fn`` runs."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(times, peak):
+    times = np.asarray(times)
+    return {
+        'runs': len(times),
+        'p50_ms': float(np.percentile(times, 50) * 1000),
+        'p99_ms': float(np.percentile(times, 99) * 1000),
+        'mean_ms': float(times.mean() * 1000),
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def report(name, result):
+    print(f"  {name:<36} p50 {result['p50_ms']:10.2f} ms  p99 {result['p99_ms']:10.2f} ms  "
+          f"peak {result['peak_mb']:8.1f} MB")
+
+
+def stage(results, name, fn, repeat):
+    """Time ``fn`` ``repeat`` times after one warm-up run that measures memory."""
+    peak = peak_memory(fn)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    results[name] = summarize(times, peak)
+    report(name, results[name])
+
+
+def sample_stage(results, name, run, *args):
+    """Like ``stage`` for functions that return one latency per sample."""
+    peak = peak_memory(lambda: run(*args))
+    results[name] = summarize(run(*args), peak)
+    report(name, results[name])
+
+
+def bench_size(num_rows, args, directory):
+    rng = np.random.default_rng(args.seed)
+    csv_path = os.path.join(directory, f'catalog_{num_rows}.csv')
+    synthetic_catalog(num_rows, rng).to_csv(csv_path, index=False)
+    print(f"{num_rows} rows ({os.path.getsize(csv_path) / 2 ** 20:.1f} MB CSV)")
+
+    results = {}
+    stage(results, 'csv_parse', lambda: read_csv(csv_path, SKIN_TYPES), args.repeat)
+    df = read_csv(csv_path, SKIN_TYPES)
+    stage(results, 'index_build', lambda: build_index(df['ingredients']), args.repeat)
+    index = build_index(df['ingredients'])
+    stage(results, 'cache_write', lambda: write_cache(csv_path, df, index, SKIN_TYPES), args.repeat)
+    stage(results, 'cache_load', lambda: read_cache(csv_path), args.repeat)
+
+    catalog = ProductCatalog.from_csv(csv_path)
+    stage(results, 'vocabulary', lambda: (sorted(index.names, key=str.casefold),
+                                          IngredientSearch(index)), args.repeat)
+    search = catalog.ingredient_search
+    prefixes = [name[:3] for name in rng.choice(index.names, args.queries)]
+    sample_stage(results, 'ingredient_search', lambda: [_timed(search.search, p) for p in prefixes])
+
+    queries = query_mix(catalog, args.queries, rng)
+    sample_stage(results, 'query_cold', run_queries, catalog, queries, True)
+    run_queries(catalog, queries, False)
+    sample_stage(results, 'query_warm', run_queries, catalog, queries, False)
+
+    products = rng.choice(catalog.df['name'].to_numpy(), min(args.queries, 50))
+    catalog.recommender  # built once, like on the first lookup in the app
+    sample_stage(results, 'recommend', lambda: [_timed(catalog.recommend, p, 10, None) for p in products])
+
+    frame = catalog.query(Query(limit=min(RESULT_ROWS, len(catalog)), order_by=BEST_RANK)).frame
+    stage(results, 'table_first_block', lambda: FormattedRows(frame).rows(0, 30), args.repeat)
+    stage(results, 'table_all_blocks', lambda: FormattedRows(frame).rows(0, len(frame)), args.repeat)
+
+    from charts import CHARTS, price_rank_scatter, render_chart
+    from figure_pool import FigurePool
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    pool = FigurePool(canvas_class=FigureCanvasAgg)
+    chart_data = frame.iloc[:CHART_ROWS]
+    stage(results, 'chart_aggregates', lambda: ResultAggregates.from_frame(chart_data), args.repeat)
+    for _, draw, name in CHARTS:
+        stage(results, 'chart: ' + name,
+              lambda draw=draw: render_chart(CancelToken(), pool, draw, chart_data, catalog,
+                                             SKIN_TYPES, (800, 400), reuse=False), args.repeat)
+    # The scatter switches to a density view on large results
+    stage(results, f'chart: price vs rank ({len(frame)} rows)',
+          lambda: render_chart(CancelToken(), pool, price_rank_scatter, frame, catalog,
+                               SKIN_TYPES, (800, 400), reuse=False), args.repeat)
+    pool.release_all()
+    return results
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='2000,100000,1000000',
+                        help='comma-separated catalog sizes in rows')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage')
+    parser.add_argument('--queries', type=int, default=200, help='queries per query mix')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cpus': os.cpu_count(),
+        'sizes': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for num_rows in (int(size) for size in args.sizes.split(',')):
+            results['sizes'][str(num_rows)] = bench_size(num_rows, args, directory)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
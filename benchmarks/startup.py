@@ -0,0 +1,94 @@
+"""Startup benchmark for GLOW PICK.
+
+Measures the import cost of the modules on (and off) the startup path and
+the time until the start page is on screen. Every measurement runs in a
+fresh interpreter so earlier imports don't hide the cost of later ones.
+
+    python benchmarks/startup.py [--repeat 5] [--json startup.json]
+
+Time-to-first-window needs a display; without one it is reported as null.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the start page needs, followed by the plotting stack that should
+# only load on the first visualization
+MODULES = (
+    'numpy',
+    'pandas',
+    'catalog',
+    'result_table',
+    'jobs',
+    'matplotlib.pyplot',
+    'seaborn',
+    'charts',
+)
+
+_IMPORT_SNIPPET = (
+    'import time; t = time.perf_counter(); import {module}; '
+    'print(time.perf_counter() - t)'
+)
+
+
+def run_python(code, env=None):
+    return subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True).stdout
+
+
+def import_cost(module, repeat):
+    """Median wall time of ``import module`` in a fresh interpreter."""
+    times = [float(run_python(_IMPORT_SNIPPET.format(module=module)).strip().splitlines()[-1])
+             for _ in range(repeat)]
+    return statistics.median(times)
+
+
+def time_to_first_window(repeat):
+    """Median time from the start of ui.py until the start page is mapped."""
+    env = dict(os.environ, GLOWPICK_STARTUP_BENCHMARK='1')
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, 'ui.py'], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+        reports = [line for line in result.stdout.splitlines() if line.startswith('{')]
+        if result.returncode != 0 or not reports:
+            return None, result.stderr.strip().splitlines()[-1:] or ['ui.py exited without a report']
+        samples.append(json.loads(reports[-1]))
+    return {
+        'seconds': statistics.median(s['time_to_first_window'] for s in samples),
+        'plotting_imported': any(s['plotting_imported'] for s in samples),
+    }, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {'python': sys.version.split()[0], 'imports': {}}
+    for module in MODULES:
+        seconds = import_cost(module, args.repeat)
+        results['imports'][module] = seconds
+        print(f"import {module:<20} {seconds * 1000:8.1f} ms")
+
+    first_window, error = time_to_first_window(args.repeat)
+    results['time_to_first_window'] = first_window
+    if first_window is None:
+        print(f"time to first window: unavailable ({error[0]})")
+    else:
+        print(f"time to first window: {first_window['seconds'] * 1000:.1f} ms "
+              f"(plotting imported: {first_window['plotting_imported']})")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,473 @@
+import threading
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from catalog_cache import CATEGORICAL_COLUMNS, FLOAT_COLUMNS, load_catalog_data
+from catalog_stats import CatalogStats
+from catalog_updates import plan_changes
+from perf import count, span
+from ingredient_index import ALL, ANY, IncidenceMatrix, build_index, normalize_ingredient
+from ingredient_search import IngredientSearch
+from query_cache import FilterKey, QueryCache
+from ranking import SCORE, SortKey, key_values, rank_columns, top_k
+from recommend import COSINE, Recommender
+from skin_mask import SKIN_COLUMN, bits, decode, match as match_skin
+
+SKIN_TYPES = ('Combination', 'Dry', 'Normal', 'Oily', 'Sensitive')
+ALL_BRANDS = 'All Brands'
+
+
+class QueryError(ValueError):
+    """Raised when a query is invalid or matches no products.
+
+    The message is meant to be shown to the user as is.
+    """
+
+
+@dataclass(frozen=True)
+class Query:
+    """Typed filter spec for ProductCatalog.query.
+
+    Bounds left as None default to the catalog's own min/max. With an
+    ``order_by`` (see ranking.py) the query returns the best ``limit``
+    matches instead of the first ones in file order.
+    """
+    brand: Optional[str] = None
+    skin_types: Tuple[str, ...] = ()
+    skin_mode: str = ANY
+    ingredients: Tuple[str, ...] = ()
+    ingredient_mode: str = ANY
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    rank_min: Optional[float] = None
+    rank_max: Optional[float] = None
+    limit: int = 10
+    order_by: Tuple[SortKey, ...] = ()
+    score_weights: Tuple[float, float] = (0.5, 0.5)
+
+
+@dataclass
+class QueryResult:
+    """Rows returned by a query plus the number of products that matched.
+
+    ``complete`` is False when the query stopped early with rows left unread
+    (streaming mode), in which case ``total`` only counts the matches seen
+    before stopping.
+    """
+    query: Query
+    frame: pd.DataFrame
+    total: int
+    complete: bool = True
+
+    def __len__(self):
+        return len(self.frame)
+
+
+class ProductCatalog:
+    """Headless, read-only view of the cosmetics dataset.
+
+    Holds the base DataFrame and the structures derived from it (the
+    ingredient index) and answers Query objects without touching Tk.
+    Changes are applied with ``apply``, which returns a new snapshot.
+    """
+
+    def __init__(self, df, ingredient_index=None, stats=None):
+        self.df = df
+        if ingredient_index is None:
+            ingredient_index = build_index(df['ingredients'])
+        self.ingredient_index = ingredient_index
+        if stats is None:
+            stats = CatalogStats.from_frame(df, FLOAT_COLUMNS, CATEGORICAL_COLUMNS, SKIN_TYPES)
+        self.stats = stats
+        self._ingredient_search = None
+        self._search_lock = threading.Lock()
+        self._incidence = None
+        self._recommender = None
+        self._product_rows = None
+        self._product_keys = None
+        # Bumped by every applied change batch; cache entries are per version
+        self.version = 0
+        self.query_cache = QueryCache()
+
+    @classmethod
+    def from_csv(cls, path='cosmetic_p.csv', use_cache=True):
+        """Load the catalog, from the binary cache when it is up to date."""
+        with span('load') as s:
+            df, ingredient_index = load_catalog_data(path, SKIN_TYPES, use_cache)
+            catalog = cls(df, ingredient_index)
+            s.set(rows=len(df))
+        return catalog
+
+    def __len__(self):
+        return len(self.df)
+
+    @property
+    def columns(self):
+        """Columns of result frames: the skin-type bitmask decoded into flags."""
+        columns = [col for col in self.df.columns if col != SKIN_COLUMN]
+        return columns + list(SKIN_TYPES)
+
+    @property
+    def brands(self):
+        return self.stats.values('brand')
+
+    @property
+    def ingredient_search(self):
+        """Type-ahead ingredient search, built on first use.
+
+        Building it takes seconds on large vocabularies, so callers on the
+        UI thread should build it from a worker; a search that arrives while
+        it is being built waits for that build instead of starting another.
+        """
+        with self._search_lock:
+            if self._ingredient_search is None:
+                self._ingredient_search = IngredientSearch(self.ingredient_index)
+            return self._ingredient_search
+
+    @property
+    def incidence(self):
+        """Product x ingredient CSR incidence matrix, built on first use."""
+        if self._incidence is None:
+            self._incidence = IncidenceMatrix.from_index(self.ingredient_index)
+        return self._incidence
+
+    @property
+    def recommender(self):
+        """Ingredient similarity between products, built on first use."""
+        if self._recommender is None:
+            self._recommender = Recommender(self.ingredient_index, self.incidence)
+        return self._recommender
+
+    @property
+    def product_keys(self):
+        """(brand, name) -> row id of every product, built on first use."""
+        if self._product_keys is None:
+            keys = zip(self._column('brand', None), self._column('name', None))
+            self._product_keys = {key: row for row, key in enumerate(keys)}
+        return self._product_keys
+
+    def apply(self, changes):
+        """Return a new catalog with a batch of changes applied.
+
+        ``changes`` are catalog_updates.Change objects or records with an
+        optional 'op', e.g. from ``read_changes``; products are keyed on
+        (brand, name). Only the changed rows are re-tokenized and re-checked:
+        the ingredient index, stats, incidence matrix and cached query
+        results are updated from this catalog's instead of being rebuilt.
+        This catalog is left untouched, so code holding it keeps a
+        consistent snapshot; the new one has ``version + 1``. A batch that
+        changes nothing returns this catalog.
+        """
+        with span('apply') as s:
+            edit = plan_changes(self.df, self.product_keys, changes, SKIN_TYPES)
+            s.set(deleted=len(edit.removed), upserted=len(edit.updated), appended=len(edit.appended_keys))
+            if not edit:
+                return self
+            ingredient_index, tokens = self.ingredient_index.updated(edit.keep, edit.ingredients,
+                                                                     edit.appended_ingredients)
+            stats = self.stats.copy()
+            stats.remove_rows(self.df.iloc[np.concatenate([edit.removed, edit.updated])])
+            stats.add_rows(edit.frame.iloc[edit.changed])
+
+            catalog = ProductCatalog(edit.frame, ingredient_index, stats)
+            catalog.version = self.version + 1
+            if self._incidence is not None:
+                catalog._incidence = self._incidence.splice(edit.keep, list(edit.ingredients), tokens,
+                                                            len(ingredient_index))
+            if self._product_keys is not None and not len(edit.removed):
+                # Without deletions the rows keep their ids
+                product_keys = dict(self._product_keys)
+                product_keys.update(zip(edit.appended_keys, range(len(self), len(catalog))))
+                catalog._product_keys = product_keys
+            self._carry_query_cache(catalog, edit)
+        return catalog
+
+    def _carry_query_cache(self, catalog, edit):
+        # Cached results stay valid for the unchanged rows: renumber those and
+        # re-check only the changed rows against each cached key
+        entries = self.query_cache.items(self.version)
+        if not entries:
+            return
+        remap = None
+        if len(edit.removed):
+            remap = np.full(len(self), -1, dtype=np.int64)
+            remap[edit.keep] = np.arange(len(edit.keep))
+        changed = edit.changed
+        for key, row_ids in entries:
+            if remap is not None:
+                row_ids = remap[row_ids]
+                row_ids = row_ids[row_ids >= 0]
+            row_ids = np.setdiff1d(row_ids, edit.positions, assume_unique=True)
+            row_ids = np.union1d(row_ids, catalog._evaluate(key, changed))
+            catalog.query_cache.put(key, row_ids, catalog.version)
+
+    def find_product(self, name, brand=None):
+        """Return the row id of the product called ``name`` (case-insensitive).
+
+        ``brand`` disambiguates products sharing a name; otherwise the first
+        one in the catalog is used. Raises QueryError when there is none.
+        """
+        if self._product_rows is None:
+            product_rows = {}
+            for row, product in enumerate(self._column('name', None)):
+                if isinstance(product, str):
+                    product_rows.setdefault(product.strip().casefold(), []).append(row)
+            self._product_rows = product_rows
+        rows = self._product_rows.get(name.strip().casefold(), [])
+        if brand is not None:
+            brands = self._column('brand', np.asarray(rows, dtype=np.int64))
+            rows = [row for row, product_brand in zip(rows, brands) if product_brand == brand]
+        if not rows:
+            raise QueryError(f"Product not found: {name}")
+        return rows[0]
+
+    def recommend(self, name, k=10, brand=None, metric=COSINE, same_label=False,
+                  skin_types=(), skin_mode=ANY, cheaper=False):
+        """Return the ``k`` products most similar to ``name``, most similar first.
+
+        Similarity is computed over ingredient sets (see recommend.py). The
+        candidates can be restricted to the product's own Label, to skin
+        types, and to products cheaper than it. The frame has an extra
+        'similarity' column; ties go to the cheaper product.
+        """
+        row = self.find_product(name, brand)
+        with span('recommend.scores', metric=metric) as s:
+            candidates, similarity = self.recommender.scores(row, metric)
+            s.set(candidates=len(candidates))
+
+        keep = np.ones(len(candidates), dtype=bool)
+        if same_label:
+            keep &= self._equals('Label', self.df['Label'].iloc[row], candidates)
+        if skin_types:
+            keep &= match_skin(self._column(SKIN_COLUMN, candidates), bits(skin_types, SKIN_TYPES), skin_mode)
+        if cheaper:
+            keep &= self._column('price', candidates) < self.df['price'].iloc[row]
+        candidates, similarity = candidates[keep], similarity[keep]
+
+        best = top_k([key_values(similarity, descending=True),
+                      key_values(self._column('price', candidates))], k)
+        return self.materialize(candidates[best], skin_types).assign(similarity=similarity[best])
+
+    def ingredient_matrix(self, row_ids, top_n=30):
+        """Return (dense 0/1 matrix, ingredient names) for the ``top_n``
+        ingredients most frequent among ``row_ids``."""
+        sub = self.incidence.take(row_ids)
+        columns = sub.top_columns(top_n)
+        names = [self.ingredient_index.names[i] for i in columns]
+        return sub.to_dense(columns), names
+
+    def resolve_bounds(self, query):
+        """Fill in default price/rank bounds and validate them."""
+        price, rank = self.stats['price'], self.stats['rank']
+        price_min = query.price_min if query.price_min is not None else price.min
+        price_max = query.price_max if query.price_max is not None else price.max
+        rank_min = query.rank_min if query.rank_min is not None else rank.min
+        rank_max = query.rank_max if query.rank_max is not None else rank.max
+
+        if price_min < price.min or price_max > price.max:
+            raise QueryError(f"Price must be between {price.min:.2f} and {price.max:.2f}")
+
+        if rank_min < rank.min or rank_max > rank.max:
+            raise QueryError(f"Rank must be between {rank.min} and {rank.max}")
+
+        if price_min > price_max:
+            raise QueryError("Minimum price cannot be greater than maximum price.")
+
+        if rank_min > rank_max:
+            raise QueryError("Minimum rank cannot be greater than maximum rank.")
+
+        # Compare in the columns' own dtype (float32 from the cache), so that
+        # a bound of 4.1 still matches a stored rank of 4.1
+        price_type = self.df['price'].dtype.type
+        rank_type = self.df['rank'].dtype.type
+        return price_type(price_min), price_type(price_max), rank_type(rank_min), rank_type(rank_max)
+
+    def _column(self, col, rows):
+        # Column values as a numpy array, restricted to ``rows`` if given
+        values = self.df[col].to_numpy()
+        return values if rows is None else values[rows]
+
+    def _equals(self, col, value, rows):
+        # Compare categorical columns through their integer codes
+        values = self.df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            size = len(values) if rows is None else len(rows)
+            if value not in categories:
+                return np.zeros(size, dtype=bool)
+            codes = values.cat.codes.to_numpy()
+            return (codes if rows is None else codes[rows]) == categories.get_loc(value)
+        return self._column(col, rows) == value
+
+    def _range_mask(self, mask, col, low, high, rows):
+        # Skip the comparison entirely when the bounds cover the whole column.
+        # Not with missing values: the comparison drops NaN rows, and the
+        # result must not depend on whether the shortcut applies
+        column_stats = self.stats[col]
+        if not column_stats.missing and low <= column_stats.min and high >= column_stats.max:
+            return
+        values = self._column(col, rows)
+        mask &= values >= low
+        mask &= values <= high
+
+    def filter_key(self, query, bounds=None):
+        """Return the canonical FilterKey of ``query``."""
+        if bounds is None:
+            bounds = self.resolve_bounds(query)
+        brand = query.brand if query.brand and query.brand != ALL_BRANDS else None
+        ids = [self.ingredient_index.lookup(name) for name in query.ingredients]
+        ingredient_ids = tuple(sorted({i for i in ids if i is not None}))
+        # No product contains an unknown ingredient: ALL of a list with one
+        # (blank names aside) or ANY of only unknown ones matches nothing,
+        # while NONE simply ignores them
+        if query.ingredient_mode == ALL:
+            unmatched = any(i is None and normalize_ingredient(name) for i, name in zip(ids, query.ingredients))
+        else:
+            unmatched = query.ingredient_mode == ANY and bool(ids) and not ingredient_ids
+        skin_types = tuple(st for st in SKIN_TYPES if st in query.skin_types)
+        # Without a selection every mode matches all rows
+        skin_mode = query.skin_mode if skin_types else ANY
+        return FilterKey(brand, skin_types, skin_mode, ingredient_ids, query.ingredient_mode, unmatched,
+                         *(float(b) for b in bounds))
+
+    def _evaluate(self, key, rows=None, token=None):
+        # All predicates are combined into one mask over the base frame (or
+        # over ``rows`` when refining a cached superset); no intermediate
+        # DataFrame is built. ``token`` is checked between predicates.
+        if key.ingredients_unmatched:
+            return np.empty(0, dtype=np.int64) if rows is None else rows[:0]
+        mask = np.ones(len(self.df) if rows is None else len(rows), dtype=bool)
+
+        # Handle brand
+        if key.brand is not None:
+            with span('filter.brand', rows_scanned=len(mask)):
+                mask &= self._equals('brand', key.brand, rows)
+
+        # Match the selected skin types with one bitwise op on the bitmask
+        if key.skin_types:
+            with span('filter.skin', rows_scanned=len(mask)):
+                mask &= match_skin(self._column(SKIN_COLUMN, rows), bits(key.skin_types, SKIN_TYPES), key.skin_mode)
+
+        if token is not None:
+            token.check()
+
+        # Handle ingredients through the inverted index
+        if key.ingredient_ids:
+            with span('filter.ingredients', ingredients=len(key.ingredient_ids)):
+                ingredient_mask = self.ingredient_index.mask(list(key.ingredient_ids), key.ingredient_mode)
+                mask &= ingredient_mask if rows is None else ingredient_mask[rows]
+
+        if token is not None:
+            token.check()
+
+        # Filter based on price and rank
+        with span('filter.price_rank', rows_scanned=len(mask)):
+            self._range_mask(mask, 'price', key.price_min, key.price_max, rows)
+            self._range_mask(mask, 'rank', key.rank_min, key.rank_max, rows)
+        return np.flatnonzero(mask) if rows is None else rows[mask]
+
+    def _match(self, query, bounds, token=None):
+        key = self.filter_key(query, bounds)
+        if key.ingredients_unmatched:
+            return np.empty(0, dtype=np.int64)
+
+        # Repeated queries are answered from the cache, and narrower queries
+        # refine the smallest cached superset instead of scanning everything
+        row_ids = self.query_cache.get(key, self.version)
+        if row_ids is not None:
+            count('query_cache.hits')
+            return row_ids
+        superset = self.query_cache.superset(key, self.version)
+        count('query_cache.refinements' if superset is not None else 'query_cache.misses')
+        row_ids = self._evaluate(key, superset, token)
+        return self.query_cache.put(key, row_ids, self.version)
+
+    def match(self, query):
+        """Return the sorted row ids of every product matching ``query``.
+
+        The array may be shared with the query cache and is read-only.
+        """
+        return self._match(query, self.resolve_bounds(query))
+
+    def top_k(self, row_ids, order_by, k, score_weights=(0.5, 0.5)):
+        """Return the ``k`` best of ``row_ids`` under ``order_by``, best first.
+
+        Uses partial selection, so only the rows that can make the cut are
+        sorted. Returns fewer rows when fewer are given.
+        """
+        columns = {}
+        for sort_key in order_by:
+            for col in ('rank', 'price') if sort_key.column == SCORE else (sort_key.column,):
+                if col not in columns:
+                    columns[col] = self._column(col, row_ids)
+        return np.asarray(row_ids)[rank_columns(columns, order_by, k, score_weights)]
+
+    def materialize(self, row_ids, skin_types=()):
+        """Build the result frame for ``row_ids``, copying only those rows.
+
+        The skin-type bitmask is decoded into one 0/1 column per skin type;
+        when ``skin_types`` is given, only those columns are kept.
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        # Gather every column with numpy and build the frame in one go;
+        # inserting columns one by one costs more than the copy itself
+        data = {}
+        for col in self.df.columns:
+            if col == SKIN_COLUMN:
+                continue
+            values = self.df[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Drop categories that don't occur in the result so counts and
+                # charts only show brands and labels that are actually present
+                used, codes = np.unique(values.cat.codes.to_numpy()[row_ids], return_inverse=True)
+                if len(used) and used[0] < 0:
+                    used, codes = used[1:], codes - 1    # missing values keep code -1
+                data[col] = pd.Categorical.from_codes(codes, categories=values.cat.categories[used])
+            else:
+                data[col] = values.to_numpy()[row_ids]
+        flags = decode(self._column(SKIN_COLUMN, row_ids), SKIN_TYPES)
+        if skin_types:
+            flags = {col: values for col, values in flags.items() if col in skin_types}
+        data.update(flags)
+        return pd.DataFrame(data, index=self.df.index[row_ids], copy=False)
+
+    def query(self, query, token=None):
+        """Run ``query`` and return a QueryResult.
+
+        Raises QueryError for invalid bounds or when nothing matches. A
+        ``token`` (jobs.CancelToken) is checked between the filtering,
+        ranking and copying steps, so a superseded query stops early.
+        """
+        with span('query') as s:
+            result = self._query(query, token)
+            s.set(rows_matched=result.total, rows_returned=len(result))
+        return result
+
+    def _query(self, query, token):
+        bounds = self.resolve_bounds(query)
+        if query.limit <= 0:
+            raise QueryError("Number of rows must be positive.")
+
+        row_ids = self._match(query, bounds, token)
+        if token is not None:
+            token.check()
+
+        if len(row_ids) == 0:
+            raise QueryError("No data matches the selected criteria.")
+
+        if query.order_by:
+            # Top-k mode returns fewer rows when fewer products match
+            selected = self.top_k(row_ids, query.order_by, query.limit, query.score_weights)
+        elif query.limit > len(row_ids):
+            raise QueryError(f"Number of rows ({query.limit}) exceeds filtered dataset size ({len(row_ids)}).")
+        else:
+            selected = row_ids[:query.limit]
+        if token is not None:
+            token.check()
+
+        # Only the rows that are returned are ever copied out of the base frame
+        frame = self.materialize(selected, query.skin_types)
+        return QueryResult(query, frame, len(row_ids))
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from ingredient_index import IngredientIndex, build_index
+from perf import span
+from skin_mask import SKIN_COLUMN, pack_columns
+
+# Bump when the on-disk layout changes so old caches are rebuilt
+FORMAT_VERSION = 4
+
+CACHE_DIR = '.glowpick_cache'
+MANIFEST = 'manifest.json'
+DATA_PREFIX = 'data-'
+
+CATEGORICAL_COLUMNS = ('Label', 'brand')
+FLOAT_COLUMNS = ('price', 'rank')
+TEXT_COLUMNS = ('name', 'ingredients')
+
+logger = logging.getLogger(__name__)
+
+
+def cache_path(csv_path):
+    """Return the cache directory used for ``csv_path``."""
+    directory, filename = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(directory, CACHE_DIR, os.path.splitext(filename)[0])
+
+
+def file_signature(csv_path, sha1=None):
+    """Return the mtime/size/hash triple the cache is keyed on."""
+    stat = os.stat(csv_path)
+    if sha1 is None:
+        sha1 = file_sha1(csv_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': sha1}
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def csv_dtypes(skin_types, categorical=True):
+    """Explicit dtypes used to parse the catalog CSV.
+
+    Chunked readers pass ``categorical=False``: categories inferred per
+    chunk would not line up between chunks.
+    """
+    dtypes = {col: 'category' if categorical else str for col in CATEGORICAL_COLUMNS}
+    dtypes.update({col: 'float32' for col in FLOAT_COLUMNS})
+    dtypes.update({col: 'uint8' for col in skin_types})
+    return dtypes
+
+
+def read_csv(csv_path, skin_types):
+    """Parse the CSV with the same explicit dtypes the cache stores.
+
+    The skin-type flag columns are packed into one bitmask column.
+    """
+    df = pd.read_csv(csv_path, dtype=csv_dtypes(skin_types))
+    # Keep the categories sorted so the codes are stable between runs
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return pack_columns(df, skin_types)
+
+
+def _encode_text(values):
+    # Concatenated UTF-8 bytes plus offsets: a flat, memory-mappable layout
+    encoded = [str(v).encode('utf-8') if isinstance(v, str) else b'' for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def _decode_text(blob, offsets, missing=None):
+    data = blob.tobytes()
+    values = [data[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+    if missing is not None:
+        # Missing values are stored as empty strings plus a flag
+        for row in np.flatnonzero(missing):
+            values[row] = np.nan
+    return values
+
+
+def _save(directory, name, array):
+    np.save(os.path.join(directory, name + '.npy'), np.ascontiguousarray(array))
+
+
+def _load(directory, name):
+    return np.load(os.path.join(directory, name + '.npy'), mmap_mode='r')
+
+
+def _data_dir(directory, manifest):
+    # The arrays of a cache live in their own directory named by the manifest
+    name = manifest.get('data')
+    if not isinstance(name, str) or not name.startswith(DATA_PREFIX) or os.path.basename(name) != name:
+        raise ValueError(f"bad data directory in manifest: {name!r}")
+    return os.path.join(directory, name)
+
+
+def _remove_data(directory, manifest):
+    # Unlinking keeps the inodes alive for processes still mapping the files;
+    # where mapped files can't be removed (Windows) they are left behind
+    if manifest is None:
+        return
+    try:
+        if 'data' in manifest:
+            shutil.rmtree(_data_dir(directory, manifest), ignore_errors=True)
+            return
+        # Caches older than format 4 kept their arrays next to the manifest
+        for filename in os.listdir(directory):
+            if filename.endswith('.npy'):
+                os.remove(os.path.join(directory, filename))
+    except (OSError, ValueError) as e:
+        logger.warning("could not remove old catalog cache: %s", e)
+
+
+def write_cache(csv_path, df, ingredient_index, skin_types, sha1=None):
+    """Store the parsed catalog next to ``csv_path`` as memory-mappable arrays.
+
+    Categorical codes are stored in the integer type pandas uses for them,
+    so that loading can wrap the mapped file without converting it.
+
+    Files that are already mapped are never written to: every cache goes to
+    a new data directory, which the manifest is then atomically switched to,
+    so catalogs loaded from the previous cache keep their data.
+
+    Returns False (after logging a warning) when the cache can't be written,
+    e.g. on a read-only checkout; the app then simply keeps parsing the CSV.
+    """
+    directory = cache_path(csv_path)
+    token = uuid.uuid4().hex
+    data_dir = os.path.join(directory, DATA_PREFIX + token)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        previous = _load_manifest(directory)
+        os.mkdir(data_dir)
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'source': file_signature(csv_path, sha1),
+            'num_rows': len(df),
+            'columns': df.columns.tolist(),
+            'skin_types': list(skin_types),
+            'categories': {},
+            'data': os.path.basename(data_dir),
+        }
+
+        for col in CATEGORICAL_COLUMNS:
+            values = df[col].astype('category')
+            manifest['categories'][col] = values.cat.categories.tolist()
+            _save(data_dir, col + '.codes', values.cat.codes.to_numpy())
+
+        for col in FLOAT_COLUMNS:
+            _save(data_dir, col, df[col].to_numpy(dtype=np.float32))
+
+        # Skin-type bitmask: bit i is skin_types[i]
+        _save(data_dir, 'skin', df[SKIN_COLUMN].to_numpy(dtype=np.uint8))
+
+        for col in TEXT_COLUMNS:
+            blob, offsets = _encode_text(df[col])
+            _save(data_dir, col + '.blob', blob)
+            _save(data_dir, col + '.offsets', offsets)
+            _save(data_dir, col + '.missing', df[col].isna().to_numpy())
+
+        # Pre-tokenized ingredients: vocabulary plus per-row ingredient ids
+        indptr, token_ids = ingredient_index.to_tokens()
+        blob, offsets = _encode_text(ingredient_index.names)
+        _save(data_dir, 'vocab.blob', blob)
+        _save(data_dir, 'vocab.offsets', offsets)
+        _save(data_dir, 'tokens.indptr', indptr)
+        _save(data_dir, 'tokens.ids', token_ids)
+
+        # The manifest is written last, so a half-written cache is never valid
+        tmp_path = os.path.join(directory, f'{MANIFEST}.{token}.tmp')
+        with open(tmp_path, 'x') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST))
+    except OSError as e:
+        logger.warning("could not write catalog cache: %s", e)
+        shutil.rmtree(data_dir, ignore_errors=True)
+        return False
+    _remove_data(directory, previous)
+    return True
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_manifest(csv_path):
+    manifest = _load_manifest(cache_path(csv_path))
+    if manifest is None or manifest.get('format_version') != FORMAT_VERSION:
+        return None
+
+    # Fast path: unchanged mtime and size. Otherwise fall back to the hash,
+    # which survives a copy or touch that leaves the content unchanged.
+    source = manifest['source']
+    stat = os.stat(csv_path)
+    if stat.st_mtime_ns == source['mtime_ns'] and stat.st_size == source['size']:
+        return manifest
+    if stat.st_size == source['size'] and file_sha1(csv_path) == source['sha1']:
+        return manifest
+    return None
+
+
+def read_cache(csv_path):
+    """Return (df, ingredient_index) from a fresh cache, or None if stale.
+
+    The categorical codes, float and skin-type columns of ``df`` are views
+    of the memory-mapped files: they are paged in on demand and the pages
+    are shared with every process reading the same cache. The text columns
+    are decoded into memory.
+    """
+    manifest = _read_manifest(csv_path)
+    if manifest is None:
+        return None
+    try:
+        directory = _data_dir(cache_path(csv_path), manifest)
+        data = {}
+        for col in CATEGORICAL_COLUMNS:
+            data[col] = pd.Categorical.from_codes(_load(directory, col + '.codes'),
+                                                  categories=manifest['categories'][col])
+        for col in FLOAT_COLUMNS:
+            data[col] = np.asarray(_load(directory, col))
+        data[SKIN_COLUMN] = np.asarray(_load(directory, 'skin'))
+        for col in TEXT_COLUMNS:
+            data[col] = _decode_text(_load(directory, col + '.blob'), _load(directory, col + '.offsets'),
+                                     _load(directory, col + '.missing'))
+        # copy=False keeps one block per column instead of merging the
+        # float columns into a new array, so they stay memory-mapped
+        df = pd.DataFrame(data, columns=manifest['columns'], copy=False)
+
+        names = _decode_text(_load(directory, 'vocab.blob'), _load(directory, 'vocab.offsets'))
+        ingredient_index = IngredientIndex.from_tokens(names, _load(directory, 'tokens.indptr'),
+                                                       _load(directory, 'tokens.ids'))
+        return df, ingredient_index
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("ignoring unreadable catalog cache: %s", e)
+        return None
+
+
+def load_catalog_data(csv_path, skin_types, use_cache=True):
+    """Return (df, ingredient_index), from the cache when it is fresh.
+
+    A stale or missing cache falls back to parsing the CSV, and the cache
+    is rewritten for the next start.
+    """
+    if use_cache:
+        with span('load.cache') as s:
+            cached = read_cache(csv_path)
+            s.set(hit=cached is not None)
+        if cached is not None:
+            return cached
+    with span('load.csv_parse') as s:
+        df = read_csv(csv_path, skin_types)
+        s.set(rows=len(df))
+    with span('load.index_build') as s:
+        ingredient_index = build_index(df['ingredients'])
+        s.set(ingredients=len(ingredient_index))
+    if use_cache:
+        with span('load.cache_write'):
+            write_cache(csv_path, df, ingredient_index, skin_types)
+    return df, ingredient_index
@@ -0,0 +1,145 @@
+import copy
+from collections import Counter
+
+import numpy as np
+
+from skin_mask import SKIN_COLUMN, counts
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+class ColumnStats:
+    """Summary of one numeric column, kept as a sorted copy of its values.
+
+    min/max/quantiles are O(1) reads from the sorted array, and rows can be
+    added or removed with a binary search instead of a full rescan. NaN
+    values are left out of the array and only counted in ``missing``.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        nan = np.isnan(values)
+        self.values = np.sort(values[~nan])
+        self.missing = int(nan.sum())
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def min(self):
+        return self.values[0] if len(self.values) else np.nan
+
+    @property
+    def max(self):
+        return self.values[-1] if len(self.values) else np.nan
+
+    def quantile(self, q):
+        # Linear interpolation between the two nearest ranks, as np.quantile
+        # does by default, read from the sorted array without re-partitioning
+        if not 0 <= q <= 1:
+            raise ValueError(f"Quantile must be between 0 and 1: {q}")
+        n = len(self.values)
+        if not n:
+            return np.nan
+        position = q * (n - 1)
+        lower = int(position)
+        low, high = self.values[lower], self.values[min(lower + 1, n - 1)]
+        return low + (high - low) * (position - lower)
+
+    @property
+    def quantiles(self):
+        return {q: self.quantile(q) for q in QUANTILES}
+
+    def add(self, values):
+        values = np.sort(np.asarray(values, dtype=self.values.dtype))
+        nan = np.isnan(values)
+        self.missing += int(nan.sum())
+        values = values[~nan]
+        positions = np.searchsorted(self.values, values)
+        self.values = np.insert(self.values, positions, values)
+
+    def remove(self, values):
+        values = np.asarray(values, dtype=self.values.dtype)
+        nan = np.isnan(values)
+        self.missing -= int(nan.sum())
+        values = values[~nan]
+        if not len(values):
+            return
+        # Remove one occurrence per value: the k-th copy of a duplicated value
+        # maps to position leftmost + k
+        values = np.sort(values)
+        positions = np.searchsorted(self.values, values)
+        first = np.r_[True, values[1:] != values[:-1]]
+        group_start = np.maximum.accumulate(np.where(first, np.arange(len(values)), 0))
+        positions = positions + np.arange(len(values)) - group_start
+        self.values = np.delete(self.values, positions)
+
+
+class CatalogStats:
+    """Catalog-wide statistics computed once at load time.
+
+    Validation and the filter page read bounds from here instead of scanning
+    the DataFrame, and the counts are updated in place when rows change.
+    """
+
+    def __init__(self, numeric, categorical, skin_counts):
+        self.numeric = numeric            # column -> ColumnStats
+        self.categorical = categorical    # column -> Counter of values
+        self.skin_counts = skin_counts    # skin type -> number of products
+        self.num_rows = len(next(iter(numeric.values()))) if numeric else 0
+
+    @classmethod
+    def from_frame(cls, df, numeric_columns, categorical_columns, skin_types):
+        numeric = {col: ColumnStats(df[col].to_numpy(dtype=df[col].dtype)) for col in numeric_columns}
+        categorical = {col: Counter(df[col].value_counts().to_dict()) for col in categorical_columns}
+        skin_counts = counts(df[SKIN_COLUMN].to_numpy(), skin_types)
+        stats = cls(numeric, categorical, skin_counts)
+        stats.num_rows = len(df)
+        return stats
+
+    def __getitem__(self, col):
+        return self.numeric[col]
+
+    def copy(self):
+        """Independent copy, e.g. to update for a new catalog snapshot.
+
+        ColumnStats replace their sorted arrays on every change, so the copy
+        shares them instead of duplicating every value.
+        """
+        numeric = {col: copy.copy(column_stats) for col, column_stats in self.numeric.items()}
+        categorical = {col: Counter(counter) for col, counter in self.categorical.items()}
+        stats = CatalogStats(numeric, categorical, dict(self.skin_counts))
+        stats.num_rows = self.num_rows
+        return stats
+
+    def distinct(self, col):
+        """Number of distinct values currently present in ``col``."""
+        return sum(1 for count in self.categorical[col].values() if count > 0)
+
+    def values(self, col):
+        """Sorted distinct values currently present in ``col``."""
+        return sorted(value for value, count in self.categorical[col].items() if count > 0)
+
+    def _update(self, frame, sign):
+        for col, column_stats in self.numeric.items():
+            values = frame[col].to_numpy(dtype=column_stats.values.dtype)
+            if sign > 0:
+                column_stats.add(values)
+            else:
+                column_stats.remove(values)
+        for col, counter in self.categorical.items():
+            for value, count in frame[col].value_counts().items():
+                counter[value] += sign * count
+                if counter[value] <= 0:
+                    del counter[value]
+        for col, count in counts(frame[SKIN_COLUMN].to_numpy(), tuple(self.skin_counts)).items():
+            self.skin_counts[col] += sign * count
+        self.num_rows += sign * len(frame)
+
+    def add_rows(self, frame):
+        """Account for rows appended to the catalog."""
+        self._update(frame, 1)
+
+    def remove_rows(self, frame):
+        """Account for rows removed from the catalog."""
+        self._update(frame, -1)
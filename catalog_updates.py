@@ -0,0 +1,303 @@
+"""Change batches applied to a ProductCatalog (see ProductCatalog.apply).
+
+A change upserts or deletes the product identified by (brand, name).
+Batches can be read from delta files:
+
+    CSV     the catalog's columns plus an optional ``op`` column
+    JSONL   one {"op": "upsert" | "delete", "brand": ..., "name": ..., ...}
+            object per line (also .ndjson)
+
+``op`` defaults to upsert. Upserts may be partial: fields that are missing,
+null or empty keep the product's current value (new products leave them
+empty), while a NaN value clears the field. Skin types are given as their
+own 0/1 fields, as in the CSV. ``diff_frames`` computes the batch that turns
+one parsed catalog into another.
+"""
+import json
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from catalog_cache import FLOAT_COLUMNS
+from skin_mask import SKIN_COLUMN, decode
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+OPS = (UPSERT, DELETE)
+
+KEY_COLUMNS = ('brand', 'name')
+JSON_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+class ChangeError(ValueError):
+    """Raised for a malformed change or delta file.
+
+    The message is meant to be shown to the user as is.
+    """
+
+
+@dataclass(frozen=True)
+class Change:
+    """One upsert or delete of the product keyed on (brand, name)."""
+    op: str
+    brand: str
+    name: str
+    fields: dict = field(default_factory=dict)
+
+    @property
+    def key(self):
+        return self.brand, self.name
+
+    @classmethod
+    def from_record(cls, record):
+        """Build a Change from a dict of fields plus an optional 'op'."""
+        if isinstance(record, Change):
+            return record
+        if not isinstance(record, Mapping):
+            raise ChangeError("A change must be an object of fields")
+        fields = {col: value for col, value in record.items() if value is not None}
+        op = str(fields.pop('op', UPSERT)).strip().lower()
+        if op not in OPS:
+            raise ChangeError(f"Unknown change op: {op}")
+        if not all(col in fields for col in KEY_COLUMNS):
+            raise ChangeError("Every change needs a brand and a name")
+        brand, name = (str(fields.pop(col)) for col in KEY_COLUMNS)
+        return cls(op, brand, name, fields)
+
+
+def read_changes(path):
+    """Read a delta file (CSV, or JSON lines for .jsonl/.ndjson) into Changes."""
+    if os.path.splitext(path)[1].lower() in JSON_EXTENSIONS:
+        records = []
+        with open(path, encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except ValueError as e:
+                    raise ChangeError(f"{path}:{number}: invalid JSON ({e})") from e
+    else:
+        # Everything is read as text; values are converted per column later
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+        records = [{col: value for col, value in record.items() if value != ''}
+                   for record in frame.to_dict('records')]
+    return [Change.from_record(record) for record in records]
+
+
+def resolve(changes):
+    """Collapse a batch to one change per key; later changes win.
+
+    Returns {key: (op, fields, replace)}. Consecutive upserts of a key merge
+    their fields; an upsert after a delete replaces the product (``replace``)
+    instead of patching it.
+    """
+    latest = {}
+    for change in map(Change.from_record, changes):
+        previous = latest.get(change.key)
+        if change.op == DELETE:
+            latest[change.key] = (DELETE, {}, False)
+        elif previous is None:
+            latest[change.key] = (UPSERT, dict(change.fields), False)
+        elif previous[0] == DELETE:
+            latest[change.key] = (UPSERT, dict(change.fields), True)
+        else:
+            latest[change.key] = (UPSERT, {**previous[1], **change.fields}, previous[2])
+    return latest
+
+
+@dataclass
+class Edit:
+    """Row-level effect of a change batch on the catalog frame.
+
+    The new ``frame`` holds the old rows ``keep`` in order, followed by the
+    appended products. ``updated`` are the old rows upserted in place and
+    ``positions`` their rows in the new frame; ``ingredients`` maps those
+    positions whose ingredients changed to the (old, new) strings.
+    """
+    frame: pd.DataFrame
+    keep: np.ndarray
+    removed: np.ndarray
+    updated: np.ndarray
+    positions: np.ndarray
+    appended_keys: list
+    ingredients: dict
+    appended_ingredients: list
+
+    @property
+    def changed(self):
+        """Rows of the new frame that were upserted or appended, sorted."""
+        return np.concatenate([self.positions, np.arange(len(self.keep), len(self.frame))])
+
+    def __bool__(self):
+        return bool(len(self.removed) or len(self.updated) or self.appended_keys)
+
+
+def _convert(col, value, skin_types, key):
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return False if col in skin_types else np.nan
+    try:
+        if col in FLOAT_COLUMNS:
+            return float(value)
+        if col in skin_types:
+            return int(float(value)) != 0
+    except (TypeError, ValueError):
+        raise ChangeError(f"Invalid {col} for {key[0]} {key[1]}: {value!r}") from None
+    return str(value)
+
+
+def plan_changes(df, rows_by_key, changes, skin_types):
+    """Return the Edit that applies ``changes`` to the catalog frame ``df``.
+
+    ``rows_by_key`` maps (brand, name) to row ids of ``df``. Deleting a
+    product that doesn't exist is a no-op. Only the changed rows are
+    converted one by one; every column is then spliced with numpy.
+    """
+    allowed = (set(df.columns) - {SKIN_COLUMN} - set(KEY_COLUMNS)) | set(skin_types)
+    removed, updated, appended_keys, upserts, appends = [], [], [], [], []
+    for key, (op, fields, replace) in resolve(changes).items():
+        unknown = set(fields) - allowed
+        if unknown:
+            raise ChangeError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        fields = {col: _convert(col, value, skin_types, key) for col, value in fields.items()}
+        fields.update(zip(KEY_COLUMNS, key))
+        row = rows_by_key.get(key)
+        if op == DELETE:
+            if row is not None:
+                removed.append(row)
+        elif row is None:
+            appended_keys.append(key)
+            appends.append((fields, True))
+        else:
+            updated.append(row)
+            upserts.append((fields, replace))
+
+    # Upserted rows first (in row order), then the appended ones
+    order = sorted(range(len(updated)), key=updated.__getitem__)
+    entries = [upserts[i] for i in order] + appends
+    removed = np.array(sorted(removed), dtype=np.int64)
+    updated = np.array(sorted(updated), dtype=np.int64)
+    keep = np.setdiff1d(np.arange(len(df), dtype=np.int64), removed, assume_unique=True)
+    positions = np.searchsorted(keep, updated)
+
+    def changed_values(col, empty):
+        # New values of ``col`` for the changed rows; unset fields keep the old value
+        old = df[col].to_numpy()[updated]
+        return [fields[col] if col in fields else empty if replace else old[i]
+                for i, (fields, replace) in enumerate(entries)]
+
+    data = {}
+    for col in df.columns:
+        values = df[col]
+        if col == SKIN_COLUMN:
+            old = values.to_numpy()[updated]
+            new = np.zeros(len(entries), dtype=values.dtype)
+            for i, (fields, replace) in enumerate(entries):
+                mask = 0 if replace else int(old[i])
+                for bit, skin_type in enumerate(skin_types):
+                    if skin_type in fields:
+                        mask = mask | (1 << bit) if fields[skin_type] else mask & ~(1 << bit)
+                new[i] = mask
+            data[col] = _splice(values.to_numpy(), keep, positions, new)
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            data[col] = _splice_categorical(values, keep, positions, changed_values(col, np.nan))
+        elif col in FLOAT_COLUMNS:
+            new = np.array(changed_values(col, np.nan), dtype=values.dtype)
+            data[col] = _splice(values.to_numpy(), keep, positions, new)
+        else:
+            new = np.array(changed_values(col, None), dtype=object)
+            data[col] = pd.array(_splice(values.to_numpy(dtype=object), keep, positions, new),
+                                 dtype=values.dtype)
+
+    ingredients = {}
+    old_ingredients = df['ingredients'].to_numpy(dtype=object)
+    appended = np.arange(len(keep), len(keep) + len(appended_keys))
+    new_ingredients = data['ingredients'].to_numpy(dtype=object)
+    for position, row in zip(positions, updated):
+        new = new_ingredients[position]
+        if not _same(old_ingredients[row], new):
+            ingredients[int(position)] = (old_ingredients[row], new)
+
+    return Edit(pd.DataFrame(data, columns=df.columns), keep, removed, updated, positions,
+                appended_keys, ingredients, list(new_ingredients[appended]))
+
+
+def _same(a, b):
+    return a == b or (not isinstance(a, str) and not isinstance(b, str))
+
+
+def _splice(values, keep, positions, new):
+    # Kept rows in order, then the appended rows, with the upserted rows overwritten
+    out = np.concatenate([values[keep], new[len(positions):]])
+    out[positions] = new[:len(positions)]
+    return out
+
+
+def _splice_categorical(values, keep, positions, new):
+    categories = values.cat.categories
+    codes = values.cat.codes.to_numpy().astype(np.int32)
+    added = {value for value in new if isinstance(value, str)} - set(categories)
+    if added:
+        # Keep the categories sorted, as read_csv does, and renumber the old codes
+        merged = pd.Index(sorted([*categories, *added]))
+        codes = np.where(codes >= 0, merged.get_indexer(categories)[codes], -1)
+        categories = merged
+    new_codes = categories.get_indexer(pd.Index(new, dtype=object))
+    return pd.Categorical.from_codes(_splice(codes, keep, positions, new_codes.astype(np.int32)),
+                                     categories=categories)
+
+
+def diff_frames(old, new, skin_types):
+    """Return the change batch turning catalog frame ``old`` into ``new``.
+
+    Both are frames as read_csv returns them. Products are matched on
+    (brand, name) and compared column by column with numpy; only changed,
+    new and removed products become changes. Returns None when applying the
+    batch would not reproduce ``new``'s row order (surviving products were
+    reordered, new ones inserted before them, or a key repeats), in which
+    case the caller should rebuild from ``new`` instead.
+    """
+    old_keys = pd.MultiIndex.from_arrays([old[col].to_numpy(dtype=object) for col in KEY_COLUMNS])
+    new_keys = pd.MultiIndex.from_arrays([new[col].to_numpy(dtype=object) for col in KEY_COLUMNS])
+    if not old_keys.is_unique or not new_keys.is_unique:
+        return None
+    where = old_keys.get_indexer(new_keys)      # old row of every new row, -1 if new
+    matched = where >= 0
+    appended = np.flatnonzero(~matched)
+    # Applying keeps surviving rows in place and appends new products
+    if np.any(np.diff(where[matched]) < 0) or (len(appended) and matched[appended[0]:].any()):
+        return None
+
+    old_rows, new_rows = where[matched], np.flatnonzero(matched)
+    differs = np.zeros(len(new_rows), dtype=bool)
+    for col in old.columns:
+        if col in KEY_COLUMNS:
+            continue
+        a, b = old[col].to_numpy()[old_rows], new[col].to_numpy()[new_rows]
+        if a.dtype == object or b.dtype == object:
+            a, b = a.astype(object), b.astype(object)
+            differs |= (a != b) & ~(pd.isna(a) & pd.isna(b))
+        elif a.dtype.kind == 'f':
+            differs |= (a != b) & ~(np.isnan(a) & np.isnan(b))
+        else:
+            differs |= a != b
+
+    deleted = np.setdiff1d(np.arange(len(old)), old_rows, assume_unique=True)
+    changes = [Change(DELETE, *key) for key in old_keys[deleted]]
+    upserted = np.concatenate([new_rows[differs], appended])
+    columns = {col: new[col].to_numpy(dtype=object)[upserted]
+               for col in new.columns if col not in KEY_COLUMNS and col != SKIN_COLUMN}
+    flags = {col: values.tolist() for col, values in decode(new[SKIN_COLUMN].to_numpy()[upserted], skin_types).items()}
+    for i, key in enumerate(new_keys[upserted]):
+        fields = {col: _missing(values[i]) for col, values in columns.items()}
+        fields.update({col: values[i] for col, values in flags.items()})
+        changes.append(Change(UPSERT, *key, fields))
+    return changes
+
+
+def _missing(value):
+    # Missing values become NaN, which clears the field when applied
+    return np.nan if pd.isna(value) else value
@@ -0,0 +1,86 @@
+import logging
+import os
+
+from catalog import SKIN_TYPES, ProductCatalog
+from catalog_cache import read_csv, write_cache
+from catalog_updates import diff_frames
+from perf import span
+
+logger = logging.getLogger(__name__)
+
+
+def file_state(path):
+    """The (mtime, size) pair polled to notice that ``path`` changed."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def reload_catalog(path, catalog):
+    """Return ``catalog`` updated to the current contents of the CSV at ``path``.
+
+    The file is parsed in full, diffed against the catalog on (brand, name)
+    and only the differences are applied (ProductCatalog.apply), so the
+    ingredient index, stats and query cache are patched rather than rebuilt.
+    A file that reorders products is loaded from scratch instead. Returns
+    ``catalog`` itself when the contents are unchanged.
+    """
+    with span('reload') as s:
+        df = read_csv(path, SKIN_TYPES)
+        changes = diff_frames(catalog.df, df, SKIN_TYPES)
+        if changes is None:
+            updated = ProductCatalog(df)
+            updated.version = catalog.version + 1
+        else:
+            updated = catalog.apply(changes)
+        s.set(rows=len(df), changes=-1 if changes is None else len(changes))
+    return updated
+
+
+class CatalogWatcher:
+    """Notices changes to the catalog CSV and produces the reloaded catalog.
+
+    ``poll`` stats the file; once a new mtime/size has been seen on two
+    polls in a row (so a file still being copied is not read half-way), the
+    file is reloaded with ``reload_catalog``. Each reload returns a new
+    snapshot; catalogs handed out earlier are never modified, and the
+    binary cache is replaced rather than rewritten (see write_cache), so
+    catalogs mapping the old cache keep their data. A file that fails to
+    load is not read again until it changes. ``poll`` blocks while
+    reloading, so call it off the UI thread.
+    """
+
+    def __init__(self, path, catalog):
+        self.path = path
+        self.catalog = catalog
+        self.state = file_state(path)
+        self._pending = None
+        self._failed = None     # state of a file that could not be loaded
+
+    def poll(self):
+        """Return the reloaded catalog if the file changed, else None."""
+        try:
+            state = file_state(self.path)
+        except OSError:
+            return None     # being replaced; look again on the next poll
+        if state == self.state or state == self._failed:
+            self._pending = None
+            return None
+        if state != self._pending:
+            self._pending = state
+            return None
+
+        try:
+            catalog = reload_catalog(self.path, self.catalog)
+        except Exception:
+            # Don't parse the same broken file on every poll
+            self._failed, self._pending = state, None
+            raise
+        if file_state(self.path) != state:
+            return None     # written to while we read it; reload once it settles
+        self.state, self._pending, self._failed = state, None, None
+        if catalog is self.catalog:
+            return None
+        self.catalog = catalog
+        # Refresh the binary cache so the next start loads the new data
+        write_cache(self.path, catalog.df, catalog.ingredient_index, SKIN_TYPES)
+        return catalog
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.colors import PowerNorm
+
+from catalog import SKIN_TYPES
+from perf import count, span
+from result_aggregates import aggregates
+
+# Above this many products the price-vs-rank chart shows point density
+# (a 2D histogram) instead of one marker per product, so drawing it and
+# re-rendering it on resize cost the same for any result size
+SCATTER_MAX_POINTS = 5000
+
+# Rendered images kept per result, so switching back to a chart (or resizing
+# back to a size already drawn) reuses the image instead of drawing again
+MAX_IMAGES_PER_RESULT = 12
+
+
+class ChartWarning(Exception):
+    """Raised when a chart can't be drawn for the data; shown as a warning."""
+
+
+# Each chart draws onto ``ax`` from the fetched ``data``. ``catalog`` gives
+# access to catalog-wide structures and ``skin_types`` are the skin types
+# selected on the filter page. The summary charts plot the result's
+# memoized aggregates (result_aggregates.py) with plain matplotlib.
+
+def price_distribution(ax, data, catalog, skin_types):
+    stats = aggregates(data)
+    ax.bar(stats.price_edges[:-1], stats.price_counts, width=np.diff(stats.price_edges),
+           align='edge', edgecolor='white')
+    ax.set_title('Price Distribution')
+    ax.set_xlabel('Price ($)')
+    ax.set_ylabel('Count')
+
+
+def brand_distribution(ax, data, catalog, skin_types):
+    brands, counts = aggregates(data).brands_by_count()
+    ax.bar(range(len(brands)), counts)
+    ax.set_xticks(range(len(brands)), brands)
+    ax.set_title('Brand Distribution')
+    ax.set_xlabel('Brand')
+    ax.set_ylabel('Count')
+    ax.tick_params(axis='x', rotation=45)
+
+
+def price_rank_scatter(ax, data, catalog, skin_types):
+    if len(data) > SCATTER_MAX_POINTS:
+        counts, price_edges, rank_edges = aggregates(data).density
+        # Square-root colour scale, so sparse cells (outliers) stay visible next to dense ones
+        mesh = ax.pcolormesh(price_edges, rank_edges, np.ma.masked_equal(counts.T, 0),
+                             cmap='RdPu', norm=PowerNorm(0.5))
+        ax.figure.colorbar(mesh, ax=ax, label='Products')
+        ax.set_title(f'Price vs Rank (density of {len(data)} products)')
+    else:
+        ax.scatter(data['price'], data['rank'], s=15, alpha=0.8, edgecolors='white', linewidths=0.5)
+        ax.set_title('Price vs Rank')
+    ax.set_xlabel('Price ($)')
+    ax.set_ylabel('Rank')
+
+
+def price_by_brand_box(ax, data, catalog, skin_types):
+    boxes = aggregates(data).boxes
+    if boxes:
+        ax.bxp(boxes, patch_artist=True, boxprops={'facecolor': 'C0', 'alpha': 0.8},
+               medianprops={'color': 'black'}, flierprops={'marker': 'd', 'markersize': 4})
+    ax.set_title('Price Distribution by Brand')
+    ax.set_xlabel('Brand')
+    ax.set_ylabel('Price ($)')
+    ax.tick_params(axis='x', rotation=45)
+
+
+def skin_type_distribution(ax, data, catalog, skin_types):
+    if not skin_types:
+        raise ChartWarning("Please select at least one skin type.")
+
+    # Only the selected skin types with at least one product are shown
+    skin_sums = aggregates(data).skin_sums
+    non_zero_data = {skin_type: skin_sums[skin_type] for skin_type in SKIN_TYPES
+                     if skin_type in skin_types and skin_sums.get(skin_type, 0) > 0}
+
+    if len(non_zero_data) == 0:
+        raise ChartWarning("No data available for the selected skin types.")
+
+    ax.pie(list(non_zero_data.values()), labels=list(non_zero_data), autopct='%1.1f%%')
+    ax.set_title('Skin Type Distribution')
+
+
+def ingredients_heatmap(ax, data, catalog, skin_types):
+    # Slice the catalog's sparse incidence matrix to the fetched rows and
+    # keep the most frequent ingredients
+    dense, ingredient_names = catalog.ingredient_matrix(data.index.to_numpy(), top_n=30)
+    matrix = pd.DataFrame(dense, index=data['name'], columns=ingredient_names)
+    sns.heatmap(matrix, cmap='YlOrRd', ax=ax, cbar=False,
+                yticklabels=len(matrix) <= 40)
+    ax.set_title('Ingredients Heatmap')
+
+
+# Button label, draw function and the name used in error messages
+CHARTS = (
+    ("Price Distribution", price_distribution, "price distribution"),
+    ("Brand Distribution", brand_distribution, "brand distribution"),
+    ("Price vs Rank", price_rank_scatter, "price vs rank scatter plot"),
+    ("Price by Brand", price_by_brand_box, "price by brand box plot"),
+    ("Skin Type Distribution", skin_type_distribution, "skin type distribution"),
+    ("Ingredients Heatmap", ingredients_heatmap, "ingredients heatmap"),
+)
+
+
+def render_chart(token, pool, draw, data, catalog, skin_types, size, reuse=True):
+    """Draw a chart on the pool's figure and return it as PNG bytes.
+
+    Meant to run on a worker thread (JobRunner) with a headless Agg pool;
+    ``size`` is the (width, height) in pixels of the area showing it. An
+    image already rendered for the same result, chart and size is returned
+    as is unless ``reuse`` is False.
+    """
+    images = aggregates(data).images
+    key = (draw.__name__, tuple(size), tuple(skin_types), id(catalog))
+    if reuse and key in images:
+        count('chart.images_reused')
+        images.move_to_end(key)
+        return images[key]
+    with span('chart.' + draw.__name__, rows=len(data)):
+        token.check()
+        fig, ax = pool.acquire('chart', size=size)
+        draw(ax, data, catalog, skin_types)
+        token.check()
+        png = pool.render_png('chart')
+    images[key] = png
+    while len(images) > MAX_IMAGES_PER_RESULT:
+        images.popitem(last=False)
+    return png
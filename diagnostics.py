@@ -0,0 +1,91 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+from perf import recorder
+
+# Columns of the stage table: heading, snapshot key, width
+STAGE_COLUMNS = (
+    ("Stage", None, 200),
+    ("Count", 'count', 60),
+    ("Mean (ms)", 'mean_ms', 90),
+    ("p50 (ms)", 'p50_ms', 90),
+    ("p99 (ms)", 'p99_ms', 90),
+    ("Max (ms)", 'max_ms', 90),
+    ("Last (ms)", 'last_ms', 90),
+)
+
+
+class DiagnosticsPanel(tk.Toplevel):
+    """Live view of the timing spans and counters collected by perf.py.
+
+    Refreshes itself while open; recording can be switched on and off here,
+    and a snapshot can be exported as JSON.
+    """
+
+    def __init__(self, master, refresh_ms=1000):
+        super().__init__(master)
+        self.title("Diagnostics")
+        self.geometry("760x520")
+        self.refresh_ms = refresh_ms
+        self.refresh_job = None
+
+        controls = ttk.Frame(self, padding=5)
+        controls.pack(fill='x')
+        self.enabled_var = tk.BooleanVar(value=recorder.enabled)
+        ttk.Checkbutton(controls, text="Record timings", variable=self.enabled_var,
+                        command=self.toggle).pack(side='left', padx=5)
+        ttk.Button(controls, text="Reset", command=self.reset).pack(side='left', padx=5)
+        ttk.Button(controls, text="Export JSON...", command=self.export).pack(side='left', padx=5)
+
+        self.stages = ttk.Treeview(self, columns=[heading for heading, _, _ in STAGE_COLUMNS],
+                                   show='headings', height=14)
+        for heading, key, width in STAGE_COLUMNS:
+            self.stages.heading(heading, text=heading)
+            self.stages.column(heading, width=width, anchor='w' if key is None else 'e')
+        self.stages.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.counters = ttk.Treeview(self, columns=("Counter", "Value"), show='headings', height=8)
+        self.counters.heading("Counter", text="Counter")
+        self.counters.heading("Value", text="Value")
+        self.counters.column("Counter", width=400)
+        self.counters.column("Value", width=150, anchor='e')
+        self.counters.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.refresh()
+
+    def toggle(self):
+        recorder.enabled = self.enabled_var.get()
+
+    def reset(self):
+        recorder.reset()
+        self.refresh(schedule=False)
+
+    def export(self):
+        path = filedialog.asksaveasfilename(parent=self, defaultextension='.json',
+                                            filetypes=[("JSON", "*.json")],
+                                            initialfile='glowpick_perf.json')
+        if not path:
+            return
+        try:
+            recorder.export_json(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export diagnostics: {str(e)}", parent=self)
+
+    def refresh(self, schedule=True):
+        snapshot = recorder.snapshot()
+        self.stages.delete(*self.stages.get_children())
+        for name, stage in snapshot['stages'].items():
+            values = [name] + [stage[key] if key == 'count' else f"{stage[key]:.2f}"
+                               for _, key, _ in STAGE_COLUMNS[1:]]
+            self.stages.insert('', 'end', values=values)
+        self.counters.delete(*self.counters.get_children())
+        for name, value in sorted(snapshot['counters'].items()):
+            self.counters.insert('', 'end', values=(name, f"{value:g}"))
+        if schedule:
+            self.refresh_job = self.after(self.refresh_ms, self.refresh)
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+        self.destroy()
@@ -0,0 +1,107 @@
+import io
+import threading
+import weakref
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from perf import recorder
+
+# Instrumentation: figures created by any pool and figures not yet freed.
+# Updated from the chart worker and from finalizers, which the garbage
+# collector may run on a thread already holding the lock, hence an RLock
+_counters = {'created': 0, 'live': 0}
+_counters_lock = threading.RLock()
+
+
+def _on_figure_freed():
+    with _counters_lock:
+        _counters['live'] -= 1
+
+
+def figure_counters():
+    """Return {'created': n, 'live': n} for figures made by FigurePool."""
+    with _counters_lock:
+        return dict(_counters)
+
+
+# Shown with the other counters in perf snapshots and the diagnostics panel
+recorder.gauge('figures.created', lambda: figure_counters()['created'])
+recorder.gauge('figures.live', lambda: figure_counters()['live'])
+
+
+class FigurePool:
+    """One Figure and canvas per display slot, reused between charts.
+
+    Figures are created directly (not through pyplot), so no global figure
+    manager keeps them alive. Switching charts clears and redraws the slot's
+    figure instead of allocating a new figure and canvas widget each time.
+    The default canvas is headless Agg; pass FigureCanvasTkAgg and a master
+    widget to embed the figure in Tk instead.
+    """
+
+    def __init__(self, canvas_class=FigureCanvasAgg, figsize=(8, 4)):
+        self.canvas_class = canvas_class
+        self.figsize = figsize
+        self.slots = {}     # slot name -> (figure, canvas, master)
+
+    def _create(self, slot, master):
+        fig = Figure(figsize=self.figsize)
+        with _counters_lock:
+            _counters['created'] += 1
+            _counters['live'] += 1
+        weakref.finalize(fig, _on_figure_freed)
+        # Headless canvases (e.g. Agg) don't take a Tk master
+        canvas = self.canvas_class(fig, master=master) if master is not None else self.canvas_class(fig)
+        widget = getattr(canvas, 'get_tk_widget', None)
+        if widget is not None:
+            widget().pack(fill='both', expand=True)
+        self.slots[slot] = (fig, canvas, master)
+        return fig
+
+    def _alive(self, canvas, master, requested_master):
+        if master is not requested_master:
+            return False
+        widget = getattr(canvas, 'get_tk_widget', None)
+        return widget is None or bool(widget().winfo_exists())
+
+    def acquire(self, slot, master=None, size=None):
+        """Return a cleared (figure, axes) pair for ``slot``.
+
+        A new figure is only created the first time a slot is used, or when
+        the widget it was shown in has been destroyed. ``size`` resizes the
+        figure to (width, height) pixels.
+        """
+        entry = self.slots.get(slot)
+        if entry is not None and self._alive(entry[1], entry[2], master):
+            fig = entry[0]
+            fig.clear()
+        else:
+            self.release(slot)
+            fig = self._create(slot, master)
+        if size is not None:
+            fig.set_size_inches(size[0] / fig.dpi, size[1] / fig.dpi)
+        return fig, fig.add_subplot()
+
+    def render_png(self, slot):
+        """Lay out the figure of ``slot`` and return it encoded as PNG."""
+        fig, canvas, _ = self.slots[slot]
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        canvas.print_png(buffer)
+        return buffer.getvalue()
+
+    def release(self, slot):
+        """Drop a slot's figure and canvas so they can be freed."""
+        entry = self.slots.pop(slot, None)
+        if entry is None:
+            return
+        fig, canvas, _ = entry
+        widget = getattr(canvas, 'get_tk_widget', None)
+        if widget is not None and widget().winfo_exists():
+            widget().destroy()
+        fig.clear()
+
+    def release_all(self):
+        for slot in list(self.slots):
+            self.release(slot)
@@ -0,0 +1,437 @@
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Placeholder values found in the ingredients column that are not ingredients
+_PLACEHOLDERS = {'no info', 'nan', ''}
+
+# Query modes supported by IngredientIndex.mask / IngredientIndex.rows
+ANY = 'any'
+ALL = 'all'
+NONE = 'none'
+MODES = (ANY, ALL, NONE)
+
+# Rows per worker below which tokenizing in-process is faster than paying
+# for worker start-up and for shipping the strings to another process
+MIN_ROWS_PER_WORKER = 25_000
+
+
+def clean_ingredient(raw):
+    """Return the display form of a raw ingredient token ('' if empty)."""
+    name = ' '.join(raw.split()).rstrip('.').strip()
+    return '' if name.lower() in _PLACEHOLDERS else name
+
+
+def normalize_ingredient(raw):
+    """Return the lookup key of an ingredient: cleaned and case-folded."""
+    return clean_ingredient(raw).casefold()
+
+
+def _split_commas(text):
+    # Split on commas that separate ingredients, but not on commas inside
+    # parentheses ("Iron Oxides (Ci 77492, Ci 77491)") or between digits
+    # ("1,2-Hexanediol"). A comma is inside parentheses when the next
+    # parenthesis after it is a closing one; that is tracked walking the
+    # comma-separated parts right to left, so the string is scanned once.
+    parts = text.split(',')
+    tokens = []
+    current = parts[-1]
+    closing = False     # is the next parenthesis after this comma a ')'
+    for k in range(len(parts) - 1, 0, -1):
+        part = parts[k]
+        opening_at, closing_at = part.find('('), part.find(')')
+        if closing_at >= 0 and (opening_at < 0 or closing_at < opening_at):
+            closing = True
+        elif opening_at >= 0:
+            closing = False
+        before = parts[k - 1]
+        if closing or (before[-1:].isdecimal() and part[:1].isdecimal()):
+            current = before + ',' + current
+        else:
+            tokens.append(current)
+            current = before
+    tokens.append(current)
+    tokens.reverse()
+    return tokens
+
+
+def split_ingredients(ingredients_str):
+    """Split an ingredients string into cleaned, de-duplicated names."""
+    if not isinstance(ingredients_str, str):
+        return []
+    names = []
+    seen = set()
+    for token in _split_commas(ingredients_str):
+        name = clean_ingredient(token)
+        key = name.casefold()
+        if name and key not in seen:
+            seen.add(key)
+            names.append(name)
+    return names
+
+
+def tokenize(ingredients):
+    """Tokenize raw ingredient strings into (names, indptr, token_ids).
+
+    ``names`` lists the distinct ingredients in first-seen order and
+    ``token_ids[indptr[r]:indptr[r + 1]]`` are the ids of row ``r`` into it.
+    """
+    names = []
+    ids = {}
+    indptr = [0]
+    token_ids = []
+    for ingredients_str in ingredients:
+        for name in split_ingredients(ingredients_str):
+            key = name.casefold()
+            ing_id = ids.get(key)
+            if ing_id is None:
+                ing_id = ids[key] = len(names)
+                names.append(name)
+            token_ids.append(ing_id)
+        indptr.append(len(token_ids))
+    return names, np.asarray(indptr, dtype=np.int64), np.asarray(token_ids, dtype=np.int32)
+
+
+def merge_tokens(shards):
+    """Merge tokenized row ranges, given in row order, into one tokenization.
+
+    Shard vocabularies are merged in shard order, so ids and display names
+    are exactly those a single ``tokenize`` over all rows would produce.
+    """
+    names = []
+    ids = {}
+    indptrs = [np.zeros(1, dtype=np.int64)]
+    token_ids = []
+    offset = 0
+    for shard_names, indptr, shard_ids in shards:
+        remap = np.empty(len(shard_names), dtype=np.int32)
+        for local_id, name in enumerate(shard_names):
+            key = name.casefold()
+            ing_id = ids.get(key)
+            if ing_id is None:
+                ing_id = ids[key] = len(names)
+                names.append(name)
+            remap[local_id] = ing_id
+        token_ids.append(remap[shard_ids])
+        indptrs.append(indptr[1:] + offset)
+        offset += int(indptr[-1])
+    token_ids = np.concatenate(token_ids) if token_ids else np.empty(0, dtype=np.int32)
+    return names, np.concatenate(indptrs), token_ids
+
+
+def _fork_context():
+    # Workers are forked so they don't re-import the __main__ module (ui.py
+    # builds its window at import time). Forking a process that runs other
+    # threads (e.g. a reload on a JobRunner worker in the Tk app) can
+    # deadlock the child on a lock held by one of them, and macOS system
+    # libraries don't support fork at all; the build then runs serially.
+    if sys.platform == 'darwin' or threading.active_count() > 1:
+        return None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return None
+
+
+def build_index(ingredients, workers=None):
+    """Build an IngredientIndex, tokenizing row ranges on a process pool.
+
+    ``workers`` defaults to the number of CPUs and is capped so every worker
+    gets at least MIN_ROWS_PER_WORKER rows. Small catalogs are tokenized
+    in-process, and so is any catalog when forking is not safe: while other
+    threads are running, or on platforms without a safe fork. The result
+    is identical to ``IngredientIndex.from_series``.
+    """
+    ingredients = list(ingredients)
+    workers = min(workers or os.cpu_count() or 1, len(ingredients) // MIN_ROWS_PER_WORKER)
+    context = _fork_context()
+    if workers <= 1 or context is None:
+        return IngredientIndex.from_tokens(*tokenize(ingredients))
+    bounds = np.linspace(0, len(ingredients), workers + 1).astype(int)
+    shards = [ingredients[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        tokenized = list(pool.map(tokenize, shards))
+    return IngredientIndex.from_tokens(*merge_tokens(tokenized))
+
+
+def _remap_postings(postings, remap):
+    # Renumber every posting list through a monotonic old -> new row map,
+    # dropping rows mapped to -1; the lists stay sorted
+    if not postings:
+        return postings
+    lengths = np.fromiter((len(p) for p in postings), dtype=np.int64, count=len(postings))
+    rows = remap[np.concatenate(postings)]
+    owners = np.repeat(np.arange(len(postings)), lengths)
+    kept = rows >= 0
+    counts = np.bincount(owners[kept], minlength=len(postings))
+    return np.split(rows[kept].astype(np.int32), np.cumsum(counts)[:-1])
+
+
+def _segments(starts, lengths):
+    # Positions covered by the segments [start, start + length)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+class IngredientIndex:
+    """Inverted index from normalized ingredient to the rows containing it.
+
+    Row ids are positions in the catalog (0..num_rows-1). Each posting list
+    is a sorted int32 array, so ANY/ALL/NONE queries are set unions and
+    intersections instead of a per-row scan of the ingredient strings.
+    """
+
+    def __init__(self, names, postings, num_rows):
+        self.names = names          # id -> display name
+        self.postings = postings    # id -> sorted np.int32 row ids
+        self.num_rows = num_rows
+        self.ids = {name.casefold(): i for i, name in enumerate(names)}
+        self._alphabetical = None
+        self._alphabetical_positions = None
+
+    @classmethod
+    def from_series(cls, ingredients):
+        """Build the index in-process from an iterable of raw ingredient strings."""
+        return cls.from_tokens(*tokenize(ingredients))
+
+    @classmethod
+    def from_tokens(cls, names, indptr, token_ids):
+        """Build the index from pre-tokenized rows.
+
+        ``token_ids[indptr[r]:indptr[r + 1]]`` are the ingredient ids of row
+        ``r`` (the layout produced by ``to_tokens``).
+        """
+        num_rows = len(indptr) - 1
+        if len(names) == 0:
+            return cls([], [], num_rows)
+        token_ids = np.asarray(token_ids)
+        rows = np.repeat(np.arange(num_rows, dtype=np.int32), np.diff(indptr))
+        # A stable sort by ingredient id keeps each posting list in row order
+        order = np.argsort(token_ids, kind='stable')
+        counts = np.bincount(token_ids, minlength=len(names))
+        postings = np.split(rows[order], np.cumsum(counts)[:-1])
+        return cls(list(names), postings, num_rows)
+
+    def to_tokens(self):
+        """Return (indptr, token_ids): the ingredient ids of every row."""
+        if not self.postings:
+            return np.zeros(self.num_rows + 1, dtype=np.int64), np.empty(0, dtype=np.int32)
+        rows = np.concatenate(self.postings)
+        ids = np.repeat(np.arange(len(self.postings), dtype=np.int32),
+                        [len(p) for p in self.postings])
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(self.num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=self.num_rows), out=indptr[1:])
+        return indptr, ids[order]
+
+    def updated(self, keep, changed, appended):
+        """Return the index after a row-level edit, without rebuilding it.
+
+        The new rows are the old rows ``keep`` (sorted), in order, followed
+        by rows with the ``appended`` ingredient strings. ``changed`` maps
+        positions in ``keep`` to the (old, new) ingredient strings of rows
+        whose ingredients changed. Only those rows are tokenized and only
+        their posting lists rebuilt; deleting rows renumbers every list in
+        one vectorized pass. New ingredients get new ids, so existing ids
+        stay valid. Returns (index, tokens) where ``tokens`` holds the new
+        ingredient ids of the changed, then the appended rows, sorted per row.
+        """
+        names = list(self.names)
+        ids = dict(self.ids)
+        postings = list(self.postings)
+        num_kept = len(keep)
+        if num_kept < self.num_rows:
+            remap = np.full(self.num_rows, -1, dtype=np.int64)
+            remap[keep] = np.arange(num_kept)
+            postings = _remap_postings(postings, remap)
+
+        tokens = []
+        for ingredients_str in [new for _, new in changed.values()] + list(appended):
+            row = []
+            for name in split_ingredients(ingredients_str):
+                key = name.casefold()
+                ing_id = ids.get(key)
+                if ing_id is None:
+                    ing_id = ids[key] = len(names)
+                    names.append(name)
+                    postings.append(np.empty(0, dtype=np.int32))
+                row.append(ing_id)
+            tokens.append(np.sort(np.asarray(row, dtype=np.int32)))
+
+        removals = {}
+        for position, (old, _) in changed.items():
+            for name in split_ingredients(old):
+                removals.setdefault(ids[name.casefold()], []).append(position)
+        additions = {}
+        new_rows = list(changed) + list(range(num_kept, num_kept + len(appended)))
+        for row, row_ids in zip(new_rows, tokens):
+            for ing_id in row_ids.tolist():
+                additions.setdefault(ing_id, []).append(row)
+        # The lists are sorted and the edited rows are known to be in them
+        # (removals) or not (additions), so a binary search plus one copy
+        # is enough even for the longest lists
+        for ing_id in removals.keys() | additions.keys():
+            rows = postings[ing_id]
+            if ing_id in removals:
+                rows = np.delete(rows, np.searchsorted(rows, removals[ing_id]))
+            if ing_id in additions:
+                added = np.asarray(additions[ing_id], dtype=np.int32)
+                rows = np.insert(rows, np.searchsorted(rows, added), added)
+            postings[ing_id] = rows
+
+        index = IngredientIndex(names, postings, num_kept + len(appended))
+        return index, tokens
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def frequencies(self):
+        """Document frequency of every ingredient: products containing it."""
+        return np.fromiter((len(p) for p in self.postings), dtype=np.int64, count=len(self.postings))
+
+    def alphabetical_names(self):
+        """Vocabulary sorted case-insensitively, computed once.
+
+        Names left without products by ``updated`` (deleted rows) are omitted.
+        """
+        if self._alphabetical is None:
+            names = (name for name, postings in zip(self.names, self.postings) if len(postings))
+            self._alphabetical = tuple(sorted(names, key=str.casefold))
+        return self._alphabetical
+
+    def alphabetical_positions(self):
+        """Name -> position in ``alphabetical_names()``, computed once."""
+        if self._alphabetical_positions is None:
+            self._alphabetical_positions = {name: i for i, name in enumerate(self.alphabetical_names())}
+        return self._alphabetical_positions
+
+    def lookup(self, name):
+        """Return the id of an ingredient name, or None if it is unknown."""
+        return self.ids.get(normalize_ingredient(name))
+
+    def rows(self, ids, mode=ANY):
+        """Return the sorted row ids matching ``ids`` under ``mode``."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown ingredient mode: {mode}")
+        lists = [self.postings[i] for i in ids]
+        if not lists:
+            if mode == ALL or mode == NONE:
+                return np.arange(self.num_rows, dtype=np.int32)
+            return np.empty(0, dtype=np.int32)
+        if mode == ALL:
+            # Intersect the shortest lists first so the working set shrinks fast
+            lists.sort(key=len)
+            result = lists[0]
+            for other in lists[1:]:
+                if len(result) == 0:
+                    break
+                result = np.intersect1d(result, other, assume_unique=True)
+            return result
+        union = np.unique(np.concatenate(lists))
+        if mode == NONE:
+            return np.setdiff1d(np.arange(self.num_rows, dtype=np.int32), union,
+                                assume_unique=True)
+        return union
+
+    def mask(self, ids, mode=ANY):
+        """Return a boolean row mask matching ``ids`` under ``mode``."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown ingredient mode: {mode}")
+        if not ids:
+            return np.full(self.num_rows, mode != ANY)
+        if mode == ALL:
+            mask = np.zeros(self.num_rows, dtype=bool)
+            mask[self.rows(ids, ALL)] = True
+            return mask
+        mask = np.zeros(self.num_rows, dtype=bool)
+        for i in ids:
+            mask[self.postings[i]] = True
+        return ~mask if mode == NONE else mask
+
+
+class IncidenceMatrix:
+    """Sparse product x ingredient incidence matrix in CSR layout.
+
+    Row ``r`` has ones at columns ``indices[indptr[r]:indptr[r + 1]]``. Built
+    once per catalog from the tokenized ingredient ids; slicing by row ids
+    and counting columns are vectorized numpy operations.
+    """
+
+    def __init__(self, indptr, indices, num_columns):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.shape = (len(self.indptr) - 1, num_columns)
+
+    @classmethod
+    def from_index(cls, index):
+        indptr, token_ids = index.to_tokens()
+        return cls(indptr, token_ids, len(index))
+
+    def take(self, row_ids):
+        """Return the sub-matrix made of ``row_ids`` (in that order)."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        starts = self.indptr[row_ids]
+        lengths = self.indptr[row_ids + 1] - starts
+        indptr = np.zeros(len(row_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        # Position of every kept entry in the original indices array
+        offsets = np.arange(indptr[-1]) - np.repeat(indptr[:-1], lengths)
+        positions = np.repeat(starts, lengths) + offsets
+        return IncidenceMatrix(indptr, self.indices[positions], self.shape[1])
+
+    def splice(self, keep, positions, tokens, num_columns):
+        """Return the matrix after a row-level edit (see IngredientIndex.updated).
+
+        Keeps rows ``keep`` in order, gives the rows at ``positions`` of the
+        result the first ``tokens`` and appends the remaining ``tokens`` as
+        new rows. Unchanged rows are copied in one vectorized gather.
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64)
+        num_rows = len(keep) + len(tokens) - len(positions)
+        fresh = np.concatenate([positions, np.arange(len(keep), num_rows)])
+        fresh_lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+
+        lengths = np.zeros(num_rows, dtype=np.int64)
+        lengths[:len(keep)] = np.diff(self.indptr)[keep]
+        lengths[fresh] = fresh_lengths
+        copied = np.ones(num_rows, dtype=bool)
+        copied[fresh] = False
+        indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        sources = keep[copied[:len(keep)]]
+        indices[_segments(indptr[:-1][copied], lengths[copied])] = \
+            self.indices[_segments(self.indptr[sources], lengths[copied])]
+        if tokens:
+            indices[_segments(indptr[fresh], fresh_lengths)] = np.concatenate(tokens)
+        return IncidenceMatrix(indptr, indices, num_columns)
+
+    def column_counts(self):
+        """Number of rows containing each column (ingredient)."""
+        return np.bincount(self.indices, minlength=self.shape[1])
+
+    def top_columns(self, n):
+        """Ids of the ``n`` most frequent columns, most frequent first."""
+        counts = self.column_counts()
+        present = np.flatnonzero(counts)
+        if len(present) > n:
+            present = present[np.argpartition(-counts[present], n - 1)[:n]]
+        return present[np.lexsort((present, -counts[present]))]
+
+    def to_dense(self, columns):
+        """Dense uint8 array of shape (rows, len(columns)) for ``columns``."""
+        columns = np.asarray(columns, dtype=np.int64)
+        dense = np.zeros((self.shape[0], len(columns)), dtype=np.uint8)
+        lookup = np.full(self.shape[1], -1, dtype=np.int64)
+        lookup[columns] = np.arange(len(columns))
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        cols = lookup[self.indices]
+        keep = cols >= 0
+        dense[rows[keep], cols[keep]] = 1
+        return dense
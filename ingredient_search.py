@@ -0,0 +1,150 @@
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+from ingredient_index import normalize_ingredient
+
+# Groups of INCI names and common names that refer to the same ingredient.
+# A query for any member also suggests ingredients named after the others.
+SYNONYMS = (
+    ('water', 'aqua', 'eau'),
+    ('fragrance', 'parfum', 'perfume'),
+    ('aluminum', 'aluminium'),
+    ('tocopherol', 'vitamin e'),
+    ('ascorbic acid', 'vitamin c'),
+    ('retinol', 'vitamin a'),
+    ('niacinamide', 'nicotinamide', 'vitamin b3'),
+    ('panthenol', 'provitamin b5', 'vitamin b5'),
+    ('butyrospermum parkii', 'shea'),
+    ('simmondsia chinensis', 'jojoba'),
+    ('aloe barbadensis', 'aloe vera'),
+    ('camellia sinensis', 'green tea'),
+)
+
+# Minimum trigram similarity for a fuzzy (typo-tolerant) suggestion
+FUZZY_THRESHOLD = 0.35
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    """Return the set of character trigrams of ``text`` (padded with spaces)."""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def query_variants(key, partial=True):
+    """Return ``key`` plus its spellings with synonyms swapped in.
+
+    With ``partial``, a key that is the start of a synonym ('aqu') also
+    yields the other members of its group.
+    """
+    variants = [key]
+    for group in SYNONYMS:
+        for member in group:
+            if key.startswith(member):
+                # 'aqua (water)' -> 'water (water)': swap the leading name
+                variants.extend(other + key[len(member):] for other in group if other != member)
+            elif partial and len(key) >= 3 and member.startswith(key):
+                # 'aqu' -> also suggest everything named like 'water'
+                variants.extend(other for other in group if other != member)
+    return list(dict.fromkeys(variants))
+
+
+class IngredientSearch:
+    """Type-ahead search over the ingredient vocabulary of an IngredientIndex.
+
+    Suggestions are ranked by match quality (exact, name prefix, word prefix,
+    then trigram similarity for typos) and, within a tier, by the number of
+    products containing the ingredient. Prefix lookups are binary searches
+    over sorted keys, so a keystroke stays cheap for 100k+ names. Names no
+    product contains any more (see ``IngredientIndex.updated``) are never
+    suggested.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.names = index.names
+        self.frequencies = index.frequencies
+        keys = [name.casefold() for name in self.names]
+        live = np.flatnonzero(self.frequencies).tolist()
+
+        # Whole-name prefixes: sorted keys with their ids
+        order = sorted(live, key=keys.__getitem__)
+        self.sorted_keys = [keys[i] for i in order]
+        self.sorted_ids = np.asarray(order, dtype=np.int64)
+
+        # Word prefixes: "seaw" finds "Algae (Seaweed) Extract"
+        words = sorted((word, i) for i in live for word in set(_WORD_RE.findall(keys[i])))
+        self.words = [word for word, _ in words]
+        self.word_ids = np.asarray([i for _, i in words], dtype=np.int64)
+
+        # Trigram postings for fuzzy matching
+        postings = {}
+        self.trigram_counts = np.zeros(len(keys), dtype=np.int64)
+        for i in live:
+            grams = trigrams(keys[i])
+            self.trigram_counts[i] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.trigram_postings = {gram: np.asarray(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def _prefix_range(self, keys, prefix):
+        lo = bisect_left(keys, prefix)
+        hi = bisect_left(keys, prefix + '\U0010ffff')
+        return lo, hi
+
+    def _top(self, ids, k):
+        # Highest document frequency first; ties broken by id for stable output
+        ids = np.unique(ids)
+        if len(ids) > k:
+            freq = self.frequencies[ids]
+            keep = np.argpartition(-freq, k - 1)[:k]
+            ids = ids[keep]
+        order = np.lexsort((ids, -self.frequencies[ids]))
+        return ids[order].tolist()
+
+    def _fuzzy(self, key, exclude, k):
+        grams = trigrams(key)
+        lists = [self.trigram_postings[g] for g in grams if g in self.trigram_postings]
+        if not lists:
+            return []
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        candidates = np.flatnonzero(shared)
+        score = shared[candidates] / (len(grams) + self.trigram_counts[candidates] - shared[candidates])
+        keep = score >= FUZZY_THRESHOLD
+        candidates, score = candidates[keep], score[keep]
+        order = np.lexsort((candidates, -self.frequencies[candidates], -score))
+        return [i for i in candidates[order].tolist() if i not in exclude][:k]
+
+    def search(self, text, k=50):
+        """Return up to ``k`` ingredient names matching ``text``, best first."""
+        key = normalize_ingredient(text)
+        if not key:
+            return []
+        variants = query_variants(key)
+        results = []
+        seen = set()
+
+        def extend(ids):
+            for i in ids:
+                if i not in seen and len(results) < k:
+                    seen.add(i)
+                    results.append(i)
+
+        # Exact names (including synonyms)
+        exact = (self.index.ids.get(v) for v in query_variants(key, partial=False))
+        extend(i for i in exact if i is not None and self.frequencies[i])
+
+        # Whole-name prefixes, then word prefixes
+        for keys, ids in ((self.sorted_keys, self.sorted_ids), (self.words, self.word_ids)):
+            if len(results) >= k:
+                break
+            matches = [ids[slice(*self._prefix_range(keys, v))] for v in variants]
+            extend(self._top(np.concatenate(matches), k))
+
+        # Typo-tolerant matches only when the direct matches don't fill k
+        if len(results) < k and len(key) >= 3:
+            extend(self._fuzzy(key, seen, k))
+        return [self.names[i] for i in results]
@@ -0,0 +1,135 @@
+import logging
+import queue
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that noticed it has been cancelled or superseded."""
+
+
+class CancelToken:
+    """Handed to every job so long-running work can stop early."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raise JobCancelled if the job is no longer wanted."""
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class JobRunner:
+    """Runs work off the Tk thread and delivers results back on it.
+
+    Jobs are grouped in channels (e.g. 'query', 'chart'). Each channel has
+    its own single worker thread, so jobs of one channel run in order and
+    never share state with each other. Submitting to a channel supersedes
+    the previous job: a job that has not started is dropped, a running job
+    is told to stop through its CancelToken, and its result is discarded.
+    Results are handed to callbacks from ``root.after`` polling, so the
+    callbacks may touch widgets.
+    """
+
+    def __init__(self, root, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executors = {}
+        self.current = {}       # channel -> (future, token) of the newest job
+        self.results = queue.Queue()
+        self.pending = 0
+        self.polling = False
+
+    def _executor(self, channel):
+        executor = self.executors.get(channel)
+        if executor is None:
+            executor = self.executors[channel] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f'glowpick-{channel}')
+        return executor
+
+    def submit(self, channel, fn, *args, on_done=None, on_error=None):
+        """Run ``fn(token, *args)`` on the channel's worker thread.
+
+        ``on_done(result)`` or ``on_error(exception)`` is called on the Tk
+        thread, unless the job was superseded in the meantime.
+        """
+        self.cancel(channel)
+        token = CancelToken()
+        future = self._executor(channel).submit(fn, token, *args)
+        self.current[channel] = (future, token)
+        self.pending += 1
+        future.add_done_callback(
+            lambda f: self.results.put((channel, f, token, on_done, on_error)))
+        self._start_polling()
+        return token
+
+    def cancel(self, channel):
+        """Cancel the newest job of ``channel``, if any."""
+        entry = self.current.pop(channel, None)
+        if entry is not None:
+            future, token = entry
+            token.cancel()
+            future.cancel()
+
+    def busy(self, channel):
+        entry = self.current.get(channel)
+        return entry is not None and not entry[0].done()
+
+    def _start_polling(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    channel, future, token, on_done, on_error = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.pending -= 1
+                current = self.current.get(channel)
+                if token.cancelled or current is None or current[0] is not future:
+                    continue    # superseded or cancelled: drop the result
+                del self.current[channel]
+                try:
+                    result = future.result()
+                except (CancelledError, JobCancelled):
+                    continue
+                except Exception as e:
+                    self._deliver(channel, on_error, e)
+                    continue
+                self._deliver(channel, on_done, result)
+        finally:
+            # Keep polling whatever happened above, or no later result
+            # would ever be delivered
+            if self.pending > 0:
+                self.root.after(self.poll_ms, self._poll)
+            else:
+                self.polling = False
+
+    def _deliver(self, channel, callback, value):
+        if callback is None:
+            return
+        try:
+            callback(value)
+        except Exception:
+            logger.exception("Error in %s job callback", channel)
+
+    def shutdown(self):
+        """Cancel all jobs and stop the worker threads without waiting."""
+        for channel in list(self.current):
+            self.cancel(channel)
+        for executor in self.executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.executors.clear()
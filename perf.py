@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _NullSpan:
+    """Shared do-nothing span handed out while recording is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times a block of code and records it, with numeric fields, on exit."""
+
+    __slots__ = ('recorder', 'name', 'fields', 'start')
+
+    def __init__(self, recorder, name, fields):
+        self.recorder = recorder
+        self.name = name
+        self.fields = fields
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.fields['error'] = exc_type.__name__
+        self.recorder._record(self.name, self.start, duration, self.fields)
+        return False
+
+    def set(self, **fields):
+        """Attach counters (rows scanned, rows matched, ...) to the span."""
+        self.fields.update(fields)
+
+
+class Recorder:
+    """Collects timing spans and counters for the diagnostics panel.
+
+    Disabled by default: ``span`` then returns a shared no-op object and
+    ``count`` returns at once, so instrumented code pays one attribute check.
+    Recent spans are kept in a bounded ring buffer; per-stage totals and
+    counters are kept for the whole session. Safe to use from worker threads.
+    """
+
+    def __init__(self, max_spans=2000):
+        self.enabled = False
+        self.spans = deque(maxlen=max_spans)
+        self.stages = {}            # name -> [count, total seconds, max seconds, last seconds]
+        self.counters = Counter()
+        self.gauges = {}            # name -> function returning the current value
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def span(self, name, **fields):
+        """Context manager timing the block as stage ``name``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, fields)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += n
+
+    def gauge(self, name, read):
+        """Report ``read()`` as counter ``name`` in every snapshot.
+
+        For levels such as objects still alive, which are read when the
+        snapshot is taken (recording on or off) rather than accumulated.
+        """
+        with self._lock:
+            self.gauges[name] = read
+
+    def _record(self, name, start, duration, fields):
+        record = {'name': name, 'start': start - self.started, 'seconds': duration,
+                  'thread': threading.current_thread().name, **fields}
+        with self._lock:
+            self.spans.append(record)
+            stage = self.stages.get(name)
+            if stage is None:
+                stage = self.stages[name] = [0, 0.0, 0.0, 0.0]
+            stage[0] += 1
+            stage[1] += duration
+            stage[2] = max(stage[2], duration)
+            stage[3] = duration
+            # Numeric fields add up into per-stage counters
+            for key, value in fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self.counters[f'{name}.{key}'] += value
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(record, default=str))
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.stages.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """Per-stage summary, counters and recent spans as plain data."""
+        with self._lock:
+            spans = list(self.spans)
+            stages = {name: list(values) for name, values in self.stages.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        counters.update((name, read()) for name, read in gauges.items())
+        recent = {}
+        for record in spans:
+            recent.setdefault(record['name'], []).append(record['seconds'])
+        summary = {}
+        for name, (count, total, longest, last) in sorted(stages.items()):
+            durations = recent.get(name, [last])
+            summary[name] = {
+                'count': count,
+                'total_ms': total * 1000,
+                'mean_ms': total / count * 1000,
+                'p50_ms': float(np.percentile(durations, 50)) * 1000,
+                'p99_ms': float(np.percentile(durations, 99)) * 1000,
+                'max_ms': longest * 1000,
+                'last_ms': last * 1000,
+            }
+        return {'enabled': self.enabled, 'stages': summary, 'counters': counters, 'spans': spans}
+
+    def export_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2, default=str)
+
+
+# Process-wide recorder used by the instrumented modules; GLOWPICK_PERF=1
+# turns it on from startup
+recorder = Recorder()
+recorder.enabled = os.environ.get('GLOWPICK_PERF') == '1'
+span = recorder.span
+count = recorder.count
@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from ingredient_index import ALL, ANY, NONE
+from skin_mask import EXACT
+
+
+@dataclass(frozen=True)
+class FilterKey:
+    """Canonical form of a query's filters, used as the cache key.
+
+    Bounds are the resolved (defaulted) values and ingredients are sorted
+    ingredient ids, so equivalent queries map to the same key. Names that
+    are not in the catalog have no id; ``ingredients_unmatched`` is set when
+    they make the ingredient filter match nothing.
+    """
+    brand: Optional[str]
+    skin_types: Tuple[str, ...]
+    skin_mode: str
+    ingredient_ids: Tuple[int, ...]
+    ingredient_mode: str
+    ingredients_unmatched: bool
+    price_min: float
+    price_max: float
+    rank_min: float
+    rank_max: float
+
+    def narrows(self, other):
+        """True if every row matching ``self`` also matches ``other``.
+
+        ``other`` is then a superset whose cached rows can be refined
+        instead of scanning the whole catalog.
+        """
+        if self.ingredients_unmatched or other.ingredients_unmatched:
+            return self.ingredients_unmatched
+        if other.brand is not None and other.brand != self.brand:
+            return False
+        if other.skin_types and not self._skin_narrows(other):
+            return False
+        if other.ingredient_ids:
+            mine, theirs = set(self.ingredient_ids), set(other.ingredient_ids)
+            if self.ingredient_mode != other.ingredient_mode or not mine:
+                return False
+            if other.ingredient_mode == ANY and not mine <= theirs:
+                return False
+            if other.ingredient_mode in (ALL, NONE) and not theirs <= mine:
+                return False
+        return (other.price_min <= self.price_min and self.price_max <= other.price_max
+                and other.rank_min <= self.rank_min and self.rank_max <= other.rank_max)
+
+    def _skin_narrows(self, other):
+        # ``other`` has skin types selected; no selection would match every row
+        mine, theirs = set(self.skin_types), set(other.skin_types)
+        if not mine:
+            return False
+        if other.skin_mode == ANY:
+            # Rows having all (or exactly) ``mine`` have one of ``theirs`` if
+            # the sets overlap; rows having any of ``mine`` need mine <= theirs
+            return mine <= theirs if self.skin_mode == ANY else bool(mine & theirs)
+        if other.skin_mode == ALL:
+            return self.skin_mode in (ALL, EXACT) and theirs <= mine
+        return self.skin_mode == EXACT and mine == theirs
+
+
+class QueryCache:
+    """LRU cache of matching row ids keyed on FilterKey.
+
+    Bounded both by entry count and by the total bytes of the cached arrays.
+    Entries belong to one catalog version; a version change clears the cache.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.version = None
+        self.hits = 0
+        self.refinements = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _check_version(self, version):
+        if version != self.version:
+            self.entries.clear()
+            self.nbytes = 0
+            self.version = version
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def items(self, version):
+        """The (key, row ids) entries of ``version``, least recently used first."""
+        with self._lock:
+            return list(self.entries.items()) if version == self.version else []
+
+    def get(self, key, version):
+        """Return the cached row ids for ``key``, or None."""
+        with self._lock:
+            self._check_version(version)
+            row_ids = self.entries.get(key)
+            if row_ids is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return row_ids
+
+    def superset(self, key, version):
+        """Return the smallest cached row-id array that contains ``key``'s rows."""
+        with self._lock:
+            self._check_version(version)
+            best = None
+            for cached_key, row_ids in self.entries.items():
+                if key.narrows(cached_key) and (best is None or len(row_ids) < len(best[1])):
+                    best = (cached_key, row_ids)
+            if best is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(best[0])
+            self.refinements += 1
+            return best[1]
+
+    def put(self, key, row_ids, version):
+        # Cached arrays are shared between callers, so make them read-only
+        row_ids.flags.writeable = False
+        with self._lock:
+            self._check_version(version)
+            if row_ids.nbytes > self.max_bytes:
+                return row_ids
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self.entries[key] = row_ids
+            self.nbytes += row_ids.nbytes
+            while len(self.entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+            return row_ids
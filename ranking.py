@@ -0,0 +1,106 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Pseudo-column for the weighted rank / value score
+SCORE = 'score'
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One sort criterion of a top-k query: a column and its direction."""
+    column: str
+    descending: bool = False
+
+
+# Ready-made orderings: a primary key followed by its tie-breakers
+BEST_RANK = (SortKey('rank', descending=True), SortKey('price'))
+LOWEST_PRICE = (SortKey('price'), SortKey('rank', descending=True))
+BEST_VALUE = (SortKey(SCORE, descending=True), SortKey('rank', descending=True), SortKey('price'))
+
+# Labels shown in the "Sort by" dropdown; an empty ordering keeps file order
+ORDERINGS = {
+    'File order': (),
+    'Best rank': BEST_RANK,
+    'Lowest price': LOWEST_PRICE,
+    'Best value': BEST_VALUE,
+}
+
+
+def _normalized(values):
+    # Scale to [0, 1] over the ranked rows; a constant column scores 0
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return np.zeros(len(values))
+    low, high = finite.min(), finite.max()
+    return (values - low) / (high - low) if high > low else np.zeros(len(values))
+
+
+def score(rank, price, weights=(0.5, 0.5)):
+    """Weighted score of rank and value (rank per unit of price).
+
+    Both terms are min-max normalized over the rows being ranked, so the
+    weights trade them off on the same scale. Higher is better.
+    """
+    rank = np.asarray(rank, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = np.where(price > 0, rank / price, np.nan)
+    rank_weight, value_weight = weights
+    return rank_weight * _normalized(rank) + value_weight * _normalized(value)
+
+
+def key_values(values, descending=False):
+    """Turn a column slice into float64 keys where smaller sorts first.
+
+    Non-numeric columns sort by their (sorted) distinct values; missing
+    values always sort last.
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+        keys = np.asarray(values, dtype=np.float64)
+    else:
+        codes, _ = pd.factorize(values, sort=True)
+        keys = np.where(codes < 0, np.nan, codes).astype(np.float64)
+    if descending:
+        keys = -keys
+    keys[np.isnan(keys)] = np.inf
+    return keys
+
+
+def top_k(keys, k):
+    """Positions of the ``k`` best rows under ``keys``, best first.
+
+    ``keys`` are equal-length float arrays from ``key_values``, primary key
+    first. The primary key is partially selected with argpartition, and only
+    the rows that can still make the cut (including every row tied with the
+    k-th) are fully sorted by all keys. Remaining ties keep input order.
+    """
+    primary = keys[0]
+    n = len(primary)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = np.partition(primary, k - 1)[k - 1]
+        candidates = np.flatnonzero(primary <= kth)
+    else:
+        candidates = np.arange(n)
+    # np.lexsort sorts by its last key first
+    order = np.lexsort([candidates] + [key[candidates] for key in reversed(keys)])
+    return candidates[order[:k]]
+
+
+def rank_columns(columns, order_by, k, score_weights=(0.5, 0.5)):
+    """Top-k positions for ``order_by`` over column slices.
+
+    ``columns`` maps a column name to the values of the rows being ranked
+    (numpy arrays or Series of equal length).
+    """
+    keys = []
+    for sort_key in order_by:
+        if sort_key.column == SCORE:
+            values = score(columns['rank'], columns['price'], score_weights)
+        else:
+            values = columns[sort_key.column]
+        keys.append(key_values(values, sort_key.descending))
+    return top_k(keys, k)
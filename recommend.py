@@ -0,0 +1,53 @@
+import numpy as np
+
+# Similarity measures over ingredient sets
+COSINE = 'cosine'      # TF-IDF cosine: shared rare ingredients count more
+JACCARD = 'jaccard'    # shared ingredients / all ingredients of the pair
+METRICS = (COSINE, JACCARD)
+
+
+class Recommender:
+    """Ingredient-based similarity between products.
+
+    Scores are accumulated through the inverted index: only products that
+    share at least one ingredient with the query product are ever touched,
+    so a lookup costs the total length of its ingredients' posting lists
+    rather than a pass over every pair of products. IDF weights and row
+    norms are computed once.
+    """
+
+    def __init__(self, index, incidence):
+        self.index = index
+        self.incidence = incidence
+        num_rows = index.num_rows
+        frequencies = index.frequencies
+        # Smoothed IDF, so an ingredient in every product still counts a little
+        self.idf = np.log((1 + num_rows) / (1 + frequencies)) + 1
+        rows = np.repeat(np.arange(num_rows), np.diff(incidence.indptr))
+        self.norms = np.sqrt(np.bincount(rows, weights=self.idf[incidence.indices] ** 2, minlength=num_rows))
+        self.sizes = np.diff(incidence.indptr)
+
+    def ingredient_ids(self, row):
+        indptr = self.incidence.indptr
+        return self.incidence.indices[indptr[row]:indptr[row + 1]]
+
+    def scores(self, row, metric=COSINE):
+        """Return (row ids, similarities) of every product sharing an
+        ingredient with ``row``, excluding ``row`` itself."""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown similarity metric: {metric}")
+        ids = self.ingredient_ids(row)
+        if len(ids) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        postings = [self.index.postings[i] for i in ids]
+        rows = np.concatenate(postings)
+        if metric == COSINE:
+            weights = np.repeat(self.idf[ids] ** 2, [len(p) for p in postings])
+            candidates, inverse = np.unique(rows, return_inverse=True)
+            dots = np.bincount(inverse, weights=weights)
+            similarity = dots / (self.norms[candidates] * self.norms[row])
+        else:
+            candidates, shared = np.unique(rows, return_counts=True)
+            similarity = shared / (self.sizes[candidates] + self.sizes[row] - shared)
+        keep = candidates != row
+        return candidates[keep], similarity[keep]
@@ -0,0 +1,128 @@
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from catalog import SKIN_TYPES
+
+HISTOGRAM_BINS = 20
+
+# Price x rank bins of the density view of the price-vs-rank chart
+DENSITY_BINS = (60, 40)
+
+# Box whiskers reach the furthest value within this many IQRs of the box,
+# as in matplotlib and seaborn
+WHISKER_IQR = 1.5
+
+
+@dataclass
+class ResultAggregates:
+    """Numbers behind the summary charts of one result frame.
+
+    Computed in one vectorized pass over the frame, so switching between
+    charts only costs the drawing. Missing prices and brands are left out.
+    """
+    brands: list                # brands present, in category order
+    brand_counts: np.ndarray    # products per brand, aligned with ``brands``
+    price_counts: np.ndarray    # HISTOGRAM_BINS price histogram counts
+    price_edges: np.ndarray     # HISTOGRAM_BINS + 1 bin edges
+    boxes: list                 # per-brand price box stats (Axes.bxp dicts), brands with prices
+    skin_sums: dict             # skin type -> products suitable, for the flag columns present
+    density: tuple              # (counts, price edges, rank edges) 2D histogram
+    # Rendered chart images of this result, reused by charts.render_chart
+    images: OrderedDict = field(default_factory=OrderedDict, repr=False, compare=False)
+
+    @classmethod
+    def from_frame(cls, data):
+        brand = data['brand']
+        codes = brand.cat.codes.to_numpy().astype(np.int64)
+        price = data['price'].to_numpy(dtype=np.float64)
+        rank = data['rank'].to_numpy(dtype=np.float64)
+
+        counts = np.bincount(codes[codes >= 0], minlength=len(brand.cat.categories))
+        present = np.flatnonzero(counts)
+        brands = [brand.cat.categories[i] for i in present]
+
+        valid = ~np.isnan(price)
+        if valid.any():
+            price_counts, price_edges = np.histogram(price[valid], bins=HISTOGRAM_BINS)
+        else:
+            price_counts, price_edges = np.zeros(HISTOGRAM_BINS, dtype=np.int64), np.arange(HISTOGRAM_BINS + 1.0)
+
+        keep = valid & (codes >= 0)
+        boxes = _box_stats(codes[keep], price[keep], present, brands)
+        skin_sums = {col: int(data[col].sum()) for col in SKIN_TYPES if col in data.columns}
+
+        both = valid & ~np.isnan(rank)
+        if both.any():
+            density = np.histogram2d(price[both], rank[both], bins=DENSITY_BINS)
+        else:
+            density = (np.zeros(DENSITY_BINS), np.arange(DENSITY_BINS[0] + 1.0), np.arange(DENSITY_BINS[1] + 1.0))
+        return cls(brands, counts[present], price_counts, price_edges, boxes, skin_sums, density)
+
+    def brands_by_count(self):
+        """(brands, counts) with the most frequent brand first."""
+        order = np.argsort(-self.brand_counts, kind='stable')
+        return [self.brands[i] for i in order], self.brand_counts[order]
+
+
+def _box_stats(codes, values, present, labels):
+    # Sort once by (brand, price); every brand is then a contiguous sorted
+    # run, and its quartiles and whiskers are read off by position
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    starts = np.searchsorted(codes, present)
+    sizes = np.searchsorted(codes, present, side='right') - starts
+    boxes = []
+    if not len(values):
+        return boxes
+
+    last = np.minimum(starts + np.maximum(sizes, 1) - 1, len(values) - 1)
+
+    def quantile(q):
+        # Linear interpolation between order statistics, like np.percentile
+        position = np.minimum(starts + q * np.maximum(sizes - 1, 0), last)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, last)
+        return values[low] + (values[high] - values[low]) * (position - low)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    group = np.repeat(np.arange(len(present)), sizes)
+    iqr = q3 - q1
+    inside = (values >= (q1 - WHISKER_IQR * iqr)[group]) & (values <= (q3 + WHISKER_IQR * iqr)[group])
+    nonempty = sizes > 0
+    lows = np.full(len(present), np.nan)
+    highs = np.full(len(present), np.nan)
+    lows[nonempty] = np.minimum.reduceat(np.where(inside, values, np.inf), starts[nonempty])
+    highs[nonempty] = np.maximum.reduceat(np.where(inside, values, -np.inf), starts[nonempty])
+    # Whiskers never end inside the box (matplotlib's rule)
+    lows, highs = np.minimum(lows, q1), np.maximum(highs, q3)
+    fliers = np.split(np.where(inside, np.nan, values), starts[1:])
+    for i in np.flatnonzero(nonempty):
+        boxes.append({'label': labels[i], 'q1': q1[i], 'med': median[i], 'q3': q3[i],
+                      'whislo': lows[i], 'whishi': highs[i],
+                      'fliers': fliers[i][~np.isnan(fliers[i])]})
+    return boxes
+
+
+_memo = {}                  # id(frame) -> ResultAggregates
+_memo_lock = threading.Lock()
+
+
+def aggregates(data):
+    """Return the ResultAggregates of the result frame ``data``, memoized.
+
+    Result frames are never modified after a query returns them, so the
+    numbers are computed once per frame and dropped when it is freed.
+    """
+    key = id(data)
+    with _memo_lock:
+        cached = _memo.get(key)
+    if cached is None:
+        cached = ResultAggregates.from_frame(data)
+        with _memo_lock:
+            _memo[key] = cached
+        weakref.finalize(data, _memo.pop, key, None)
+    return cached
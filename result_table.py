@@ -0,0 +1,173 @@
+from tkinter import ttk
+
+import numpy as np
+import pandas as pd
+
+from catalog import SKIN_TYPES
+
+# Rows formatted together when a block is first scrolled into view
+BLOCK_SIZE = 256
+
+# Longest ingredients text shown in a cell
+MAX_INGREDIENTS_CHARS = 300
+
+
+def column_heading(col):
+    return col.replace('_', ' ').title()
+
+
+def column_width(col):
+    if col in ['price', 'rank']:
+        return 80
+    elif col == 'ingredients':
+        return 300
+    elif col in SKIN_TYPES:
+        return 100
+    return 150
+
+
+def format_column(col, values):
+    """Format a slice of one column as display strings, vectorized."""
+    if col == 'price':
+        numbers = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(numbers)
+        text = np.char.mod('$%.2f', np.where(missing, 0, numbers))
+        return np.where(missing, 'N/A', text)
+    if col == 'rank':
+        numbers = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(numbers)
+        text = np.char.mod('%d', np.trunc(np.where(missing, 0, numbers)))
+        return np.where(missing, 'N/A', text)
+    if col in SKIN_TYPES:
+        return np.where(np.asarray(values) == 1, 'Yes', 'No')
+    text = pd.Series(values).astype(object)
+    missing = text.isna().to_numpy()
+    text = text.where(~missing, '').astype(str)
+    if col == 'ingredients':
+        long = text.str.len() > MAX_INGREDIENTS_CHARS
+        text = text.where(~long, text.str.slice(0, MAX_INGREDIENTS_CHARS) + "...")
+    return text.to_numpy()
+
+
+class FormattedRows:
+    """Display strings for a result frame, formatted block by block on demand.
+
+    Only the blocks that are scrolled into view are ever formatted, and each
+    block is formatted once with one vectorized pass per column.
+    """
+
+    def __init__(self, frame, block_size=BLOCK_SIZE):
+        self.frame = frame
+        self.columns = list(frame.columns)
+        self.block_size = block_size
+        self.blocks = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _block(self, number):
+        rows = self.blocks.get(number)
+        if rows is None:
+            start = number * self.block_size
+            chunk = self.frame.iloc[start:start + self.block_size]
+            formatted = [format_column(col, chunk[col].to_numpy()) for col in self.columns]
+            rows = self.blocks[number] = list(zip(*formatted))
+        return rows
+
+    def rows(self, start, stop):
+        """Return the formatted rows in [start, stop)."""
+        stop = min(stop, len(self))
+        result = []
+        while start < stop:
+            number, offset = divmod(start, self.block_size)
+            block = self._block(number)
+            take = min(stop - start, len(block) - offset)
+            result.extend(block[offset:offset + take])
+            start += take
+        return result
+
+
+class VirtualTable(ttk.Frame):
+    """Treeview that only holds the rows currently visible.
+
+    The tree keeps one item per visible line and rewrites their values when
+    the user scrolls, so opening 100k results costs the same as opening 10.
+    """
+
+    def __init__(self, master, frame, height=20):
+        super().__init__(master)
+        self.data = FormattedRows(frame)
+        self.first = 0
+        self.visible = 0
+        self.items = []
+
+        self.tree = ttk.Treeview(self, height=height, columns=self.data.columns, show="headings")
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.hsb = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hsb.set)
+
+        # Grid layout for treeview and scrollbars
+        self.tree.grid(column=0, row=0, sticky='nsew')
+        self.vsb.grid(column=1, row=0, sticky='ns')
+        self.hsb.grid(column=0, row=1, sticky='ew')
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # Set column headings and widths
+        for col in self.data.columns:
+            self.tree.heading(col, text=column_heading(col))
+            self.tree.column(col, width=column_width(col), minwidth=50)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self.scroll(-1))
+        self.tree.bind("<Down>", lambda e: self.scroll(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.visible))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.visible))
+        self._set_visible(height)
+
+    def _set_visible(self, count):
+        count = min(max(1, count), len(self.data))
+        if count == self.visible:
+            return
+        # Grow or shrink the pool of tree items to the visible line count
+        while len(self.items) < count:
+            self.items.append(self.tree.insert("", "end"))
+        while len(self.items) > count:
+            self.tree.delete(self.items.pop())
+        self.visible = count
+        self._render()
+
+    def _on_resize(self, event):
+        rowheight = ttk.Style().lookup('Treeview', 'rowheight') or 20
+        # Leave room for the heading row
+        self._set_visible(int(event.height) // int(rowheight) - 1)
+
+    def _on_mousewheel(self, event):
+        self.scroll(int(-1 * (event.delta / 120)) * 3)
+        return "break"
+
+    def scroll(self, rows):
+        self.first += rows
+        self._render()
+        return "break"
+
+    def yview(self, *args):
+        # Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units'|'pages')
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.data))
+        elif args[0] == 'scroll':
+            step = self.visible if args[2] == 'pages' else 1
+            self.first += int(args[1]) * step
+        self._render()
+
+    def _render(self):
+        total = len(self.data)
+        self.first = max(0, min(self.first, total - self.visible))
+        rows = self.data.rows(self.first, self.first + self.visible)
+        for item, values in zip(self.items, rows):
+            self.tree.item(item, values=values)
+        if total:
+            self.vsb.set(self.first / total, (self.first + len(rows)) / total)
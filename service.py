@@ -0,0 +1,450 @@
+"""Local HTTP/JSON query service over the product catalog.
+
+    python service.py [--csv cosmetic_p.csv] [--host 127.0.0.1] [--port 8765] [--workers 4]
+
+The catalog is loaded once before the workers are forked. Its numeric and
+categorical columns are views of the memory-mapped cache, so the workers
+share those pages, and the rest is inherited copy-on-write.
+Endpoints:
+
+    GET  /health      catalog size and version
+    POST /query       one query object -> {"total", "rows"}
+    POST /batch       {"queries": [...]} -> {"results": [...]}, one per query
+    POST /recommend   {"name", "k", ...} -> {"rows"}
+
+POST /query?format=ndjson (or ``Accept: application/x-ndjson``) streams the
+result as NDJSON: a {"total", "returned"} header line, then one row per
+line, sent in chunks so large results never sit in memory as one body.
+service_client.py is a matching stdlib-only client.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import socket
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from catalog import SKIN_TYPES, ProductCatalog, Query, QueryError
+from catalog_cache import CATEGORICAL_COLUMNS, FLOAT_COLUMNS, TEXT_COLUMNS
+from ingredient_index import MODES
+from ranking import BEST_RANK, BEST_VALUE, LOWEST_PRICE, SCORE, SortKey
+from recommend import METRICS
+from skin_mask import SKIN_MODES
+
+logger = logging.getLogger(__name__)
+
+# Named orderings accepted in a query's "order_by"
+ORDERINGS = {'rank': BEST_RANK, 'price': LOWEST_PRICE, 'value': BEST_VALUE}
+
+# Columns a query can be ordered by
+SORT_COLUMNS = {*CATEGORICAL_COLUMNS, *TEXT_COLUMNS, *FLOAT_COLUMNS, SCORE}
+
+
+def _is_number(value):
+    # json.loads also accepts NaN and Infinity, which no bound or weight can be
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _is_optional_number(value):
+    return value is None or _is_number(value)
+
+
+def _is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_strings(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _is_skin_types(value):
+    return _is_strings(value) and all(item in SKIN_TYPES for item in value)
+
+
+def _one_of(choices):
+    return lambda value: isinstance(value, str) and value in choices, f"one of {', '.join(choices)}"
+
+
+# Field -> (check, description) of the JSON values accepted in a query
+# object or recommend request; order_by is checked by parse_order_by
+FIELD_TYPES = {
+    'brand': (lambda value: value is None or isinstance(value, str), 'a string'),
+    'name': (lambda value: isinstance(value, str), 'a string'),
+    'skin_types': (_is_skin_types, f"a list of skin types ({', '.join(SKIN_TYPES)})"),
+    'skin_mode': _one_of(SKIN_MODES),
+    'ingredients': (_is_strings, 'a list of strings'),
+    'ingredient_mode': _one_of(MODES),
+    'price_min': (_is_optional_number, 'a finite number'),
+    'price_max': (_is_optional_number, 'a finite number'),
+    'rank_min': (_is_optional_number, 'a finite number'),
+    'rank_max': (_is_optional_number, 'a finite number'),
+    'limit': (_is_integer, 'an integer'),
+    'k': (_is_integer, 'an integer'),
+    'score_weights': (lambda value: isinstance(value, list) and len(value) == 2 and all(map(_is_number, value)),
+                      'a list of two finite numbers'),
+    'metric': _one_of(METRICS),
+    'same_label': (lambda value: isinstance(value, bool), 'true or false'),
+    'cheaper': (lambda value: isinstance(value, bool), 'true or false'),
+}
+
+QUERY_FIELDS = {'brand', 'skin_types', 'skin_mode', 'ingredients', 'ingredient_mode', 'price_min',
+                'price_max', 'rank_min', 'rank_max', 'limit', 'order_by', 'score_weights'}
+RECOMMEND_FIELDS = {'name', 'k', 'brand', 'metric', 'same_label', 'skin_types', 'skin_mode', 'cheaper'}
+
+MAX_BODY = 1 << 20          # bytes accepted in a request body
+MAX_BATCH = 1000            # queries accepted in one batch
+NDJSON_BLOCK = 1000         # rows serialized per streamed chunk
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+
+class BadRequest(Exception):
+    """Malformed request; answered with a 400 and the message."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_order_by(value):
+    # Either a named ordering or a list of {"column", "descending"} keys
+    if value is None or value == []:
+        return ()
+    if isinstance(value, str):
+        if value not in ORDERINGS:
+            raise BadRequest(f"Unknown ordering: {value}")
+        return ORDERINGS[value]
+    if not isinstance(value, list) or not all(isinstance(key, dict) and 'column' in key for key in value):
+        raise BadRequest("order_by must be an ordering name or a list of {column, descending}")
+    for key in value:
+        if not isinstance(key['column'], str) or key['column'] not in SORT_COLUMNS:
+            raise BadRequest(f"Unknown order_by column: {key['column']}")
+        if not isinstance(key.get('descending', False), bool):
+            raise BadRequest("order_by descending must be true or false")
+    return tuple(SortKey(key['column'], bool(key.get('descending', False))) for key in value)
+
+
+def check_fields(fields):
+    """Raise BadRequest unless every field has a value of the accepted type."""
+    for name, value in fields.items():
+        if name in FIELD_TYPES:
+            check, expected = FIELD_TYPES[name]
+            if not check(value):
+                raise BadRequest(f"{name} must be {expected}")
+
+
+def parse_query(obj):
+    """Build a Query from its JSON object form."""
+    if not isinstance(obj, dict):
+        raise BadRequest("A query must be a JSON object")
+    unknown = set(obj) - QUERY_FIELDS
+    if unknown:
+        raise BadRequest(f"Unknown query fields: {', '.join(sorted(unknown))}")
+    check_fields(obj)
+    fields = dict(obj)
+    for name in ('skin_types', 'ingredients', 'score_weights'):
+        if name in fields:
+            fields[name] = tuple(fields[name])
+    if 'order_by' in fields:
+        fields['order_by'] = parse_order_by(fields['order_by'])
+    return Query(**fields)
+
+
+def json_ready(frame):
+    """Return ``frame`` with float32 columns (price, rank) as rounded float64.
+
+    Serialized as is, a float32 4.9 reads 4.9000000954 (its nearest float32
+    value); rounded after widening it reads 4.9.
+    """
+    widened = {col: frame[col].astype('float64').round(6)
+               for col in frame.columns if frame[col].dtype == np.float32}
+    return frame.assign(**widened) if widened else frame
+
+
+def run_query(catalog, obj):
+    """Answer one query object as JSON text; errors become {"error": ...}.
+
+    Returns (status, text): 400 for a malformed query, 422 for one the
+    catalog rejects (QueryError). Rows are serialized by pandas straight
+    into the response text instead of round-tripping through Python objects.
+    """
+    try:
+        result = catalog.query(parse_query(obj))
+    except BadRequest as e:
+        return e.status, json.dumps({'error': str(e)})
+    except QueryError as e:
+        return 422, json.dumps({'error': str(e)})
+    return 200, '{"total": %d, "rows": %s}' % (result.total, json_ready(result.frame).to_json(orient='records'))
+
+
+class Response:
+    def __init__(self, status=200, body=None, chunks=None, content_type='application/json'):
+        self.status = status
+        self.body = body            # bytes, or None when streaming ``chunks``
+        self.chunks = chunks        # iterable of bytes sent with chunked encoding
+        self.content_type = content_type
+
+
+def json_response(obj, status=200):
+    return Response(status, json.dumps(obj).encode('utf-8'))
+
+
+class QueryService:
+    """Routes HTTP requests to a shared, read-only ProductCatalog."""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def handle(self, method, target, headers, body):
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        routes = {
+            '/health': ('GET', self.health),
+            '/query': ('POST', self.query),
+            '/batch': ('POST', self.batch),
+            '/recommend': ('POST', self.recommend),
+        }
+        if url.path not in routes:
+            return json_response({'error': f"Unknown path: {url.path}"}, 404)
+        allowed, handler = routes[url.path]
+        if method != allowed:
+            return json_response({'error': f"Use {allowed} for {url.path}"}, 405)
+        try:
+            payload = json.loads(body) if body else {}
+            return handler(payload, params, headers)
+        except ValueError as e:    # invalid JSON or field values
+            return json_response({'error': str(e)}, 400)
+        except BadRequest as e:
+            return json_response({'error': str(e)}, e.status)
+
+    def health(self, payload, params, headers):
+        return json_response({'status': 'ok', 'rows': len(self.catalog), 'version': self.catalog.version,
+                              'pid': os.getpid()})
+
+    def query(self, payload, params, headers):
+        streaming = (params.get('format') == ['ndjson']
+                     or 'application/x-ndjson' in headers.get('accept', ''))
+        if not streaming:
+            status, text = run_query(self.catalog, payload)
+            return Response(status, text.encode('utf-8'))
+        try:
+            result = self.catalog.query(parse_query(payload))
+        except QueryError as e:
+            return json_response({'error': str(e)}, 422)
+        return Response(chunks=self._ndjson(result), content_type='application/x-ndjson')
+
+    def _ndjson(self, result):
+        frame = result.frame
+        yield (json.dumps({'total': result.total, 'returned': len(frame)}) + '\n').encode('utf-8')
+        for start in range(0, len(frame), NDJSON_BLOCK):
+            block = json_ready(frame.iloc[start:start + NDJSON_BLOCK])
+            yield (block.to_json(orient='records', lines=True).rstrip('\n') + '\n').encode('utf-8')
+
+    def batch(self, payload, params, headers):
+        queries = payload.get('queries') if isinstance(payload, dict) else None
+        if not isinstance(queries, list):
+            raise BadRequest('Expected {"queries": [...]}')
+        if len(queries) > MAX_BATCH:
+            raise BadRequest(f"At most {MAX_BATCH} queries per batch", 413)
+        results = ', '.join(run_query(self.catalog, obj)[1] for obj in queries)
+        return Response(body=('{"results": [%s]}' % results).encode('utf-8'))
+
+    def recommend(self, payload, params, headers):
+        if not isinstance(payload, dict) or 'name' not in payload:
+            raise BadRequest('Expected {"name": ...}')
+        unknown = set(payload) - RECOMMEND_FIELDS
+        if unknown:
+            raise BadRequest(f"Unknown recommend fields: {', '.join(sorted(unknown))}")
+        check_fields(payload)
+        fields = dict(payload)
+        if 'skin_types' in fields:
+            fields['skin_types'] = tuple(fields['skin_types'])
+        try:
+            frame = self.catalog.recommend(**fields)
+        except QueryError as e:
+            return json_response({'error': str(e)}, 422)
+        return Response(body=('{"rows": %s}' % json_ready(frame).to_json(orient='records')).encode('utf-8'))
+
+
+async def _readline(reader):
+    try:
+        return await reader.readline()
+    except ValueError:      # longer than the stream's line limit
+        raise BadRequest("Request line or header too long")
+
+
+def _content_length(headers):
+    value = headers.get('content-length') or '0'
+    # Digits only: int() would also take '-3', '+3', ' 3' and '1_000'
+    if not (value.isascii() and value.isdigit()):
+        raise BadRequest("Content-Length must be a non-negative integer")
+    length = int(value)
+    if length > MAX_BODY:
+        raise BadRequest(f"Request body larger than {MAX_BODY} bytes", 413)
+    return length
+
+
+async def _read_request(reader):
+    # Returns (method, target, headers, body), or None at end of connection
+    request_line = await _readline(reader)
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise BadRequest("Malformed request line")
+    headers = {}
+    while True:
+        line = await _readline(reader)
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = _content_length(headers)
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+
+async def _write_response(writer, response, keep_alive):
+    """Send ``response``; return False if a streamed body failed part-way.
+
+    The status line has already gone out by then, so the body is left
+    without its terminating chunk and the caller closes the connection:
+    clients see a truncated response rather than a short, complete one.
+    """
+    head = [f"HTTP/1.1 {response.status} {REASONS.get(response.status, '')}",
+            f"Content-Type: {response.content_type}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    if response.chunks is None:
+        head.append(f"Content-Length: {len(response.body)}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + response.body)
+        await writer.drain()
+        return True
+    head.append("Transfer-Encoding: chunked")
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+    chunks = iter(response.chunks)
+    while True:
+        try:
+            chunk = next(chunks, None)
+        except Exception:
+            logger.exception("Error streaming response")
+            await writer.drain()
+            return False
+        if chunk is None:
+            break
+        if chunk:
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            await writer.drain()    # back-pressure: wait for slow readers
+    writer.write(b'0\r\n\r\n')
+    await writer.drain()
+    return True
+
+
+async def serve_connection(service, reader, writer):
+    """Serve HTTP/1.1 requests on one keep-alive connection."""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except BadRequest as e:
+                await _write_response(writer, json_response({'error': str(e)}, e.status), False)
+                break
+            if request is None:
+                break
+            method, target, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            try:
+                response = service.handle(method, target, headers, body)
+            except Exception:
+                logger.exception("Error handling %s %s", method, target)
+                response = json_response({'error': 'Internal server error'}, 500)
+            if not await _write_response(writer, response, keep_alive) or not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _serve(service, sock):
+    server = await asyncio.start_server(lambda r, w: serve_connection(service, r, w), sock=sock)
+    async with server:
+        await server.serve_forever()
+
+
+def listen(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def run_worker(service, sock):
+    try:
+        asyncio.run(_serve(service, sock))
+    except KeyboardInterrupt:
+        pass
+
+
+def serve(catalog, host='127.0.0.1', port=8765, workers=1):
+    """Serve ``catalog`` until interrupted, with ``workers`` forked processes.
+
+    The listening socket and the loaded catalog are created before forking,
+    so the workers accept on the same port and inherit the catalog.
+    """
+    service = QueryService(catalog)
+    sock = listen(host, port)
+    logger.info("Serving %d products on http://%s:%d with %d worker(s)", len(catalog), host, port, workers)
+    if workers <= 1 or not hasattr(os, 'fork'):
+        run_worker(service, sock)
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            run_worker(service, sock)
+            os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop(signal.SIGINT, None)
+        for pid in children:
+            os.waitpid(pid, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default='cosmetic_p.csv')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.environ.get('GLOWPICK_LOG_LEVEL', 'INFO'),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    serve(ProductCatalog.from_csv(args.csv), args.host, args.port, args.workers)
+
+
+if __name__ == '__main__':
+    main()
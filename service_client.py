@@ -0,0 +1,84 @@
+import http.client
+import json
+from dataclasses import asdict
+
+# Keys of the query object sent to service.py; Query fields left at their
+# defaults are omitted
+_DEFAULTS = {'skin_types': [], 'ingredients': [], 'order_by': [], 'skin_mode': 'any',
+             'ingredient_mode': 'any', 'limit': 10, 'score_weights': [0.5, 0.5]}
+
+
+class ServiceError(Exception):
+    """An error answered by the service, with its HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def query_to_json(query):
+    """Convert a catalog.Query (or a plain dict) to the service's JSON form."""
+    if isinstance(query, dict):
+        return query
+    fields = asdict(query)
+    fields['order_by'] = [{'column': key['column'], 'descending': key['descending']}
+                          for key in fields['order_by']]
+    fields = {name: list(value) if isinstance(value, tuple) else value for name, value in fields.items()}
+    return {name: value for name, value in fields.items()
+            if value is not None and _DEFAULTS.get(name, object()) != value}
+
+
+class ServiceClient:
+    """Minimal client for service.py over one keep-alive connection.
+
+    Only needs the standard library, so it can run anywhere the service is
+    reachable; queries may be catalog.Query objects or plain dicts.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, timeout=30):
+        self.connection = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, method, path, payload=None, headers=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = dict(headers or {}, **({'Content-Type': 'application/json'} if body else {}))
+        self.connection.request(method, path, body=body, headers=headers)
+        return self.connection.getresponse()
+
+    def _json(self, method, path, payload=None):
+        response = self._request(method, path, payload)
+        data = json.loads(response.read())
+        if response.status != 200:
+            raise ServiceError(response.status, data.get('error', response.reason))
+        return data
+
+    def health(self):
+        return self._json('GET', '/health')
+
+    def query(self, query):
+        """Return {"total", "rows"} for one query."""
+        return self._json('POST', '/query', query_to_json(query))
+
+    def batch(self, queries):
+        """Run several queries in one request; failed ones give {"error"}."""
+        return self._json('POST', '/batch', {'queries': [query_to_json(q) for q in queries]})['results']
+
+    def recommend(self, name, **options):
+        return self._json('POST', '/recommend', dict(options, name=name))['rows']
+
+    def stream(self, query):
+        """Yield the NDJSON header line, then each row, as they arrive."""
+        response = self._request('POST', '/query?format=ndjson', query_to_json(query))
+        if response.status != 200:
+            raise ServiceError(response.status, json.loads(response.read()).get('error', response.reason))
+        for line in response:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from ingredient_index import ALL, ANY
+
+# Name of the packed column that replaces the per-skin-type flag columns
+SKIN_COLUMN = 'skin'
+
+# Skin-type match modes: ANY selected type, ALL selected types, or EXACTLY
+# the selected types and no others
+EXACT = 'exact'
+SKIN_MODES = (ANY, ALL, EXACT)
+
+
+def bits(selected, skin_types):
+    """Bitmask of the ``selected`` skin types: bit i is ``skin_types[i]``."""
+    return sum(1 << bit for bit, col in enumerate(skin_types) if col in selected)
+
+
+def encode(frame, skin_types):
+    """Pack the flag columns of ``frame`` into one uint8 bitmask array."""
+    mask = np.zeros(len(frame), dtype=np.uint8)
+    for bit, col in enumerate(skin_types):
+        mask |= (frame[col].to_numpy() != 0).astype(np.uint8) << bit
+    return mask
+
+
+def decode(mask, skin_types):
+    """Unpack a bitmask array into {skin type: 0/1 uint8 array}."""
+    mask = np.asarray(mask)
+    return {col: (mask >> bit) & 1 for bit, col in enumerate(skin_types)}
+
+
+def pack_columns(df, skin_types):
+    """Return ``df`` with the flag columns replaced by SKIN_COLUMN."""
+    return df.drop(columns=list(skin_types)).assign(**{SKIN_COLUMN: encode(df, skin_types)})
+
+
+def match(mask, selected_bits, mode=ANY):
+    """Boolean array of the rows whose skin types match under ``mode``.
+
+    A single bitwise op over the whole column; no selection matches all rows.
+    """
+    mask = np.asarray(mask)
+    if mode not in SKIN_MODES:
+        raise ValueError(f"Unknown skin type mode: {mode}")
+    if not selected_bits:
+        return np.ones(len(mask), dtype=bool)
+    if mode == ALL:
+        return (mask & selected_bits) == selected_bits
+    if mode == EXACT:
+        return mask == selected_bits
+    return (mask & selected_bits) != 0
+
+
+def counts(mask, skin_types):
+    """Number of rows suitable for each skin type."""
+    return {col: int(flags.sum()) for col, flags in decode(mask, skin_types).items()}
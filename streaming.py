@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from catalog import ALL_BRANDS, SKIN_TYPES, QueryError, QueryResult
+from catalog_cache import csv_dtypes
+from ingredient_index import ALL, ANY, NONE, normalize_ingredient, split_ingredients
+from skin_mask import bits, encode, match as match_skin
+
+# Rows parsed per chunk; memory use is bounded by one chunk plus the matches
+CHUNK_SIZE = 50_000
+
+
+def validate_query(query):
+    """Check the parts of ``query`` that don't need catalog statistics.
+
+    Without a full pass over the file the catalog min/max are unknown, so
+    bounds left as None are simply unbounded here.
+    """
+    if query.price_min is not None and query.price_max is not None and query.price_min > query.price_max:
+        raise QueryError("Minimum price cannot be greater than maximum price.")
+    if query.rank_min is not None and query.rank_max is not None and query.rank_min > query.rank_max:
+        raise QueryError("Minimum rank cannot be greater than maximum rank.")
+    if query.limit <= 0:
+        raise QueryError("Number of rows must be positive.")
+    if query.order_by:
+        raise QueryError("Sorted results need the whole catalog and are not available in streaming mode.")
+
+
+def _ingredients_match(ingredients_str, wanted, mode):
+    names = {name.casefold() for name in split_ingredients(ingredients_str)}
+    if mode == ALL:
+        return wanted <= names
+    if mode == NONE:
+        return not (wanted & names)
+    return bool(wanted & names)
+
+
+def chunk_mask(chunk, query):
+    """Boolean mask of the rows of ``chunk`` that match ``query``.
+
+    Same predicates as ProductCatalog.query. The cheap vectorized ones run
+    first, and ingredient strings are only tokenized for rows still left.
+    """
+    mask = np.ones(len(chunk), dtype=bool)
+
+    # Handle brand
+    if query.brand and query.brand != ALL_BRANDS:
+        mask &= chunk['brand'].to_numpy() == query.brand
+
+    # Match the selected skin types on the chunk's packed bitmask
+    if query.skin_types:
+        mask &= match_skin(encode(chunk, SKIN_TYPES), bits(query.skin_types, SKIN_TYPES), query.skin_mode)
+
+    # Filter based on price and rank, compared in the columns' dtype
+    for col, low, high in (('price', query.price_min, query.price_max),
+                           ('rank', query.rank_min, query.rank_max)):
+        values = chunk[col].to_numpy()
+        if low is not None:
+            mask &= values >= values.dtype.type(low)
+        if high is not None:
+            mask &= values <= values.dtype.type(high)
+
+    # Handle ingredients on the remaining rows only
+    if query.ingredients:
+        wanted = {normalize_ingredient(name) for name in query.ingredients} - {''}
+        if query.ingredient_mode not in (ANY, ALL, NONE):
+            raise ValueError(f"Unknown ingredient mode: {query.ingredient_mode}")
+        candidates = np.flatnonzero(mask)
+        ingredients = chunk['ingredients'].to_numpy()
+        for row in candidates:
+            if not _ingredients_match(ingredients[row], wanted, query.ingredient_mode):
+                mask[row] = False
+    return mask
+
+
+def _at_end(reader):
+    # Whether the file has no rows left, at the cost of parsing one row
+    try:
+        reader.get_chunk(1)
+    except StopIteration:
+        return True
+    return False
+
+
+def stream_query(csv_path, query, chunk_size=CHUNK_SIZE):
+    """Run ``query`` over the CSV in fixed-size chunks without loading it.
+
+    Stops reading as soon as ``query.limit`` matches have been collected,
+    so memory stays flat however large the file is. The returned frame is
+    indexed by row position in the file, like ProductCatalog results.
+    As in ProductCatalog.query, a limit above the number of matches raises
+    QueryError, which can only be known once the whole file has been read.
+    """
+    validate_query(query)
+    parts = []
+    found = 0           # rows taken, up to the limit
+    total = 0           # matches in the chunks read
+    complete = True
+    reader = pd.read_csv(csv_path, dtype=csv_dtypes(SKIN_TYPES, categorical=False),
+                         chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            matches = chunk[chunk_mask(chunk, query)]
+            total += len(matches)
+            if len(matches):
+                parts.append(matches.iloc[:query.limit - found])
+                found += len(parts[-1])
+            if found >= query.limit:
+                # Early exit, unless this chunk happened to end the file
+                complete = len(chunk) < chunk_size or _at_end(reader)
+                break
+
+    if found == 0:
+        raise QueryError("No data matches the selected criteria.")
+    if found < query.limit:
+        raise QueryError(f"Number of rows ({query.limit}) exceeds filtered dataset size ({total}).")
+
+    frame = pd.concat(parts)
+    if query.skin_types:
+        frame = frame[[col for col in frame.columns if col not in SKIN_TYPES or col in query.skin_types]]
+    return QueryResult(query, frame, total, complete)
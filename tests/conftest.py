@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import SKIN_TYPES, ProductCatalog  # noqa: E402
+from catalog_cache import read_csv  # noqa: E402
+
+CSV_PATH = os.path.join(ROOT, 'cosmetic_p.csv')
+
+
+@pytest.fixture(scope='session')
+def raw():
+    """The catalog CSV as plain pandas reads it, for reference answers."""
+    return pd.read_csv(CSV_PATH)
+
+
+@pytest.fixture(scope='session')
+def frame():
+    """The catalog frame as ProductCatalog holds it (packed skin types)."""
+    return read_csv(CSV_PATH, SKIN_TYPES)
+
+
+@pytest.fixture
+def catalog(frame):
+    return ProductCatalog(frame)
@@ -0,0 +1,154 @@
+import random
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from catalog import ALL_BRANDS, SKIN_TYPES, Query, QueryError
+from conftest import CSV_PATH
+from ingredient_index import ALL, ANY, NONE, normalize_ingredient, split_ingredients
+from jobs import CancelToken, JobCancelled
+from skin_mask import EXACT
+from streaming import stream_query
+
+
+@pytest.fixture(scope='module')
+def reference(raw):
+    """Function returning the row ids that match a query, computed naively."""
+    ingredient_sets = [{name.casefold() for name in split_ingredients(ingredients_str)}
+                       for ingredients_str in raw['ingredients']]
+    return lambda query: reference_rows(raw, ingredient_sets, query)
+
+
+def reference_rows(raw, ingredient_sets, query):
+    mask = np.ones(len(raw), dtype=bool)
+    if query.brand and query.brand != ALL_BRANDS:
+        mask &= (raw['brand'] == query.brand).to_numpy()
+    if query.skin_types:
+        selected = raw[list(query.skin_types)].to_numpy() != 0
+        others = raw[[st for st in SKIN_TYPES if st not in query.skin_types]].to_numpy() != 0
+        if query.skin_mode == ANY:
+            mask &= selected.any(axis=1)
+        else:
+            mask &= selected.all(axis=1)
+            if query.skin_mode == EXACT:
+                mask &= ~others.any(axis=1)
+    if query.ingredients:
+        wanted = {normalize_ingredient(name) for name in query.ingredients} - {''}
+        for row, names in enumerate(ingredient_sets):
+            if query.ingredient_mode == ALL:
+                mask[row] &= wanted <= names
+            elif query.ingredient_mode == NONE:
+                mask[row] &= not (wanted & names)
+            else:
+                mask[row] &= bool(wanted & names)
+    for col, low, high in (('price', query.price_min, query.price_max),
+                           ('rank', query.rank_min, query.rank_max)):
+        values = raw[col].to_numpy(dtype=np.float32)
+        if low is not None:
+            mask &= values >= np.float32(low)
+        if high is not None:
+            mask &= values <= np.float32(high)
+    return np.flatnonzero(mask)
+
+
+def random_query(rng, catalog):
+    names = list(catalog.ingredient_index.names)
+    brands = list(catalog.brands)
+    price, rank = catalog.stats['price'], catalog.stats['rank']
+    fields = {}
+    if rng.random() < 0.3:
+        fields['brand'] = rng.choice(brands)
+    if rng.random() < 0.5:
+        fields['skin_types'] = tuple(rng.sample(SKIN_TYPES, rng.randint(1, 3)))
+        fields['skin_mode'] = rng.choice((ANY, ALL, EXACT))
+    if rng.random() < 0.6:
+        ingredients = rng.sample(names[:60], rng.randint(1, 3))
+        if rng.random() < 0.2:
+            ingredients.append('Not An Ingredient')
+        fields['ingredients'] = tuple(ingredients)
+        fields['ingredient_mode'] = rng.choice((ANY, ALL, NONE))
+    if rng.random() < 0.5:
+        low = rng.uniform(price.min, price.max)
+        fields['price_min'], fields['price_max'] = low, rng.uniform(low, price.max)
+    if rng.random() < 0.3:
+        fields['rank_min'] = rng.choice((rank.min, 3.5, 4.0, 4.5))
+    return Query(**fields)
+
+
+def test_match_agrees_with_reference(catalog, reference):
+    rng = random.Random(0)
+    queries = [random_query(rng, catalog) for _ in range(150)]
+    # The second round is answered from the cache or refines cached supersets
+    for query in queries + queries[::-1]:
+        np.testing.assert_array_equal(catalog.match(query), reference(query), err_msg=str(query))
+    assert catalog.query_cache.hits > 0
+
+
+@pytest.mark.parametrize('ingredients, mode', [
+    (('Water', 'Not An Ingredient'), ANY),
+    (('Water', 'Not An Ingredient'), ALL),
+    (('Water', 'Not An Ingredient'), NONE),
+    (('Not An Ingredient',), ANY),
+    (('Not An Ingredient',), ALL),
+    (('Not An Ingredient',), NONE),
+    (('Water', ''), ALL),
+    (('',), ANY),
+])
+def test_unknown_ingredients(catalog, reference, ingredients, mode):
+    query = Query(ingredients=ingredients, ingredient_mode=mode, limit=len(catalog))
+    expected = reference(query)
+    # Once on its own, and once after the same filter without the unknown
+    # name has been cached
+    for _ in range(2):
+        np.testing.assert_array_equal(catalog.match(query), expected)
+        catalog.match(Query(ingredients=('Water',), ingredient_mode=mode))
+    if len(expected):
+        assert stream_query(CSV_PATH, replace(query, limit=len(expected))).total == len(expected)
+    else:
+        with pytest.raises(QueryError):
+            catalog.query(query)
+        with pytest.raises(QueryError):
+            stream_query(CSV_PATH, query)
+
+
+def test_unknown_ingredients_match_nothing_in_all_mode(catalog):
+    assert len(catalog.match(Query(ingredients=('Water', 'Typo'), ingredient_mode=ALL))) == 0
+    assert len(catalog.match(Query(ingredients=('Typo',), ingredient_mode=ALL))) == 0
+    assert len(catalog.match(Query(ingredients=('Typo',), ingredient_mode=NONE))) == len(catalog)
+
+
+def test_query_limits(catalog):
+    result = catalog.query(Query(limit=5))
+    assert len(result) == 5 and result.total == len(catalog)
+    with pytest.raises(QueryError):
+        catalog.query(Query(limit=0))
+    with pytest.raises(QueryError):
+        catalog.query(Query(limit=len(catalog) + 1))
+    with pytest.raises(QueryError):
+        catalog.query(Query(price_min=-1))
+
+
+class CancelAfter(CancelToken):
+    """Token cancelled by its own ``checks``-th check, as if superseded then."""
+
+    def __init__(self, checks):
+        super().__init__()
+        self.checks = checks
+
+    def check(self):
+        self.checks -= 1
+        if self.checks <= 0:
+            self.cancel()
+        super().check()
+
+
+@pytest.mark.parametrize('checks', [1, 2, 3, 4])
+def test_cancelled_query_stops_without_caching(catalog, reference, checks):
+    query = Query(skin_types=('Dry',), ingredients=('Water',), limit=5)
+    with pytest.raises(JobCancelled):
+        catalog.query(query, CancelAfter(checks))
+    if checks <= 2:
+        assert len(catalog.query_cache) == 0
+    result = catalog.query(query, CancelToken())
+    np.testing.assert_array_equal(result.frame.index, reference(query)[:5])
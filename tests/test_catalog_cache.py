@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import SKIN_TYPES
+from catalog_cache import cache_path, read_cache, read_csv, write_cache
+from catalog_updates import diff_frames
+from ingredient_index import build_index
+
+
+def memory_mapped(array):
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = array.base
+    return False
+
+
+@pytest.fixture
+def csv_path(tmp_path, raw):
+    # A copy of the catalog with some missing text, in its own directory so
+    # the cache is written next to it
+    edited = raw.copy()
+    edited.loc[[3, 10], 'ingredients'] = np.nan
+    edited.loc[5, 'name'] = np.nan
+    path = tmp_path / 'catalog.csv'
+    edited.to_csv(path, index=False)
+    return str(path)
+
+
+def test_cache_round_trip(csv_path):
+    df = read_csv(csv_path, SKIN_TYPES)
+    index = build_index(df['ingredients'])
+    assert write_cache(csv_path, df, index, SKIN_TYPES)
+
+    cached_df, cached_index = read_cache(csv_path)
+    pd.testing.assert_frame_equal(cached_df, df)
+    assert cached_df['ingredients'].isna().sum() == 2
+    assert diff_frames(cached_df, df, SKIN_TYPES) == []
+    assert cached_index.names == index.names
+    assert all(memory_mapped(cached_df[col].to_numpy()) for col in ('price', 'rank', 'skin'))
+    assert all(memory_mapped(cached_df[col].array.codes) for col in ('Label', 'brand'))
+    for cached, built in zip(cached_index.postings, index.postings):
+        np.testing.assert_array_equal(cached, built)
+
+
+def test_rewrite_leaves_loaded_catalog_alone(csv_path):
+    df = read_csv(csv_path, SKIN_TYPES)
+    assert write_cache(csv_path, df, build_index(df['ingredients']), SKIN_TYPES)
+    loaded, _ = read_cache(csv_path)
+    expected = loaded.copy(deep=True)
+
+    # A shorter catalog with other prices, as after an edit of the CSV
+    edited = df.iloc[:100].copy()
+    edited['price'] *= 2
+    assert write_cache(csv_path, edited, build_index(edited['ingredients']), SKIN_TYPES)
+
+    pd.testing.assert_frame_equal(loaded, expected)
+    reloaded, _ = read_cache(csv_path)
+    pd.testing.assert_frame_equal(reloaded, edited)
+    assert len(os.listdir(cache_path(csv_path))) == 2      # the manifest and one data directory
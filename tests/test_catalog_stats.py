@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from catalog_stats import QUANTILES, ColumnStats
+
+
+def test_quantiles_match_numpy(raw):
+    rng = np.random.default_rng(0)
+    values = raw['price'].to_numpy(dtype=np.float32)
+    column_stats = ColumnStats(values)
+    added = rng.uniform(1, 500, 50).astype(np.float32)
+    column_stats.add(added)
+    column_stats.remove(values[:100])
+    expected = np.concatenate([values[100:], added])
+    for q in (0, 0.01, *QUANTILES, 0.9, 1):
+        assert column_stats.quantile(q) == pytest.approx(np.quantile(expected, q), rel=1e-6)
+    assert ColumnStats(values[:1]).quantile(0.5) == values[0]
+    assert np.isnan(ColumnStats(values[:0]).quantile(0.5))
+    with pytest.raises(ValueError):
+        column_stats.quantile(1.5)
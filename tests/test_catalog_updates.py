@@ -0,0 +1,173 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import SKIN_TYPES, ProductCatalog, Query, QueryError
+from catalog_updates import DELETE, UPSERT, Change, diff_frames
+from ingredient_index import IncidenceMatrix, normalize_ingredient
+from test_catalog import random_query
+
+
+def edited(rng, df, step, deletes):
+    """A copy of catalog frame ``df`` with products deleted, changed and added."""
+    names = list(df['ingredients'].str.split(', ').explode().dropna().unique())
+    deleted = rng.sample(range(len(df)), deletes)
+    new = df.drop(index=df.index[deleted]).reset_index(drop=True)
+    rows = rng.sample(range(len(new)), 30)
+    new.loc[rows[:10], 'price'] = [float(rng.randint(5, 150)) for _ in rows[:10]]
+    new.loc[rows[10:20], 'ingredients'] = [', '.join(rng.sample(names, 5) + [f'Novel {step}-{i}'])
+                                           for i in range(10)]
+    new.loc[rows[20:25], 'rank'] = np.nan
+    new.loc[rows[25:], 'skin'] ^= 1
+    brands = list(df['brand'].cat.categories[:3]) + [f'New Brand {step}']
+    added = pd.DataFrame({
+        'Label': 'Moisturizer',
+        'brand': [brands[i % 4] for i in range(8)],
+        'name': [f'Product {step}-{i}' for i in range(8)],
+        'price': [float(rng.randint(5, 400)) for _ in range(8)],
+        'rank': 4.0,
+        'ingredients': [', '.join(rng.sample(names, 4) + [f'Novel {step}-{i}']) for i in range(8)],
+        'skin': np.arange(8, dtype=np.uint8),
+    })
+    new = pd.concat([new, added], ignore_index=True)
+    return new.astype(df.dtypes.to_dict() | {'Label': 'category', 'brand': 'category'})
+
+
+def assert_same_catalog(catalog, expected, queries):
+    """Check the patched structures of ``catalog`` against a fresh rebuild."""
+    pd.testing.assert_frame_equal(catalog.df, expected.df, check_categorical=False)
+
+    # Compared on normalized names: a rebuild may keep another spelling
+    index, expected_index = catalog.ingredient_index, expected.ingredient_index
+    assert set(expected_index.ids) <= set(index.ids)
+    for key, i in index.ids.items():
+        expected_id = expected_index.ids.get(key)
+        expected_rows = index.postings[i][:0] if expected_id is None else expected_index.postings[expected_id]
+        np.testing.assert_array_equal(index.postings[i], expected_rows, err_msg=key)
+    assert ({normalize_ingredient(name) for name in index.alphabetical_names()}
+            == {normalize_ingredient(name) for name in expected_index.alphabetical_names()})
+
+    for col, column_stats in expected.stats.numeric.items():
+        np.testing.assert_array_equal(catalog.stats[col].values, column_stats.values)
+        assert catalog.stats[col].missing == column_stats.missing
+    assert catalog.stats.categorical == expected.stats.categorical
+    assert catalog.stats.skin_counts == expected.stats.skin_counts
+    assert catalog.stats.num_rows == expected.stats.num_rows
+
+    spliced, built = catalog._incidence, IncidenceMatrix.from_index(index)
+    np.testing.assert_array_equal(spliced.indptr, built.indptr)
+    np.testing.assert_array_equal(spliced.indices, built.indices)
+
+    assert catalog.product_keys == expected.product_keys
+
+    carried = catalog.query_cache.items(catalog.version)
+    assert carried
+    for key, rows in carried:
+        np.testing.assert_array_equal(rows, catalog._evaluate(key), err_msg=str(key))
+    for query in queries:
+        try:
+            rows = catalog.match(query)
+        except QueryError as e:
+            with pytest.raises(QueryError, match=str(e)):
+                expected.match(query)
+        else:
+            np.testing.assert_array_equal(rows, expected.match(query), err_msg=str(query))
+
+
+def warm(catalog, queries):
+    """Build the structures apply patches instead of rebuilding."""
+    catalog.incidence
+    catalog.product_keys
+    for query in queries:
+        try:
+            catalog.match(query)
+        except QueryError:
+            pass
+
+
+def test_apply_matches_rebuild(catalog):
+    rng = random.Random(0)
+    # The second step has no deletions, so row ids and product keys carry over
+    for step, deletes in enumerate((10, 0, 25)):
+        queries = [random_query(rng, catalog) for _ in range(100)]
+        warm(catalog, queries)
+        new_df = edited(rng, catalog.df, step, deletes)
+        changes = diff_frames(catalog.df, new_df, SKIN_TYPES)
+        assert changes is not None
+        updated = catalog.apply(changes)
+        assert updated.version == catalog.version + 1
+        if not deletes:
+            assert updated._product_keys is not None
+        assert_same_catalog(updated, ProductCatalog(new_df), queries)
+        catalog = updated
+
+
+def test_apply_replaces_and_merges(catalog):
+    rng = random.Random(1)
+    queries = [random_query(rng, catalog) for _ in range(100)]
+    warm(catalog, queries)
+    df = catalog.df
+    replaced, merged, deleted = (tuple(df[['brand', 'name']].iloc[row]) for row in (3, 7, 11))
+    updated = catalog.apply([
+        Change(DELETE, *replaced),
+        Change(UPSERT, *replaced, {'price': 12.0, 'Dry': 1}),
+        Change(UPSERT, *merged, {'price': 20.0}),
+        Change(UPSERT, *merged, {'rank': 4.4, 'ingredients': 'Water, Brand New Extract'}),
+        Change(DELETE, *deleted),
+        Change(UPSERT, 'New Brand', 'Added Then Deleted', {'price': 10.0}),
+        Change(DELETE, 'New Brand', 'Added Then Deleted'),
+    ])
+    assert len(updated) == len(df) - 1 and len(catalog.df) == len(df)
+
+    # A delete followed by an upsert starts the product over, in place
+    assert updated.product_keys[replaced] == 3
+    row = updated.df.iloc[3]
+    assert row['price'] == 12.0 and np.isnan(row['rank']) and pd.isna(row['ingredients'])
+    assert row['skin'] == 1 << SKIN_TYPES.index('Dry')
+    # Consecutive upserts merge, keeping the fields neither one sets
+    row = updated.df.iloc[updated.product_keys[merged]]
+    assert (row['price'], row['rank'], row['skin']) == (20.0, np.float32(4.4), df['skin'].iloc[7])
+    assert row['ingredients'] == 'Water, Brand New Extract'
+    assert deleted not in updated.product_keys
+    assert ('New Brand', 'Added Then Deleted') not in updated.product_keys
+
+    assert_same_catalog(updated, ProductCatalog(updated.df.copy()), queries)
+
+
+def test_full_range_drops_missing_values(catalog):
+    df = catalog.df
+    name = (df['brand'].iloc[0], df['name'].iloc[0])
+    catalog = catalog.apply([Change(UPSERT, *name, {'rank': np.nan})])
+    query = Query(rank_min=0, rank_max=5)
+    cached = catalog.match(query)
+    assert 0 not in cached
+
+    # The new rank widens the column, so the bounds no longer cover it
+    updated = catalog.apply([Change(UPSERT, 'New Brand', 'New Product', {'rank': 5.5, 'price': 10.0})])
+    assert updated.query_cache.items(updated.version)
+    fresh = ProductCatalog(updated.df.copy())
+    np.testing.assert_array_equal(updated.match(query), fresh.match(query))
+    np.testing.assert_array_equal(updated.match(query), cached)
+
+
+def test_deleted_ingredients_leave_the_vocabulary(catalog):
+    index = catalog.ingredient_index
+    # Ingredients of one product each, and the products holding them
+    single = [i for i in range(len(index)) if len(index.postings[i]) == 1][:5]
+    rows = sorted({int(index.postings[i][0]) for i in single})
+    df = catalog.df
+    changes = [Change(DELETE, df['brand'].iloc[row], df['name'].iloc[row]) for row in rows]
+    updated = catalog.apply(changes)
+
+    gone = [index.names[i] for i in single]
+    new_index = updated.ingredient_index
+    alphabetical = new_index.alphabetical_names()
+    assert not set(gone) & set(alphabetical)
+    assert set(alphabetical) == {name for name, frequency in zip(new_index.names, new_index.frequencies)
+                                 if frequency}
+    assert list(new_index.alphabetical_positions()) == list(alphabetical)
+    for name in gone:
+        assert name in catalog.ingredient_search.search(name)
+        assert name not in updated.ingredient_search.search(name)
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import catalog_watch
+from catalog import SKIN_TYPES, ProductCatalog
+from catalog_cache import load_catalog_data
+from catalog_watch import CatalogWatcher
+
+
+def write(path, text, mtime):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def watched(tmp_path, raw, frame):
+    path = tmp_path / 'catalog.csv'
+    text = raw.to_csv(index=False)
+    write(path, text, 10**18)
+    return str(path), text, CatalogWatcher(str(path), ProductCatalog(frame))
+
+
+def test_reload_keeps_mapped_snapshot(watched, raw):
+    path, text, _ = watched
+    # The startup catalog maps the cache that the reload replaces: the
+    # first load parses the CSV and writes the cache, the second maps it
+    load_catalog_data(path, SKIN_TYPES)
+    startup = ProductCatalog(*load_catalog_data(path, SKIN_TYPES))
+    watcher = CatalogWatcher(path, startup)
+    edited = raw.iloc[:100].copy()
+    edited.loc[0, 'price'] = 350
+    write(path, edited.to_csv(index=False), 2 * 10**18)
+    assert watcher.poll() is None           # first sight of the change
+    catalog = watcher.poll()
+    assert catalog.version == 1 and catalog.df['price'].iloc[0] == 350 and len(catalog) == 100
+    assert watcher.poll() is None
+    assert startup.df['price'].iloc[0] == raw['price'].iloc[0] and len(startup) == len(raw)
+    assert ProductCatalog(*load_catalog_data(path, SKIN_TYPES)).df['price'].iloc[0] == 350
+
+
+def test_broken_file_is_not_reread(watched, monkeypatch):
+    path, text, watcher = watched
+    reloads = []
+
+    def counting_reload(*args):
+        reloads.append(args)
+        return reload_catalog(*args)
+
+    reload_catalog = catalog_watch.reload_catalog
+    monkeypatch.setattr(catalog_watch, 'reload_catalog', counting_reload)
+    lines = text.splitlines()
+    header, first = lines[0].split(','), lines[1].split(',')
+    first[header.index('price')] = 'not a price'
+    write(path, '\n'.join([lines[0], ','.join(first)] + lines[2:]) + '\n', 2 * 10**18)
+
+    assert watcher.poll() is None
+    with pytest.raises(ValueError):
+        watcher.poll()
+    for _ in range(3):
+        assert watcher.poll() is None
+    assert len(reloads) == 1
+
+    # Fixed again: picked up once it settles
+    write(path, text, 3 * 10**18)
+    assert watcher.poll() is None
+    assert watcher.poll() is None           # same contents as the catalog
+    assert len(reloads) == 2 and watcher._failed is None
@@ -0,0 +1,25 @@
+import gc
+
+from figure_pool import FigurePool, figure_counters
+from perf import recorder
+
+
+def test_figure_counters_reach_perf_snapshot():
+    before = figure_counters()
+    pool = FigurePool()
+    for chart in range(3):
+        fig, ax = pool.acquire('chart')
+        ax.plot([chart, chart + 1])
+        assert pool.render_png('chart').startswith(b'\x89PNG')
+    pool.acquire('heatmap')
+    assert figure_counters() == {'created': before['created'] + 2, 'live': before['live'] + 2}
+
+    counters = recorder.snapshot()['counters']
+    assert counters['figures.created'] == before['created'] + 2
+    assert counters['figures.live'] == before['live'] + 2
+
+    pool.release_all()
+    del fig, ax
+    gc.collect()
+    assert figure_counters() == {'created': before['created'] + 2, 'live': before['live']}
+    assert recorder.snapshot()['counters']['figures.live'] == before['live']
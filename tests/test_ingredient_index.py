@@ -0,0 +1,32 @@
+import threading
+
+import numpy as np
+
+import ingredient_index
+from ingredient_index import IngredientIndex, build_index
+
+
+def assert_same_index(index, expected):
+    assert index.names == expected.names
+    assert index.num_rows == expected.num_rows
+    for rows, expected_rows in zip(index.postings, expected.postings):
+        np.testing.assert_array_equal(rows, expected_rows)
+
+
+def test_parallel_build_matches_serial(raw, monkeypatch):
+    monkeypatch.setattr(ingredient_index, 'MIN_ROWS_PER_WORKER', 200)
+    expected = IngredientIndex.from_series(raw['ingredients'])
+    assert_same_index(build_index(raw['ingredients'], workers=3), expected)
+
+
+def test_build_on_a_thread_does_not_fork(raw, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("forked a process pool from a threaded process")
+
+    monkeypatch.setattr(ingredient_index, 'MIN_ROWS_PER_WORKER', 200)
+    monkeypatch.setattr(ingredient_index, 'ProcessPoolExecutor', no_pool)
+    built = []
+    thread = threading.Thread(target=lambda: built.append(build_index(raw['ingredients'], workers=3)))
+    thread.start()
+    thread.join()
+    assert_same_index(built[0], IngredientIndex.from_series(raw['ingredients']))
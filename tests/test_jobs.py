@@ -0,0 +1,54 @@
+import threading
+
+from jobs import JobRunner
+
+
+class FakeRoot:
+    """Stands in for Tk: ``after`` callbacks are run by ``run_pending``."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+
+    def run_pending(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for callback in scheduled:
+            callback()
+
+
+def run_until_idle(root):
+    while root.scheduled:
+        root.run_pending()
+
+
+def test_failing_callback_keeps_results_coming(caplog):
+    root = FakeRoot()
+    runner = JobRunner(root, poll_ms=0)
+    done = []
+
+    def broken(result):
+        raise RuntimeError("widget is gone")
+
+    finished = threading.Event()
+    runner.submit('chart', lambda token: 1, on_done=broken)
+    runner.submit('query', lambda token: finished.wait(5) and 2, on_done=done.append)
+    while runner.results.qsize() < 1:
+        pass
+    root.run_pending()       # delivers the chart result, whose callback raises
+    assert "Error in chart job callback" in caplog.text
+    assert root.scheduled and runner.polling
+
+    finished.set()
+    run_until_idle(root)
+    assert done == [2] and not runner.polling
+
+    def broken_error(e):
+        raise RuntimeError("widget is gone")
+
+    runner.submit('query', lambda token: 1 / 0, on_error=broken_error)
+    runner.submit('search', lambda token: 3, on_done=done.append)
+    run_until_idle(root)
+    assert done == [2, 3] and not runner.polling
+    runner.shutdown()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import pytest
+
+from catalog import ProductCatalog
+import service as service_module
+from service import QueryService, serve_connection
+
+
+@pytest.fixture(scope='module')
+def service(frame):
+    return QueryService(ProductCatalog(frame))
+
+
+def post(service, target, payload):
+    response = service.handle('POST', target, {}, json.dumps(payload).encode('utf-8'))
+    body = response.body if response.chunks is None else b''.join(response.chunks)
+    return response.status, body.decode('utf-8')
+
+
+def exchange(service, request):
+    """Send raw bytes to a served connection; return the status and body."""
+    async def run():
+        server = await asyncio.start_server(lambda r, w: serve_connection(service, r, w), '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname())
+            writer.write(request)
+            response = await reader.read()
+            writer.close()
+            return response
+    head, _, body = asyncio.run(asyncio.wait_for(run(), 10)).partition(b'\r\n\r\n')
+    return int(head.split()[1]), body.decode('utf-8')
+
+
+@pytest.mark.parametrize('payload', [
+    {'limit': 'x'},
+    {'price_min': '10'},
+    {'skin_types': 'Dry'},
+    {'skin_types': ['Dry', 'Foo']},
+    {'price_min': float('nan')},
+    {'rank_max': float('inf')},
+    {'score_weights': [1, float('-inf')]},
+    {'ingredients': [1, 2]},
+    {'ingredient_mode': 'most'},
+    {'score_weights': [1]},
+    {'order_by': [{'column': 'nope'}]},
+    {'order_by': [{'column': 'price', 'descending': 'yes'}]},
+    {'order_by': 5},
+])
+@pytest.mark.parametrize('target', ['/query', '/query?format=ndjson'])
+def test_malformed_queries_are_bad_requests(service, target, payload):
+    status, body = post(service, target, payload)
+    assert status == 400
+    assert 'must be' in json.loads(body)['error'] or 'Unknown' in json.loads(body)['error']
+
+
+@pytest.mark.parametrize('target', ['/query', '/query?format=ndjson'])
+def test_rejected_queries_are_unprocessable(service, target):
+    status, body = post(service, target, {'brand': 'NO SUCH BRAND'})
+    assert status == 422
+    assert json.loads(body) == {'error': 'No data matches the selected criteria.'}
+
+
+@pytest.mark.parametrize('payload', [{'k': 'x'}, {'skin_types': ['Foo']}])
+def test_recommend_checks_field_types(service, payload):
+    status, _ = post(service, '/recommend', {'name': 'Facial Treatment Essence', **payload})
+    assert status == 400
+
+
+def test_floats_are_serialized_as_decimals(service):
+    status, body = post(service, '/query', {'limit': 50})
+    assert status == 200
+    assert '0000000' not in body and '9999999' not in body
+    _, ndjson = post(service, '/query?format=ndjson', {'limit': 50})
+    rows = [json.loads(line) for line in ndjson.splitlines()[1:]]
+    assert rows == json.loads(body)['rows']
+    assert rows[0]['rank'] == 4.1
+
+
+@pytest.mark.parametrize('length, status', [
+    ('abc', 400), ('-3', 400), ('+3', 400), (' ', 200), ('2', 200), (str(1 << 30), 413),
+])
+def test_content_length_is_checked(service, caplog, length, status):
+    request = f'POST /query HTTP/1.1\r\nConnection: close\r\nContent-Length: {length}\r\n\r\n{{}}'
+    got, body = exchange(service, request.encode('latin-1'))
+    assert got == status
+    assert ('error' in json.loads(body)) == (status != 200)
+    assert 'Unhandled exception' not in caplog.text
+
+
+def test_overlong_header_is_a_bad_request(service, caplog):
+    request = b'GET /health HTTP/1.1\r\nX-Padding: ' + b'x' * 100000 + b'\r\n\r\n'
+    assert exchange(service, request)[0] == 400
+    assert 'Unhandled exception' not in caplog.text
+
+
+def test_failed_stream_is_cut_short(service, caplog, monkeypatch):
+    blocks = []
+
+    def failing_json_ready(frame):
+        blocks.append(frame)
+        if len(blocks) > 1:
+            raise RuntimeError("serialization failed")
+        return frame
+
+    monkeypatch.setattr(service_module, 'NDJSON_BLOCK', 10)
+    monkeypatch.setattr(service_module, 'json_ready', failing_json_ready)
+    body = json.dumps({'limit': 50})
+    request = f'POST /query?format=ndjson HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n{body}'
+    status, chunked = exchange(service, request.encode('latin-1'))
+    assert status == 200
+    lines = [line for line in chunked.splitlines() if line.startswith('{')]
+    assert len(lines) == 11       # the header and the first block, unterminated
+    assert not chunked.endswith('0\r\n\r\n')
+    assert 'Error streaming response' in caplog.text
+    assert 'Unhandled exception' not in caplog.text
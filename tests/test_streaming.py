@@ -0,0 +1,51 @@
+import random
+import re
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from catalog import Query, QueryError
+from conftest import CSV_PATH
+from streaming import stream_query
+from test_catalog import random_query
+
+
+@pytest.mark.parametrize('chunk_size', [500, 736, 1000, 5000])
+def test_complete_when_the_limit_ends_the_file(raw, chunk_size):
+    result = stream_query(CSV_PATH, Query(limit=len(raw)), chunk_size=chunk_size)
+    assert result.complete and result.total == len(raw) == len(result)
+
+
+def test_incomplete_when_rows_are_left(raw):
+    result = stream_query(CSV_PATH, Query(limit=10), chunk_size=500)
+    assert not result.complete and len(result) == 10
+    assert result.total == 500
+
+
+def test_agrees_with_catalog(catalog):
+    rng = random.Random(2)
+    for _ in range(60):
+        query = random_query(rng, catalog)
+        query = replace(query, limit=rng.choice((1, 10, 100, 1000)))
+        try:
+            expected = catalog.query(query)
+        except QueryError as e:
+            with pytest.raises(QueryError, match=re.escape(str(e))):
+                stream_query(CSV_PATH, query, chunk_size=300)
+            continue
+        result = stream_query(CSV_PATH, query, chunk_size=300)
+        np.testing.assert_array_equal(result.frame.index, expected.frame.index, err_msg=str(query))
+        if result.complete:
+            assert result.total == expected.total
+        else:
+            assert result.total <= expected.total
+
+
+def test_limit_above_matches_raises_like_catalog(catalog):
+    query = Query(brand='LA MER', limit=500)
+    with pytest.raises(QueryError, match=r'exceeds filtered dataset size \(30\)'):
+        catalog.query(query)
+    with pytest.raises(QueryError, match=r'exceeds filtered dataset size \(30\)'):
+        stream_query(CSV_PATH, query)
+    assert stream_query(CSV_PATH, replace(query, limit=30)).complete
@@ -1,34 +1,73 @@
-import pandas as pd
+import time
+_startup_time = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib
-matplotlib.use('TkAgg')  # Set the backend before importing pyplot
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import seaborn as sns
-from tkinter import scrolledtext
 import os
-
-# Configure matplotlib style
-plt.style.use('seaborn-v0_8')  # Use a more modern style
-sns.set_theme()  # Set seaborn theme
-
-# Configure matplotlib to use a system font
-plt.rcParams['font.family'] = 'sans-serif'
-plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif']
+import sys
+import json
+import base64
+import logging
+from dataclasses import replace
+from types import SimpleNamespace
+from catalog import ALL_BRANDS, SKIN_TYPES, ProductCatalog, Query, QueryError
+from catalog_watch import CatalogWatcher
+from ranking import ORDERINGS
+from ingredient_index import ALL, ANY
+from skin_mask import EXACT
+from result_aggregates import aggregates
+from result_table import VirtualTable
+from jobs import JobRunner
+from perf import span
+from diagnostics import DiagnosticsPanel
+
+# Errors and warnings go to the log; GLOWPICK_LOG_LEVEL=DEBUG also logs
+# every timing span recorded by perf.py as a JSON line
+logging.basicConfig(level=os.environ.get('GLOWPICK_LOG_LEVEL', 'INFO'),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('glowpick')
+
+# The plotting stack (matplotlib, seaborn and the chart helpers) is only
+# imported when the visualization page is opened for the first time
+plotting = None
+
+def load_plotting():
+    global plotting
+    if plotting is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Charts are rendered off-screen on a worker thread
+        import seaborn as sns
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        import charts
+        from figure_pool import FigurePool
+
+        # Configure matplotlib style
+        matplotlib.style.use('seaborn-v0_8')  # Use a more modern style
+        sns.set_theme()  # Set seaborn theme
+
+        # Configure matplotlib to use a system font
+        matplotlib.rcParams['font.family'] = 'sans-serif'
+        matplotlib.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans', 'Bitstream Vera Sans', 'sans-serif']
+
+        # Charts are drawn on one reused headless figure and shown as an image
+        plotting = SimpleNamespace(charts=charts, chart_pool=FigurePool(canvas_class=FigureCanvasAgg))
+    return plotting
 
 # Load the dataset
+CATALOG_CSV = 'cosmetic_p.csv'
 try:
-    df = pd.read_csv('cosmetic_p.csv')
+    catalog = ProductCatalog.from_csv(CATALOG_CSV)
+    df = catalog.df
 except FileNotFoundError:
     messagebox.showerror("Error", "cosmetic_p.csv file not found. Please make sure the file exists in the same directory.")
     exit(1)
 except Exception as e:
+    logger.exception("Error loading the dataset")
     messagebox.showerror("Error", f"Error loading the dataset: {str(e)}")
     exit(1)
 
 # Print the columns to check their names
-print("Columns in the DataFrame:", df.columns.tolist())
+logger.info("Columns in the DataFrame: %s", catalog.columns)
 
 # Create the main window
 root = tk.Tk()
@@ -37,13 +76,62 @@ root.geometry("800x600")    # Adjusted initial size
 root.configure(bg='#FFEBEB')  # Set background color
 root.minsize(800, 600)  # Set minimum window size
 
+# Queries and chart rendering run on worker threads; results come back
+# through root.after polling
+job_runner = JobRunner(root)
+
 # Add close button handler
 def on_closing():
     if messagebox.askokcancel("Quit", "Do you want to quit?"):
+        job_runner.shutdown()
         root.destroy()
 
 root.protocol("WM_DELETE_WINDOW", on_closing)
 
+# Diagnostics panel with the recorded timings (F12 or the button on the
+# filter page); only one is open at a time
+diagnostics_panel = None
+
+def show_diagnostics(event=None):
+    global diagnostics_panel
+    if diagnostics_panel is not None and diagnostics_panel.winfo_exists():
+        diagnostics_panel.lift()
+        return
+    diagnostics_panel = DiagnosticsPanel(root)
+
+root.bind('<F12>', show_diagnostics)
+
+# Watch mode: the CSV is polled every GLOWPICK_WATCH seconds (0 turns it off)
+# and reloaded on a worker thread when it changes. Only the changed products
+# are re-indexed, and the new catalog replaces the global one on the Tk
+# thread; queries and result windows keep the snapshot they started with.
+WATCH_INTERVAL = float(os.environ.get('GLOWPICK_WATCH', '2'))
+catalog_watcher = CatalogWatcher(CATALOG_CSV, catalog)
+
+def poll_catalog():
+    if not job_runner.busy('reload'):
+        job_runner.submit('reload', lambda token: catalog_watcher.poll(),
+                          on_done=swap_catalog, on_error=on_reload_error)
+    root.after(int(WATCH_INTERVAL * 1000), poll_catalog)
+
+def swap_catalog(new_catalog):
+    global catalog, df
+    if new_catalog is None:
+        return
+    old_catalog = catalog
+    catalog, df = new_catalog, new_catalog.df
+    logger.info("Reloaded %s: %d products (version %d)", CATALOG_CSV, len(catalog), catalog.version)
+    if main_window_built:
+        refresh_limits(old_catalog)
+        populate_dropdowns()
+
+def on_reload_error(e):
+    # Keep serving the loaded catalog; the next change is picked up again
+    logger.error("Error reloading %s", CATALOG_CSV, exc_info=e)
+
+if WATCH_INTERVAL > 0:
+    root.after(int(WATCH_INTERVAL * 1000), poll_catalog)
+
 # Create the start page
 start_frame = tk.Frame(root, bg='#FFEBEB')
 start_frame.pack(expand=True, fill='both')
@@ -67,9 +155,9 @@ try:
         logo_label.image = logo_image  # Keep a reference to prevent garbage collection
         logo_label.pack(pady=5)
     else:
-        print("Warning: logo2.png not found. Starting without logo.")
+        logger.warning("logo2.png not found. Starting without logo.")
 except Exception as e:
-    print(f"Warning: Error loading logo: {str(e)}")
+    logger.warning("Error loading logo: %s", e)
 
 # Start button with enhanced styling
 start_button = tk.Button(content_frame, 
@@ -88,7 +176,7 @@ start_button.pack(pady=15)
 main_frame = tk.Frame(root, bg='#FFEBEB')
 
 # Create dropdowns for column selection (including Brand, Name, Price, and Rank)
-columns = df.columns.tolist()
+columns = catalog.columns
 if 'name' in columns:
     columns.remove('name')   # Remove Name from the dropdowns
 
@@ -109,15 +197,27 @@ if 'skin_type' in columns:
 # Initialize variables for dropdowns and checkboxes
 column_vars = {col: tk.StringVar() for col in columns}
 checkbox_vars = {col: tk.BooleanVar() for col in columns}
+sort_var = tk.StringVar(value='File order')
+
+# How the checked skin types are matched against a product's skin types
+SKIN_MODE_LABELS = {'Any selected': ANY, 'All selected': ALL, 'Exactly these': EXACT}
+skin_mode_var = tk.StringVar(value='Any selected')
 dropdowns = {}
 
+# Catalog the dropdowns were last populated from; re-entering the main
+# window with the same catalog skips the work entirely
+populated_catalog = None
+
 # Function to populate dropdowns with unique values from each column and handle multi-select
 def populate_dropdowns():
+    global populated_catalog
+    if populated_catalog is catalog:
+        return
     try:
         # Populate brand and skin_type dropdowns
         for col in ['brand', 'skin_type']:
             if col in dropdowns:
-                unique_values = sorted(df[col].unique().tolist())
+                unique_values = [ALL_BRANDS] + catalog.brands if col == 'brand' else sorted(df[col].unique().tolist())
                 current_value = column_vars[col].get()
                 dropdowns[col]['values'] = unique_values
                 if current_value in unique_values:
@@ -127,113 +227,93 @@ def populate_dropdowns():
         
         # Populate ingredients listbox
         if 'ingredients' in df.columns:
-            # Clear existing items
-            ingredients_listbox.delete(0, tk.END)
-            
-            # Get unique ingredients, split by comma, and clean them
-            unique_ingredients = set()
-            for ingredients_str in df['ingredients'].dropna():
-                ingredients_list = [ing.strip() for ing in ingredients_str.split(',')]
-                unique_ingredients.update(ingredients_list)
-            
-            # Sort and insert ingredients
-            for ingredient in sorted(unique_ingredients):
-                if ingredient:  # Only add non-empty ingredients
-                    ingredients_listbox.insert(tk.END, ingredient)
+            # Replace all items with the vocabulary (or current suggestions) in one call
+            refresh_ingredient_list()
+            # Build the type-ahead search before the first keystroke needs it
+            job_runner.submit('search_index', lambda token, search_catalog: search_catalog.ingredient_search,
+                              catalog)
+        populated_catalog = catalog
     except Exception as e:
+        logger.exception("Error populating dropdowns")
         messagebox.showerror("Error", f"Error populating dropdowns: {str(e)}")
 
+# Update the price/rank limits after a reload; entries still holding the old
+# catalog's defaults move to the new ones
+def refresh_limits(old_catalog):
+    price, rank = catalog.stats['price'], catalog.stats['rank']
+    price_limits_label.configure(text=f"Price Range: {price.min:.2f} - {price.max:.2f}")
+    rank_limits_label.configure(text=f"Rank Range: {rank.min} - {rank.max}")
+    for entry, col, bound in ((price_min_entry, 'price', 'min'), (price_max_entry, 'price', 'max'),
+                              (rank_min_entry, 'rank', 'min'), (rank_max_entry, 'rank', 'max')):
+        if entry.get() == str(getattr(old_catalog.stats[col], bound)):
+            entry.delete(0, tk.END)
+            entry.insert(0, str(getattr(catalog.stats[col], bound)))
+
+# Function to build a Query from the filter widgets
+def read_query(checkbox_vars):
+    # Raises ValueError when an entry is not a valid number
+    selected_brand = column_vars['brand'].get()
+    selected_skin_types = tuple(st for st in SKIN_TYPES if checkbox_vars[st].get())
+    return Query(
+        brand=selected_brand if selected_brand != ALL_BRANDS else None,
+        skin_types=selected_skin_types,
+        skin_mode=SKIN_MODE_LABELS[skin_mode_var.get()],
+        ingredients=tuple(sorted(selected_ingredients)),
+        price_min=float(price_min_entry.get()) if price_min_entry.get() else None,
+        price_max=float(price_max_entry.get()) if price_max_entry.get() else None,
+        rank_min=float(rank_min_entry.get()) if rank_min_entry.get() else None,
+        rank_max=float(rank_max_entry.get()) if rank_max_entry.get() else None,
+        order_by=ORDERINGS[sort_var.get()],
+    )
+
 # Function to fetch data based on user input
 def fetch_data(checkbox_vars):
     try:
-        # Start with the full DataFrame
-        filtered_df = df.copy()
-
-        # Handle brand dropdown
-        selected_brand = column_vars['brand'].get()
-        if selected_brand and selected_brand != 'All Brands':
-            filtered_df = filtered_df[filtered_df['brand'] == selected_brand]
-
-        # Handle skin type checkboxes
-        skin_types = ['Combination', 'Dry', 'Normal', 'Oily', 'Sensitive']
-        selected_skin_types = [st for st in skin_types if checkbox_vars[st].get()]
-        
-        # If skin types are selected, filter the data
-        if selected_skin_types:
-            # Create a mask that will be True if any of the selected skin types is 1
-            skin_mask = filtered_df[selected_skin_types].any(axis=1)
-            filtered_df = filtered_df[skin_mask]
-            
-            # Only keep the selected skin type columns
-            columns_to_keep = [col for col in filtered_df.columns if col not in skin_types or col in selected_skin_types]
-            filtered_df = filtered_df[columns_to_keep]
-
-        # Handle ingredients multi-select
-        if 'ingredients' in df.columns:
-            selected_ingredients = [ingredients_listbox.get(i) for i in ingredients_listbox.curselection()]
-            if selected_ingredients:
-                mask = filtered_df['ingredients'].apply(lambda x: any(ing.strip() in str(x).split(',') for ing in selected_ingredients))
-                filtered_df = filtered_df[mask]
-
-        # Get price and rank range with validation
         try:
-            price_min = float(price_min_entry.get()) if price_min_entry.get() else df['price'].min()
-            price_max = float(price_max_entry.get()) if price_max_entry.get() else df['price'].max()
-            rank_min = int(rank_min_entry.get()) if rank_min_entry.get() else df['rank'].min()
-            rank_max = int(rank_max_entry.get()) if rank_max_entry.get() else df['rank'].max()
+            query = read_query(checkbox_vars)
         except ValueError:
             messagebox.showerror("Error", "Please enter valid numbers for price and rank ranges.")
             return
 
-        # Validate ranges
-        if price_min < df['price'].min() or price_max > df['price'].max():
-            messagebox.showerror("Error", f"Price must be between {df['price'].min():.2f} and {df['price'].max():.2f}")
-            return
-
-        if rank_min < df['rank'].min() or rank_max > df['rank'].max():
-            messagebox.showerror("Error", f"Rank must be between {df['rank'].min()} and {df['rank'].max()}")
-            return
-
-        if price_min > price_max:
-            messagebox.showerror("Error", "Minimum price cannot be greater than maximum price.")
-            return
-
-        if rank_min > rank_max:
-            messagebox.showerror("Error", "Minimum rank cannot be greater than maximum rank.")
-            return
-
-        # Filter based on price and rank
-        filtered_df = filtered_df[(filtered_df['price'] >= price_min) & (filtered_df['price'] <= price_max)]
-        filtered_df = filtered_df[(filtered_df['rank'] >= rank_min) & (filtered_df['rank'] <= rank_max)]
-
         # Get number of rows to display
         try:
             num_rows = int(row_entry.get())
-            if num_rows <= 0:
-                messagebox.showerror("Error", "Number of rows must be positive.")
-                return
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid number for rows.")
             return
 
-        if len(filtered_df) == 0:
-            messagebox.showerror("Error", "No data matches the selected criteria.")
-            return
-        
-        if num_rows > len(filtered_df):
-            messagebox.showerror("Error", f"Number of rows ({num_rows}) exceeds filtered dataset size ({len(filtered_df)}).")
-            return
-
-        # Store the filtered data globally for visualization
-        global fetched_data
-        fetched_data = filtered_df.head(num_rows)
-        
-        # Display the data
-        display_data(fetched_data)
+        # Filter on the worker thread; a newer fetch supersedes this one
+        job_runner.submit('query', run_query, catalog, replace(query, limit=num_rows),
+                          on_done=on_query_done, on_error=on_query_error)
         
     except Exception as e:
-        messagebox.showerror("Error", f"An error occurred while fetching data: {str(e)}")
-        print(f"Error details: {str(e)}")  # Print error details for debugging
+        on_query_error(e)
+
+# Runs on the worker thread, against the catalog current at submit time
+def run_query(token, query_catalog, query):
+    result = query_catalog.query(query, token)
+    token.check()
+    # The chart aggregates are computed here, once, so switching charts on
+    # the visualization page only draws
+    aggregates(result.frame)
+    return query_catalog, result
+
+def on_query_done(outcome):
+    # Store the filtered data globally for visualization, with the catalog
+    # snapshot its row ids refer to
+    global fetched_data, fetched_catalog
+    fetched_catalog, result = outcome
+    fetched_data = result.frame
+    
+    # Display the data
+    display_data(fetched_data)
+
+def on_query_error(e):
+    if isinstance(e, QueryError):
+        messagebox.showerror("Error", str(e))
+        return
+    logger.error("Error while fetching data", exc_info=e)
+    messagebox.showerror("Error", f"An error occurred while fetching data: {str(e)}")
 
 # Function to display data in a new window
 def display_data(data):
@@ -247,7 +327,7 @@ def display_data(data):
     
     # Set window size and position
     window_width = 1200
-    window_height = min(800, 100 + len(data) * 25)  # Dynamic height based on data
+    window_height = min(800, 100 + min(len(data), 20) * 25)  # Grows with data up to one page
     screen_width = display_window.winfo_screenwidth()
     screen_height = display_window.winfo_screenheight()
     x = (screen_width - window_width) // 2
@@ -258,56 +338,10 @@ def display_data(data):
     main_frame = ttk.Frame(display_window, padding="10")
     main_frame.pack(fill=tk.BOTH, expand=True)
 
-    # Create Treeview with scrollbars
-    tree_frame = ttk.Frame(main_frame)
-    tree_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-    tree = ttk.Treeview(tree_frame, height=20)
-    vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=tree.xview)
-    tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
-
-    # Grid layout for treeview and scrollbars
-    tree.grid(column=0, row=0, sticky='nsew')
-    vsb.grid(column=1, row=0, sticky='ns')
-    hsb.grid(column=0, row=1, sticky='ew')
-    tree_frame.grid_columnconfigure(0, weight=1)
-    tree_frame.grid_rowconfigure(0, weight=1)
-
-    # Configure columns
-    columns = list(data.columns)
-    tree["columns"] = columns
-    tree["show"] = "headings"
-
-    # Set column headings and widths
-    for col in columns:
-        heading = col.replace('_', ' ').title()
-        if col in ['price', 'rank']:
-            width = 80
-        elif col == 'ingredients':
-            width = 300
-        elif col in ['Combination', 'Dry', 'Normal', 'Oily', 'Sensitive']:
-            width = 100
-        else:
-            width = 150
-        tree.heading(col, text=heading)
-        tree.column(col, width=width, minwidth=50)
-
-    # Insert data
-    for idx, row in data.iterrows():
-        values = []
-        for col in columns:
-            value = row[col]
-            if col == 'price':
-                value = f"${value:.2f}" if pd.notna(value) else "N/A"
-            elif col == 'rank':
-                value = f"{int(value)}" if pd.notna(value) else "N/A"
-            elif col in ['Combination', 'Dry', 'Normal', 'Oily', 'Sensitive']:
-                value = "Yes" if value == 1 else "No"
-            elif col == 'ingredients':
-                value = str(value)[:300] + "..." if len(str(value)) > 300 else str(value)
-            values.append(str(value) if pd.notna(value) else "")
-        tree.insert("", "end", values=values)
+    # Create a virtual table that only formats and shows the visible rows
+    with span('table.populate', rows=len(data)):
+        table = VirtualTable(main_frame, data, height=20)
+        table.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     # Add total count label
     count_label = ttk.Label(main_frame, text=f"Total Products: {len(data)}", 
@@ -321,6 +355,8 @@ def display_data(data):
 
 # Function to show the main window
 def show_main_window():
+    if not main_window_built:
+        build_main_window()
     start_frame.pack_forget()  # Hide the start page
     main_frame.pack(expand=True, fill='both')  # Show the main application window
     populate_dropdowns()  # Populate dropdowns with unique values
@@ -334,147 +370,259 @@ def show_visualization_page():
     root.geometry("1000x700")  # Set the main window size instead
     create_visualizations()  # Call the function to create visualizations
 
-# Create a scrollable frame for the main window with increased width
-main_canvas = tk.Canvas(main_frame, bg='#FFEBEB', width=1150)  # Set canvas width
-scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=main_canvas.yview)
-scrollable_frame = ttk.Frame(main_canvas)
-
-scrollable_frame.bind(
-    "<Configure>",
-    lambda e: main_canvas.configure(scrollregion=main_canvas.bbox("all"))
-)
-
-main_canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-main_canvas.configure(yscrollcommand=scrollbar.set)
-
 # Enable mousewheel scrolling
 def _on_mousewheel(event):
     main_canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-main_canvas.bind_all("<MouseWheel>", _on_mousewheel)
-
-# Configure canvas to expand with window
-main_frame.grid_rowconfigure(0, weight=1)
-main_frame.grid_columnconfigure(0, weight=1)
-main_canvas.configure(width=1150, height=600)  # Set both width and height
-
-# Add a title to the main window
-main_title = tk.Label(scrollable_frame, 
-                     text="Cosmetic Product Filter", 
-                     font=("Helvetica", 24, "bold"),
-                     bg='#FFEBEB',
-                     fg='#FF6B6B')
-main_title.pack(pady=20)
-
-# Create a frame for filters
-filters_frame = ttk.LabelFrame(scrollable_frame, text="Filters", padding=10)
-filters_frame.pack(fill='x', padx=20, pady=10)
-
-# Create ingredients listbox with scrollbar in a separate frame
-ingredients_frame = ttk.LabelFrame(filters_frame, text="Ingredients Selection", padding=10)
-ingredients_frame.pack(fill='x', padx=10, pady=5)
-
-ingredients_label = tk.Label(ingredients_frame, 
-                           text="Select Ingredients (Hold Ctrl/Cmd to select multiple):", 
-                           bg='#FFEBEB',
-                           font=("Helvetica", 10))
-ingredients_label.pack(anchor='w', padx=5, pady=5)
-
-ingredients_listbox = tk.Listbox(ingredients_frame, 
-                                selectmode=tk.MULTIPLE, 
-                                height=5, 
-                                width=80,
-                                font=("Helvetica", 10))
-ingredients_listbox.pack(side='left', fill='both', expand=True, padx=5)
-
-ingredients_scrollbar = ttk.Scrollbar(ingredients_frame, orient="vertical", command=ingredients_listbox.yview)
-ingredients_scrollbar.pack(side='right', fill='y')
-ingredients_listbox.configure(yscrollcommand=ingredients_scrollbar.set)
-
-# Create a frame for price and rank filters
-price_rank_frame = ttk.LabelFrame(filters_frame, text="Price and Rank Range", padding=10)
-price_rank_frame.pack(fill='x', padx=10, pady=5)
-
-# Display min and max limits
-limits_frame = ttk.Frame(price_rank_frame)
-limits_frame.pack(fill='x', pady=5)
-
-# Price limits
-price_limits_label = tk.Label(limits_frame, 
-                            text=f"Price Range: {df['price'].min():.2f} - {df['price'].max():.2f}", 
-                            bg='#FFEBEB', 
-                            font=("Helvetica", 10))
-price_limits_label.pack(side='left', padx=5)
-
-# Rank limits
-rank_limits_label = tk.Label(limits_frame, 
-                           text=f"Rank Range: {df['rank'].min()} - {df['rank'].max()}", 
-                           bg='#FFEBEB', 
-                           font=("Helvetica", 10))
-rank_limits_label.pack(side='left', padx=5)
-
-# Entry for price range with enhanced styling
-price_frame = ttk.Frame(price_rank_frame)
-price_frame.pack(fill='x', pady=5)
-
-price_min_label = tk.Label(price_frame, text="Minimum Price:", bg='#FFEBEB', font=("Helvetica", 10))
-price_min_label.pack(side='left', padx=5)
-price_min_entry = tk.Entry(price_frame, width=15, font=("Helvetica", 10))
-price_min_entry.pack(side='left', padx=5)
-price_min_entry.insert(0, str(df['price'].min()))  # Set default value
-
-price_max_label = tk.Label(price_frame, text="Maximum Price:", bg='#FFEBEB', font=("Helvetica", 10))
-price_max_label.pack(side='left', padx=5)
-price_max_entry = tk.Entry(price_frame, width=15, font=("Helvetica", 10))
-price_max_entry.pack(side='left', padx=5)
-price_max_entry.insert(0, str(df['price'].max()))  # Set default value
-
-# Entry for rank range with enhanced styling
-rank_frame = ttk.Frame(price_rank_frame)
-rank_frame.pack(fill='x', pady=5)
-
-rank_min_label = tk.Label(rank_frame, text="Minimum Rank:", bg='#FFEBEB', font=("Helvetica", 10))
-rank_min_label.pack(side='left', padx=5)
-rank_min_entry = tk.Entry(rank_frame, width=15, font=("Helvetica", 10))
-rank_min_entry.pack(side='left', padx=5)
-rank_min_entry.insert(0, str(df['rank'].min()))  # Set default value
-
-rank_max_label = tk.Label(rank_frame, text="Maximum Rank:", bg='#FFEBEB', font=("Helvetica", 10))
-rank_max_label.pack(side='left', padx=5)
-rank_max_entry = tk.Entry(rank_frame, width=15, font=("Helvetica", 10))
-rank_max_entry.pack(side='left', padx=5)
-rank_max_entry.insert(0, str(df['rank'].max()))  # Set default value
-
-# Entry for number of rows with enhanced styling
-row_frame = ttk.Frame(price_rank_frame)
-row_frame.pack(fill='x', pady=5)
-
-row_label = tk.Label(row_frame, text="Number of rows to fetch:", bg='#FFEBEB', font=("Helvetica", 10))
-row_label.pack(side='left', padx=5)
-row_entry = tk.Entry(row_frame, width=15, font=("Helvetica", 10))
-row_entry.pack(side='left', padx=5)
-row_entry.insert(0, "10")  # Set default value
-
-# Create buttons frame with enhanced styling
-buttons_frame = ttk.Frame(scrollable_frame)
-buttons_frame.pack(fill='x', padx=20, pady=20)
-
-# Fetch button with enhanced styling
-fetch_button = tk.Button(buttons_frame, 
-                        text="Fetch Data", 
-                        command=lambda: fetch_data(checkbox_vars),
-                        width=20,
-                        height=2,
-                        font=("Helvetica", 12),
-                        bg='#FF6B6B',
-                        fg='white',
-                        relief='raised',
-                        borderwidth=2)
-fetch_button.pack(side='left', padx=10)
 
-# Visualization button with enhanced styling
-visualize_button = tk.Button(buttons_frame, 
-                           text="Visualize Data", 
-                           command=show_visualization_page,
+# Selected ingredient names, kept while the list shows different suggestions
+selected_ingredients = set()
+shown_ingredients = ()
+shown_ingredient_set = set()
+ingredient_search_job = None
+
+# Function to show a list of ingredient names and restore their selection
+def show_ingredients(names):
+    global shown_ingredients, shown_ingredient_set
+    shown_ingredients = names
+    shown_ingredient_set = set(names)
+    ingredients_var.set(names)
+    ingredients_listbox.selection_clear(0, tk.END)
+    if not selected_ingredients:
+        return
+    if names is catalog.ingredient_index.alphabetical_names():
+        positions = catalog.ingredient_index.alphabetical_positions()
+        selected_positions = [positions[name] for name in selected_ingredients if name in positions]
+    else:
+        selected_positions = [i for i, name in enumerate(names) if name in selected_ingredients]
+    for i in selected_positions:
+        ingredients_listbox.selection_set(i)
+
+# Function to refresh the ingredient list from the search box
+def refresh_ingredient_list():
+    global ingredient_search_job
+    ingredient_search_job = None
+    text = ingredient_search_var.get().strip()
+    if text:
+        # Searched on a worker thread; a newer keystroke supersedes the search
+        job_runner.submit('search', search_ingredients, catalog, text, on_done=show_ingredients)
+    else:
+        job_runner.cancel('search')
+        show_ingredients(catalog.ingredient_index.alphabetical_names())
+
+# Runs on the worker thread; waits for the search structures if they are
+# still being built
+def search_ingredients(token, search_catalog, text):
+    return tuple(search_catalog.ingredient_search.search(text, k=50))
+
+# Search shortly after the user stops typing instead of on every keystroke
+def on_ingredient_search(event):
+    global ingredient_search_job
+    if ingredient_search_job is not None:
+        root.after_cancel(ingredient_search_job)
+    ingredient_search_job = root.after(80, refresh_ingredient_list)
+
+# Keep the selection in sync with clicks on the visible suggestions
+def on_ingredient_select(event):
+    global selected_ingredients
+    clicked = {shown_ingredients[i] for i in ingredients_listbox.curselection()}
+    selected_ingredients = (selected_ingredients - shown_ingredient_set) | clicked
+    ingredients_selected_label.config(text=f"Selected: {len(selected_ingredients)}")
+
+# The filter page is only built the first time "Start" is clicked
+main_window_built = False
+
+# Function to build the widgets of the main application window
+def build_main_window():
+    global main_window_built, main_canvas, ingredient_search_var, ingredients_selected_label
+    global ingredients_var, ingredients_listbox
+    global price_min_entry, price_max_entry, rank_min_entry, rank_max_entry, row_entry
+    global price_limits_label, rank_limits_label
+
+    # Create a scrollable frame for the main window with increased width
+    main_canvas = tk.Canvas(main_frame, bg='#FFEBEB', width=1150)  # Set canvas width
+    scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=main_canvas.yview)
+    scrollable_frame = ttk.Frame(main_canvas)
+
+    scrollable_frame.bind(
+        "<Configure>",
+        lambda e: main_canvas.configure(scrollregion=main_canvas.bbox("all"))
+    )
+
+    main_canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+    main_canvas.configure(yscrollcommand=scrollbar.set)
+
+    # Enable mousewheel scrolling
+    main_canvas.bind_all("<MouseWheel>", _on_mousewheel)
+
+    # Configure canvas to expand with window
+    main_frame.grid_rowconfigure(0, weight=1)
+    main_frame.grid_columnconfigure(0, weight=1)
+    main_canvas.configure(width=1150, height=600)  # Set both width and height
+
+    # Add a title to the main window
+    main_title = tk.Label(scrollable_frame, 
+                         text="Cosmetic Product Filter", 
+                         font=("Helvetica", 24, "bold"),
+                         bg='#FFEBEB',
+                         fg='#FF6B6B')
+    main_title.pack(pady=20)
+
+    # Create a frame for filters
+    filters_frame = ttk.LabelFrame(scrollable_frame, text="Filters", padding=10)
+    filters_frame.pack(fill='x', padx=20, pady=10)
+
+    # Create ingredients listbox with scrollbar in a separate frame
+    ingredients_frame = ttk.LabelFrame(filters_frame, text="Ingredients Selection", padding=10)
+    ingredients_frame.pack(fill='x', padx=10, pady=5)
+
+    ingredients_label = tk.Label(ingredients_frame, 
+                               text="Search Ingredients (e.g. Aqua, Glycerin) and click to select multiple:", 
+                               bg='#FFEBEB',
+                               font=("Helvetica", 10))
+    ingredients_label.pack(anchor='w', padx=5, pady=5)
+
+    # Search box for type-ahead ingredient suggestions
+    ingredient_search_frame = ttk.Frame(ingredients_frame)
+    ingredient_search_frame.pack(fill='x', padx=5, pady=5)
+
+    ingredient_search_var = tk.StringVar()
+    ingredient_search_entry = tk.Entry(ingredient_search_frame, 
+                                      textvariable=ingredient_search_var, 
+                                      width=40, 
+                                      font=("Helvetica", 10))
+    ingredient_search_entry.pack(side='left', padx=5)
+
+    ingredients_selected_label = tk.Label(ingredient_search_frame, 
+                                         text="Selected: 0", 
+                                         bg='#FFEBEB', 
+                                         font=("Helvetica", 10))
+    ingredients_selected_label.pack(side='left', padx=10)
+
+    ingredients_var = tk.Variable(value=())
+    ingredients_listbox = tk.Listbox(ingredients_frame, 
+                                    listvariable=ingredients_var,
+                                    selectmode=tk.MULTIPLE, 
+                                    height=5, 
+                                    width=80,
+                                    font=("Helvetica", 10))
+    ingredients_listbox.pack(side='left', fill='both', expand=True, padx=5)
+
+    ingredients_scrollbar = ttk.Scrollbar(ingredients_frame, orient="vertical", command=ingredients_listbox.yview)
+    ingredients_scrollbar.pack(side='right', fill='y')
+    ingredients_listbox.configure(yscrollcommand=ingredients_scrollbar.set)
+
+    ingredient_search_entry.bind("<KeyRelease>", on_ingredient_search)
+    ingredients_listbox.bind("<<ListboxSelect>>", on_ingredient_select)
+
+    # Create a frame for price and rank filters
+    price_rank_frame = ttk.LabelFrame(filters_frame, text="Price and Rank Range", padding=10)
+    price_rank_frame.pack(fill='x', padx=10, pady=5)
+
+    # Display min and max limits
+    limits_frame = ttk.Frame(price_rank_frame)
+    limits_frame.pack(fill='x', pady=5)
+
+    # Price limits
+    price_limits_label = tk.Label(limits_frame, 
+                                text=f"Price Range: {catalog.stats['price'].min:.2f} - {catalog.stats['price'].max:.2f}", 
+                                bg='#FFEBEB', 
+                                font=("Helvetica", 10))
+    price_limits_label.pack(side='left', padx=5)
+
+    # Rank limits
+    rank_limits_label = tk.Label(limits_frame, 
+                               text=f"Rank Range: {catalog.stats['rank'].min} - {catalog.stats['rank'].max}", 
+                               bg='#FFEBEB', 
+                               font=("Helvetica", 10))
+    rank_limits_label.pack(side='left', padx=5)
+
+    # Entry for price range with enhanced styling
+    price_frame = ttk.Frame(price_rank_frame)
+    price_frame.pack(fill='x', pady=5)
+
+    price_min_label = tk.Label(price_frame, text="Minimum Price:", bg='#FFEBEB', font=("Helvetica", 10))
+    price_min_label.pack(side='left', padx=5)
+    price_min_entry = tk.Entry(price_frame, width=15, font=("Helvetica", 10))
+    price_min_entry.pack(side='left', padx=5)
+    price_min_entry.insert(0, str(catalog.stats['price'].min))  # Set default value
+
+    price_max_label = tk.Label(price_frame, text="Maximum Price:", bg='#FFEBEB', font=("Helvetica", 10))
+    price_max_label.pack(side='left', padx=5)
+    price_max_entry = tk.Entry(price_frame, width=15, font=("Helvetica", 10))
+    price_max_entry.pack(side='left', padx=5)
+    price_max_entry.insert(0, str(catalog.stats['price'].max))  # Set default value
+
+    # Entry for rank range with enhanced styling
+    rank_frame = ttk.Frame(price_rank_frame)
+    rank_frame.pack(fill='x', pady=5)
+
+    rank_min_label = tk.Label(rank_frame, text="Minimum Rank:", bg='#FFEBEB', font=("Helvetica", 10))
+    rank_min_label.pack(side='left', padx=5)
+    rank_min_entry = tk.Entry(rank_frame, width=15, font=("Helvetica", 10))
+    rank_min_entry.pack(side='left', padx=5)
+    rank_min_entry.insert(0, str(catalog.stats['rank'].min))  # Set default value
+
+    rank_max_label = tk.Label(rank_frame, text="Maximum Rank:", bg='#FFEBEB', font=("Helvetica", 10))
+    rank_max_label.pack(side='left', padx=5)
+    rank_max_entry = tk.Entry(rank_frame, width=15, font=("Helvetica", 10))
+    rank_max_entry.pack(side='left', padx=5)
+    rank_max_entry.insert(0, str(catalog.stats['rank'].max))  # Set default value
+
+    # Entry for number of rows with enhanced styling
+    row_frame = ttk.Frame(price_rank_frame)
+    row_frame.pack(fill='x', pady=5)
+
+    row_label = tk.Label(row_frame, text="Number of rows to fetch:", bg='#FFEBEB', font=("Helvetica", 10))
+    row_label.pack(side='left', padx=5)
+    row_entry = tk.Entry(row_frame, width=15, font=("Helvetica", 10))
+    row_entry.pack(side='left', padx=5)
+    row_entry.insert(0, "10")  # Set default value
+
+    # Sorted orders return the best rows instead of the first ones in the file
+    sort_label = tk.Label(row_frame, text="Sort by:", bg='#FFEBEB', font=("Helvetica", 10))
+    sort_label.pack(side='left', padx=5)
+    sort_dropdown = ttk.Combobox(row_frame,
+                                 textvariable=sort_var,
+                                 values=list(ORDERINGS),
+                                 state='readonly',
+                                 width=15,
+                                 font=("Helvetica", 10))
+    sort_dropdown.pack(side='left', padx=5)
+
+    # Create buttons frame with enhanced styling
+    buttons_frame = ttk.Frame(scrollable_frame)
+    buttons_frame.pack(fill='x', padx=20, pady=20)
+
+    # Fetch button with enhanced styling
+    fetch_button = tk.Button(buttons_frame, 
+                            text="Fetch Data", 
+                            command=lambda: fetch_data(checkbox_vars),
+                            width=20,
+                            height=2,
+                            font=("Helvetica", 12),
+                            bg='#FF6B6B',
+                            fg='white',
+                            relief='raised',
+                            borderwidth=2)
+    fetch_button.pack(side='left', padx=10)
+
+    # Visualization button with enhanced styling
+    visualize_button = tk.Button(buttons_frame, 
+                               text="Visualize Data", 
+                               command=show_visualization_page,
+                               width=20,
+                               height=2,
+                               font=("Helvetica", 12),
+                               bg='#FF6B6B',
+                               fg='white',
+                               relief='raised',
+                               borderwidth=2)
+    visualize_button.pack(side='left', padx=10)
+
+    # Back button with enhanced styling
+    back_button = tk.Button(buttons_frame, 
+                           text="Back to Start", 
+                           command=lambda: [main_frame.pack_forget(), start_frame.pack(expand=True, fill='both')],
                            width=20,
                            height=2,
                            font=("Helvetica", 12),
@@ -482,73 +630,88 @@ visualize_button = tk.Button(buttons_frame,
                            fg='white',
                            relief='raised',
                            borderwidth=2)
-visualize_button.pack(side='left', padx=10)
-
-# Back button with enhanced styling
-back_button = tk.Button(buttons_frame, 
-                       text="Back to Start", 
-                       command=lambda: [main_frame.pack_forget(), start_frame.pack(expand=True, fill='both')],
-                       width=20,
-                       height=2,
-                       font=("Helvetica", 12),
-                       bg='#FF6B6B',
-                       fg='white',
-                       relief='raised',
-                       borderwidth=2)
-back_button.pack(side='left', padx=10)
-
-# Create other dropdowns and checkboxes with enhanced styling
-for i, col in enumerate(columns):
-    # Create a frame for each row
-    row_frame = ttk.Frame(scrollable_frame)
-    row_frame.pack(fill='x', padx=10, pady=5)
-    
-    label = tk.Label(row_frame, 
-                    text=col.title(), 
-                    bg='#FFEBEB',
-                    font=("Helvetica", 10))  # Capitalize the label
-    label.pack(side='left', padx=10)
-    
-    if col == 'brand':  # Only brand gets a dropdown
-        # Create a frame to hold dropdown and buttons
-        dropdown_frame = ttk.Frame(row_frame)
-        dropdown_frame.pack(side='left', fill='x', expand=True)
-        
-        dropdown = ttk.Combobox(dropdown_frame, 
-                              textvariable=column_vars[col], 
-                              state='readonly',
-                              width=40,
-                              font=("Helvetica", 10))
-        dropdown.pack(side='left', fill='x', expand=True)
-        dropdowns[col] = dropdown
-        
-        # Add Select All button for brand
-        select_all_button = tk.Button(dropdown_frame, 
-                                    text="Select All", 
-                                    command=lambda: column_vars['brand'].set('All Brands'),
-                                    font=("Helvetica", 10),
-                                    bg='#FF6B6B',
-                                    fg='white',
-                                    relief='raised',
-                                    borderwidth=2)
-        select_all_button.pack(side='left', padx=5)
-        
-        # Populate brand dropdown immediately with "All Brands" option
-        unique_values = ['All Brands'] + sorted(df[col].unique().tolist())
-        dropdowns[col]['values'] = unique_values
-        column_vars[col].set('All Brands')  # Set default value
-    else:
-        # All other columns just get checkboxes
-        checkbox = tk.Checkbutton(row_frame, 
-                                text='Enable', 
-                                variable=checkbox_vars[col],
-                                bg='#FFEBEB',
-                                font=("Helvetica", 10))
-        checkbox.pack(side='left', padx=10)
-
-# Pack the scrollbar and canvas
-scrollbar.pack(side="right", fill="y")
-main_canvas.pack(side="left", fill="both", expand=True)
+    back_button.pack(side='left', padx=10)
+
+    # Diagnostics button with enhanced styling
+    diagnostics_button = tk.Button(buttons_frame,
+                                   text="Diagnostics",
+                                   command=show_diagnostics,
+                                   width=20,
+                                   height=2,
+                                   font=("Helvetica", 12),
+                                   bg='#FF6B6B',
+                                   fg='white',
+                                   relief='raised',
+                                   borderwidth=2)
+    diagnostics_button.pack(side='left', padx=10)
+
+    # Create other dropdowns and checkboxes with enhanced styling
+    for i, col in enumerate(columns):
+        # Create a frame for each row
+        row_frame = ttk.Frame(scrollable_frame)
+        row_frame.pack(fill='x', padx=10, pady=5)
+
+        label = tk.Label(row_frame, 
+                        text=col.title(), 
+                        bg='#FFEBEB',
+                        font=("Helvetica", 10))  # Capitalize the label
+        label.pack(side='left', padx=10)
+
+        if col == 'brand':  # Only brand gets a dropdown
+            # Create a frame to hold dropdown and buttons
+            dropdown_frame = ttk.Frame(row_frame)
+            dropdown_frame.pack(side='left', fill='x', expand=True)
+
+            dropdown = ttk.Combobox(dropdown_frame, 
+                                  textvariable=column_vars[col], 
+                                  state='readonly',
+                                  width=40,
+                                  font=("Helvetica", 10))
+            dropdown.pack(side='left', fill='x', expand=True)
+            dropdowns[col] = dropdown
+
+            # Add Select All button for brand
+            select_all_button = tk.Button(dropdown_frame, 
+                                        text="Select All", 
+                                        command=lambda: column_vars['brand'].set(ALL_BRANDS),
+                                        font=("Helvetica", 10),
+                                        bg='#FF6B6B',
+                                        fg='white',
+                                        relief='raised',
+                                        borderwidth=2)
+            select_all_button.pack(side='left', padx=5)
+
+            # Populate brand dropdown immediately with "All Brands" option
+            unique_values = [ALL_BRANDS] + catalog.brands
+            dropdowns[col]['values'] = unique_values
+            column_vars[col].set(ALL_BRANDS)  # Set default value
+        else:
+            # All other columns just get checkboxes
+            checkbox = tk.Checkbutton(row_frame, 
+                                    text='Enable', 
+                                    variable=checkbox_vars[col],
+                                    bg='#FFEBEB',
+                                    font=("Helvetica", 10))
+            checkbox.pack(side='left', padx=10)
+
+    # Skin type match mode, below the skin type checkboxes
+    skin_mode_frame = ttk.Frame(scrollable_frame)
+    skin_mode_frame.pack(fill='x', padx=10, pady=5)
+    skin_mode_label = tk.Label(skin_mode_frame, text="Skin Types Match:", bg='#FFEBEB', font=("Helvetica", 10))
+    skin_mode_label.pack(side='left', padx=10)
+    skin_mode_dropdown = ttk.Combobox(skin_mode_frame,
+                                      textvariable=skin_mode_var,
+                                      values=list(SKIN_MODE_LABELS),
+                                      state='readonly',
+                                      width=15,
+                                      font=("Helvetica", 10))
+    skin_mode_dropdown.pack(side='left', padx=10)
+
+    # Pack the scrollbar and canvas
+    scrollbar.pack(side="right", fill="y")
+    main_canvas.pack(side="left", fill="both", expand=True)
+
+    main_window_built = True
 
 # Create the visualization frame with enhanced styling
 visualization_frame = tk.Frame(root, bg='#FFEBEB')
@@ -568,7 +731,10 @@ def create_visualizations():
         return
 
     try:
+        plotting = load_plotting()
+
         # Clear the previous plots
+        job_runner.cancel('chart')
         for widget in visualization_frame.winfo_children():
             if widget != viz_title:  # Don't destroy the title
                 widget.destroy()
@@ -577,151 +743,53 @@ def create_visualizations():
         viz_container = ttk.Frame(visualization_frame)
         viz_container.pack(fill='both', expand=True, padx=10, pady=5)
 
-        # Create a frame to hold the current visualization
-        viz_display_frame = ttk.Frame(viz_container)
+        # Create a frame to hold the current visualization; it keeps its own
+        # size so the chart image never resizes it
+        viz_display_frame = ttk.Frame(viz_container, height=400)
         viz_display_frame.pack(fill='both', expand=True, padx=10, pady=5)
+        viz_display_frame.pack_propagate(False)
 
-        # Function to clear current visualization
-        def clear_visualization():
-            for widget in viz_display_frame.winfo_children():
-                widget.destroy()
+        chart_label = tk.Label(viz_display_frame, bg='#FFEBEB', borderwidth=0, highlightthickness=0)
+        chart_label.pack(fill='both', expand=True)
 
-        # Function to create and display visualizations
-        def show_price_distribution():
-            clear_visualization()
-            try:
-                fig, ax = plt.subplots(figsize=(8, 4))
-                sns.histplot(data=fetched_data, x='price', bins=20, ax=ax)
-                ax.set_title('Price Distribution')
-                ax.set_xlabel('Price ($)')
-                ax.set_ylabel('Count')
-                plt.tight_layout()
-                canvas = FigureCanvasTkAgg(fig, master=viz_display_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill='both', expand=True)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error creating price distribution: {str(e)}")
-
-        def show_brand_distribution():
-            clear_visualization()
-            try:
-                fig, ax = plt.subplots(figsize=(8, 4))
-                brand_counts = fetched_data['brand'].value_counts()
-                brand_counts.plot(kind='bar', ax=ax)
-                ax.set_title('Brand Distribution')
-                ax.set_xlabel('Brand')
-                ax.set_ylabel('Count')
-                ax.tick_params(axis='x', rotation=45)
-                plt.tight_layout()
-                canvas = FigureCanvasTkAgg(fig, master=viz_display_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill='both', expand=True)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error creating brand distribution: {str(e)}")
-
-        def show_price_rank_scatter():
-            clear_visualization()
-            try:
-                fig, ax = plt.subplots(figsize=(8, 4))
-                sns.scatterplot(data=fetched_data, x='price', y='rank', ax=ax)
-                ax.set_title('Price vs Rank')
-                ax.set_xlabel('Price ($)')
-                ax.set_ylabel('Rank')
-                plt.tight_layout()
-                canvas = FigureCanvasTkAgg(fig, master=viz_display_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill='both', expand=True)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error creating price vs rank scatter plot: {str(e)}")
-
-        def show_price_by_brand_box():
-            clear_visualization()
-            try:
-                fig, ax = plt.subplots(figsize=(8, 4))
-                sns.boxplot(data=fetched_data, x='brand', y='price', ax=ax)
-                ax.set_title('Price Distribution by Brand')
-                ax.set_xlabel('Brand')
-                ax.set_ylabel('Price ($)')
-                ax.tick_params(axis='x', rotation=45)
-                plt.tight_layout()
-                canvas = FigureCanvasTkAgg(fig, master=viz_display_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill='both', expand=True)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error creating price by brand box plot: {str(e)}")
-
-        def show_skin_type_distribution():
-            clear_visualization()
-            try:
-                fig, ax = plt.subplots(figsize=(8, 4))
-                skin_types = ['Combination', 'Dry', 'Normal', 'Oily', 'Sensitive']
-                
-                # Get selected skin types from checkboxes
-                selected_skin_types = [st for st in skin_types if checkbox_vars[st].get()]
-                
-                if not selected_skin_types:
-                    messagebox.showwarning("Warning", "Please select at least one skin type.")
-                    return
-                    
-                # Create a dictionary with all skin types, setting unselected ones to 0
-                skin_data = {}
-                for skin_type in skin_types:
-                    if skin_type in selected_skin_types:
-                        skin_data[skin_type] = fetched_data[skin_type].sum()
-                    else:
-                        skin_data[skin_type] = 0
-                
-                # Create a Series from the dictionary
-                skin_series = pd.Series(skin_data)
-                
-                # Only show non-zero values in the pie chart
-                non_zero_data = skin_series[skin_series > 0]
-                
-                if len(non_zero_data) == 0:
-                    messagebox.showwarning("Warning", "No data available for the selected skin types.")
-                    return
-                    
-                # Create pie chart with only non-zero values
-                non_zero_data.plot(kind='pie', autopct='%1.1f%%', ax=ax)
-                ax.set_title('Skin Type Distribution')
-                plt.tight_layout()
-                canvas = FigureCanvasTkAgg(fig, master=viz_display_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill='both', expand=True)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error creating skin type distribution: {str(e)}")
-
-        def show_ingredients_heatmap():
-            clear_visualization()
-            try:
-                # Create a matrix of ingredients
-                ingredients_list = fetched_data['ingredients'].str.split(',').explode().unique()
-                matrix = pd.DataFrame(0, index=fetched_data.index, columns=ingredients_list)
-                
-                for idx, row in fetched_data.iterrows():
-                    for ingredient in row['ingredients'].split(','):
-                        if ingredient in ingredients_list:
-                            matrix.loc[idx, ingredient] = 1
-
-                fig, ax = plt.subplots(figsize=(8, 4))
-                sns.heatmap(matrix, cmap='YlOrRd', ax=ax)
-                ax.set_title('Ingredients Heatmap')
-                plt.tight_layout()
-                canvas = FigureCanvasTkAgg(fig, master=viz_display_frame)
-                canvas.draw()
-                canvas.get_tk_widget().pack(fill='both', expand=True)
-            except Exception as e:
-                messagebox.showerror("Error", f"Error creating ingredients heatmap: {str(e)}")
+        # Chart currently shown, so it can be re-rendered when resized
+        current_chart = {'draw': None, 'error_name': None, 'size': None, 'resize_job': None}
+
+        # Function to render a chart in the background and show the image
+        def show_chart(draw, error_name):
+            size = (max(viz_display_frame.winfo_width(), 400), max(viz_display_frame.winfo_height(), 300))
+            current_chart.update(draw=draw, error_name=error_name, size=size)
+            selected_skin_types = tuple(st for st in SKIN_TYPES if checkbox_vars[st].get())
+
+            def on_done(png):
+                image = tk.PhotoImage(data=base64.b64encode(png))
+                chart_label.configure(image=image)
+                chart_label.image = image  # Keep a reference to prevent garbage collection
+
+            def on_error(e):
+                if isinstance(e, plotting.charts.ChartWarning):
+                    messagebox.showwarning("Warning", str(e))
+                else:
+                    logger.error("Error creating %s", error_name, exc_info=e)
+                    messagebox.showerror("Error", f"Error creating {error_name}: {str(e)}")
+
+            job_runner.submit('chart', plotting.charts.render_chart, plotting.chart_pool, draw, fetched_data, fetched_catalog,
+                              selected_skin_types, size, on_done=on_done, on_error=on_error)
+
+        # Re-render the current chart once the user stops resizing
+        def on_display_resize(event):
+            if current_chart['draw'] is None or (event.width, event.height) == current_chart['size']:
+                return
+            if current_chart['resize_job'] is not None:
+                root.after_cancel(current_chart['resize_job'])
+            current_chart['resize_job'] = root.after(
+                200, lambda: show_chart(current_chart['draw'], current_chart['error_name']))
+
+        viz_display_frame.bind("<Configure>", on_display_resize)
 
         # Create visualization buttons with enhanced styling
-        viz_buttons = [
-            ("Price Distribution", show_price_distribution),
-            ("Brand Distribution", show_brand_distribution),
-            ("Price vs Rank", show_price_rank_scatter),
-            ("Price by Brand", show_price_by_brand_box),
-            ("Skin Type Distribution", show_skin_type_distribution),
-            ("Ingredients Heatmap", show_ingredients_heatmap)
-        ]
+        viz_buttons = [(text, lambda draw=draw, name=name: show_chart(draw, name))
+                       for text, draw, name in plotting.charts.CHARTS]
 
         # Create a frame for buttons with grid layout
         viz_buttons_frame = ttk.Frame(viz_container)
@@ -754,6 +822,7 @@ def create_visualizations():
         back_button.pack(pady=20)
 
     except Exception as e:
+        logger.exception("Error creating visualizations")
         messagebox.showerror("Error", f"Error creating visualizations: {str(e)}")
 
 # Function to go back to the main application window
@@ -761,5 +830,14 @@ def back_to_main():
     visualization_frame.pack_forget()  # Hide the visualization page
     main_frame.pack(expand=True, fill='both')  # Show the main application window
 
+# Startup benchmark hook (benchmarks/startup.py): report the time until the
+# start page is on screen, then quit
+if os.environ.get('GLOWPICK_STARTUP_BENCHMARK'):
+    def _report_startup(event):
+        print(json.dumps({'time_to_first_window': time.perf_counter() - _startup_time,
+                          'plotting_imported': 'matplotlib' in sys.modules}), flush=True)
+        root.after(0, root.destroy)
+    start_frame.bind('<Map>', _report_startup)
+
 # Run the application
 root.mainloop()